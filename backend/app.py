@@ -4,6 +4,9 @@ import mysql.connector
 import os
 from werkzeug.security import generate_password_hash, check_password_hash
 import logging
+from logging.handlers import QueueHandler, QueueListener
+import queue
+import atexit
 from datetime import datetime
 import tempfile
 import shutil
@@ -12,6 +15,7 @@ import threading
 from pathlib import Path
 from dotenv import load_dotenv
 import json
+import zlib
 import requests
 from linkedin_agent import (
     run_agent_sequence,
@@ -62,7 +66,13 @@ DEFAULT_GAP_BUSINESSES = [
 env_path = Path(__file__).parent.parent / '.env'
 load_dotenv(dotenv_path=env_path)
 
-logging.basicConfig(level=logging.DEBUG)
+# Records are queued and written to stderr by a listener thread, so request and
+# agent threads never block on the console write even with DEBUG logging on.
+_log_queue = queue.Queue(-1)
+_log_listener = QueueListener(_log_queue, logging.StreamHandler(), respect_handler_level=True)
+logging.basicConfig(level=logging.DEBUG, handlers=[QueueHandler(_log_queue)])
+_log_listener.start()
+atexit.register(_log_listener.stop)
 app = Flask(__name__)
 CORS(app)  # Enable CORS for frontend requests
 
@@ -73,6 +83,7 @@ DB_USER = os.getenv('DB_USER', 'root')
 DB_PASSWORD = os.getenv('DB_PASSWORD', 'password')
 MAX_LOGO_UPLOAD_BYTES = int(os.getenv('MAX_LOGO_UPLOAD_BYTES', 5 * 1024 * 1024))
 MAX_REFERENCE_IMAGE_BYTES = int(os.getenv('MAX_REFERENCE_IMAGE_BYTES', 10 * 1024 * 1024))
+MAX_JSON_UPLOAD_BYTES = int(os.getenv('MAX_JSON_UPLOAD_BYTES', 50 * 1024 * 1024))
 
 def get_db_connection():
     conn = mysql.connector.connect(
@@ -288,11 +299,25 @@ def signin():
 
 
 # ----------------------------- ACCOUNT -----------------------------
+def _add_created_at_formatted(user):
+    created_at = user.get("created_at")
+    if isinstance(created_at, str):
+        try:
+            created_at = datetime.fromisoformat(created_at)
+        except Exception:
+            try:
+                created_at = datetime.strptime(created_at, "%Y-%m-%d %H:%M:%S")
+            except Exception:
+                created_at = None
+
+    user["created_at_formatted"] = created_at.strftime("%B %Y") if created_at else "N/A"
+
+
 @app.route('/account', methods=['GET', 'POST'])
 def account():
     try:
         data = request.get_json(silent=True) or request.form
-        user_id = data.get('user_id')
+        user_id = data.get('user_id') or request.args.get('user_id')
         if not user_id:
             return jsonify({"success": False, "message": "Missing user_id"}), 400
 
@@ -377,18 +402,11 @@ def account():
         if not user:
             return jsonify({"success": False, "message": "User not found"}), 404
 
-        created_at = user.get("created_at")
-        if isinstance(created_at, str):
-            try:
-                created_at = datetime.fromisoformat(created_at)
-            except Exception:
-                try:
-                    created_at = datetime.strptime(created_at, "%Y-%m-%d %H:%M:%S")
-                except Exception:
-                    created_at = None
-
-        user["created_at_formatted"] = created_at.strftime("%B %Y") if created_at else "N/A"
-        return jsonify({"success": True, "user": user}), 200
+        _add_created_at_formatted(user)
+        response = jsonify({"success": True, "user": user})
+        # Profile data changes rarely; let the frontend reuse it for a short while
+        response.headers["Cache-Control"] = "private, max-age=30"
+        return response, 200
 
     except mysql.connector.Error as err:
         app.logger.error(f"MySQL Error: {err}")
@@ -449,6 +467,57 @@ def linkedin_user_data():
         return jsonify({"success": False, "message": str(e)}), 500
 
 
+@app.route('/api/bootstrap/linkedin-agent', methods=['GET'])
+def linkedin_agent_bootstrap():
+    """Account profile plus saved LinkedIn keywords/tone in one round trip for the LinkedIn agent pages"""
+    conn = None
+    try:
+        user_id = request.args.get('user_id')
+        if not user_id:
+            return jsonify({"success": False, "message": "Missing user_id"}), 400
+
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(
+            "SELECT u.*, ld.keywords AS ld_keywords, ld.tone_of_writing AS ld_tone_of_writing "
+            "FROM users u LEFT JOIN user_linkedin_data ld ON ld.user_id = u.id WHERE u.id=%s",
+            (user_id,)
+        )
+        user = cursor.fetchone()
+        cursor.close()
+        if not user:
+            return jsonify({"success": False, "message": "User not found"}), 404
+
+        keywords = user.pop('ld_keywords', None)
+        tone_of_writing = user.pop('ld_tone_of_writing', None)
+        if isinstance(keywords, str):
+            try:
+                keywords = json.loads(keywords)
+            except Exception:
+                keywords = []
+        _add_created_at_formatted(user)
+
+        return jsonify({
+            "success": True,
+            "user": user,
+            "linkedin_data": {
+                "success": True,
+                "keywords": keywords or [],
+                "tone_of_writing": tone_of_writing or ''
+            }
+        }), 200
+
+    except Exception as e:
+        app.logger.exception("Error bootstrapping LinkedIn agent data")
+        return jsonify({"success": False, "message": str(e)}), 500
+    finally:
+        if conn is not None:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+
 @app.route('/api/linkedin/regenerate-user-data', methods=['POST'])
 def linkedin_regenerate_user_data():
     """Regenerate keywords and tone from user's LinkedIn profile with streaming progress"""
@@ -521,7 +590,7 @@ def linkedin_regenerate_user_data():
                     
                     while time_module.time() < deadline and not found_url:
                         url_with_id = f"{PHANTOM_FETCH_OUTPUT_URL}?id={container_id}"
-                        text = _http_get_text(url_with_id, headers=headers, debug=False)
+                        text = _http_get_text(url_with_id, headers=headers)
                         m = primary_pat.search(text)
                         if m:
                             base = m.group(1).rstrip("/")
@@ -773,7 +842,7 @@ def linkedin_run_agent():
                                         
                                         while time_module.time() < deadline and not found_url:
                                             url_with_id = f"{PHANTOM_FETCH_OUTPUT_URL}?id={container_id}"
-                                            text = _http_get_text(url_with_id, headers=headers, debug=False)
+                                            text = _http_get_text(url_with_id, headers=headers)
                                             m = primary_pat.search(text)
                                             if m:
                                                 base = m.group(1).rstrip("/")
@@ -1960,6 +2029,59 @@ def update_trend_keywords(website_id):
         except:
             pass
 
+@app.route('/update-trend-keywords-batch', methods=['POST'])
+def update_trend_keywords_batch():
+    """Update trend_keywords for several websites in one transaction"""
+    data = request.get_json(silent=True) or {}
+    updates = data.get('updates')
+    if not isinstance(updates, list):
+        return jsonify({"success": False, "message": "updates must be a list"}), 400
+
+    rows = []
+    for update in updates:
+        website_id = update.get('website_id') if isinstance(update, dict) else None
+        trend_keywords = update.get('trend_keywords', []) if isinstance(update, dict) else None
+        if not isinstance(website_id, int) or not isinstance(trend_keywords, list):
+            return jsonify({"success": False, "message": "each update needs an integer website_id and a trend_keywords list"}), 400
+        rows.append((website_id, trend_keywords))
+    if not rows:
+        return jsonify({"success": True, "results": []}), 200
+
+    conn = cursor = None
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        ids = list({website_id for website_id, _ in rows})
+        cursor.execute(
+            f"SELECT id FROM websites WHERE id IN ({', '.join(['%s'] * len(ids))})",
+            ids
+        )
+        existing = {row[0] for row in cursor.fetchall()}
+
+        cursor.executemany(
+            "UPDATE websites SET trend_keywords = %s WHERE id = %s",
+            [(json.dumps(trend_keywords), website_id) for website_id, trend_keywords in rows if website_id in existing]
+        )
+        conn.commit()
+
+        return jsonify({
+            "success": True,
+            "results": [
+                {"website_id": website_id, "updated": website_id in existing}
+                for website_id, _ in rows
+            ]
+        }), 200
+
+    except Exception as e:
+        return jsonify({"success": False, "message": str(e)}), 500
+    finally:
+        try:
+            cursor.close()
+            conn.close()
+        except:
+            pass
+
 # get all websites for a user WITHOUT products
 @app.route('/get-websites/<int:user_id>', methods=['GET'])
 def get_websites(user_id):
@@ -2190,10 +2312,23 @@ def get_website_ids_by_user(user_id):
 def save_uploaded_json():
     """Save uploaded JSON data to the user_json_uploads table"""
     try:
-        data = request.get_json()
+        if request.headers.get('Content-Encoding', '').lower() == 'gzip':
+            # The frontend gzips large catalog uploads; Werkzeug does not decode request bodies.
+            # Inflate at most one byte past the limit so a small gzip bomb can't exhaust memory.
+            try:
+                decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+                raw = decompressor.decompress(request.get_data(), MAX_JSON_UPLOAD_BYTES + 1)
+                if len(raw) > MAX_JSON_UPLOAD_BYTES:
+                    return jsonify({"success": False, "message": "Uploaded JSON is too large"}), 413
+                if not decompressor.eof:
+                    return jsonify({"success": False, "message": "Truncated gzip body"}), 400
+                data = json.loads(raw)
+            except (OSError, zlib.error, ValueError) as e:
+                return jsonify({"success": False, "message": f"Invalid gzip JSON body: {e}"}), 400
+        else:
+            data = request.get_json()
         user_id = data.get("user_id")
         json_data = data.get("json_data")
-        print(json_data, flush=   True)
 
         if not user_id or not json_data:
             return jsonify({"success": False, "message": "Missing user_id or json_data"}), 400
@@ -2207,7 +2342,8 @@ def save_uploaded_json():
             VALUES (%s, %s)
             ON DUPLICATE KEY UPDATE json_data=%s, updated_at=CURRENT_TIMESTAMP
         """
-        cursor.execute(insert_query, (user_id, json.dumps(json_data), json.dumps(json_data)))
+        payload = json.dumps(json_data)
+        cursor.execute(insert_query, (user_id, payload, payload))
 
         conn.commit()
 
@@ -8,14 +8,36 @@ from __future__ import annotations
 import base64
 import json
 import os
+import threading
 import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from io import BytesIO
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
+import httpx
+import numpy as np
 from openai import OpenAI
 from PIL import Image
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import boto3  # optional: only needed when IMAGE_STORAGE=s3
+except ImportError:
+    boto3 = None
+
+try:
+    import h2  # noqa: F401  # enables HTTP/2 in httpx
+    _HTTP2_AVAILABLE = True
+except ImportError:
+    _HTTP2_AVAILABLE = False
+
 SUPPORTED_PLATFORMS = ["linkedin", "instagram_feed", "instagram_story", "twitter", "tiktok"]
+_SUPPORTED = frozenset(SUPPORTED_PLATFORMS)
 DEFAULT_TEXT_MODEL = os.getenv("OPENAI_CONTENT_MODEL", "gpt-4.1-mini")
 DEFAULT_IMAGE_MODEL = os.getenv("OPENAI_IMAGE_MODEL", "gpt-image-1")
 DEFAULT_IMAGE_SIZE = os.getenv("OPENAI_IMAGE_SIZE", "1024x1024")
@@ -30,6 +52,25 @@ def _env_float(name: str, default: float) -> float:
 DEFAULT_LOGO_POSITION = os.getenv("OPENAI_LOGO_POSITION", "bottom-right")
 DEFAULT_LOGO_SCALE = _env_float("OPENAI_LOGO_SCALE", 0.18)
 
+# Concurrency for real-time image generation and the CPU-side logo overlay
+IMAGE_GENERATION_WORKERS = max(1, int(_env_float("IMAGE_GENERATION_WORKERS", 4)))
+IMAGE_OVERLAY_WORKERS = max(1, int(_env_float("IMAGE_OVERLAY_WORKERS", 4)))
+
+# Reuse a generated image when a new prompt embeds within this cosine similarity of an old one.
+# Off by default: it costs an embeddings round trip per image and holds images in process memory.
+IMAGE_SEMANTIC_CACHE = os.getenv("IMAGE_SEMANTIC_CACHE", "0").lower() in ("1", "true", "yes")
+IMAGE_CACHE_EMBED_MODEL = os.getenv("IMAGE_CACHE_EMBED_MODEL", "text-embedding-3-small")
+IMAGE_CACHE_MIN_SIMILARITY = _env_float("IMAGE_CACHE_MIN_SIMILARITY", 0.95)
+IMAGE_CACHE_MAX_ENTRIES = max(1, int(_env_float("IMAGE_CACHE_MAX_ENTRIES", 256)))
+# Total size of cached image URIs across all buckets (a 1024px PNG data URI is ~2-3 MB)
+IMAGE_CACHE_MAX_BYTES = max(1, int(_env_float("IMAGE_CACHE_MAX_BYTES", 64 * 1024 * 1024)))
+
+# "inline" returns base64 data URIs; "s3" uploads media and returns presigned URLs
+IMAGE_STORAGE = os.getenv("IMAGE_STORAGE", "inline").lower()
+IMAGE_STORAGE_BUCKET = os.getenv("IMAGE_STORAGE_BUCKET")
+IMAGE_STORAGE_PREFIX = os.getenv("IMAGE_STORAGE_PREFIX", "generated/")
+IMAGE_STORAGE_URL_TTL = int(_env_float("IMAGE_STORAGE_URL_TTL", 86400))
+
 # Default image sizing per channel (falls back to DEFAULT_IMAGE_SIZE)
 # Note: OpenAI only supports: '1024x1024', '1024x1536', '1536x1024', and 'auto'
 PLATFORM_IMAGE_SIZES = {
@@ -43,32 +84,130 @@ PLATFORM_IMAGE_SIZES = {
 _client: Optional[OpenAI] = None
 
 
+def _dumps_compact(payload: Dict[str, Any]) -> str:
+    """Compact, key-sorted JSON for prompts (no indent whitespace to pay tokens for)."""
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_SORT_KEYS).decode("utf-8")
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+
+
+def _loads(raw: str) -> Any:
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+
 def _get_client() -> OpenAI:
     global _client
     if _client is None:
         api_key = os.getenv("OPENAI_API_KEY")
         if not api_key:
             raise RuntimeError("OPENAI_API_KEY is not configured in the backend environment.")
-        _client = OpenAI(api_key=api_key)
+        # Explicit pool sizing so concurrent image/video calls reuse warm connections
+        http_client = httpx.Client(
+            http2=_HTTP2_AVAILABLE,
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=32, keepalive_expiry=30),
+            timeout=httpx.Timeout(connect=5.0, read=120.0, write=60.0, pool=5.0),
+        )
+        _client = OpenAI(api_key=api_key, http_client=http_client)
     return _client
 
 
-def generate_social_plan(
-    brand_summary: str,
-    campaign_goal: str,
-    target_audience: str,
-    platforms: List[str],
-    num_posts_per_platform: int = 3,
-    extra_instructions: str = "",
-    model: str = DEFAULT_TEXT_MODEL,
-) -> Dict[str, Any]:
-    """Generate platform aware posts and matching image prompts."""
+_s3_client = None
+
+
+def _get_s3_client():
+    global _s3_client
+    if _s3_client is None:
+        if boto3 is None:
+            raise RuntimeError("IMAGE_STORAGE=s3 requires boto3 to be installed.")
+        if not IMAGE_STORAGE_BUCKET:
+            raise RuntimeError("IMAGE_STORAGE_BUCKET is not configured in the backend environment.")
+        # endpoint_url lets MinIO or other S3-compatible stores stand in for AWS
+        _s3_client = boto3.client("s3", endpoint_url=os.getenv("IMAGE_STORAGE_ENDPOINT") or None)
+    return _s3_client
 
-    valid_platforms = [p for p in platforms if p in SUPPORTED_PLATFORMS]
-    if not valid_platforms:
-        raise ValueError(f"No valid platforms provided. Supported platforms: {SUPPORTED_PLATFORMS}")
 
-    system_prompt = """
+def _use_object_storage() -> bool:
+    return IMAGE_STORAGE == "s3"
+
+
+def _upload_and_url(content: bytes, content_type: str) -> str:
+    """Upload media bytes to object storage and return a presigned GET URL."""
+    s3 = _get_s3_client()
+    extension = content_type.split("/")[-1]
+    key = f"{IMAGE_STORAGE_PREFIX}{uuid.uuid4().hex}.{extension}"
+    s3.put_object(Bucket=IMAGE_STORAGE_BUCKET, Key=key, Body=content, ContentType=content_type)
+    return s3.generate_presigned_url(
+        "get_object",
+        Params={"Bucket": IMAGE_STORAGE_BUCKET, "Key": key},
+        ExpiresIn=IMAGE_STORAGE_URL_TTL,
+    )
+
+
+def _publish_image_uri(image_data_uri: str) -> str:
+    """Swap a PNG data URI for an object-storage URL when IMAGE_STORAGE=s3."""
+    if not _use_object_storage() or not image_data_uri or not image_data_uri.startswith("data:"):
+        return image_data_uri
+    b64_data = image_data_uri.split(",", 1)[1]
+    return _upload_and_url(base64.b64decode(b64_data), "image/png")
+
+
+class _SemanticImageCache:
+    """In-process nearest-neighbour cache of generated images, bucketed by (model, size)."""
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._buckets: Dict[Tuple[str, str], Tuple[np.ndarray, List[str]]] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def lookup(self, bucket: Tuple[str, str], vector: np.ndarray, min_similarity: float) -> Optional[str]:
+        with self._lock:
+            entry = self._buckets.get(bucket)
+            if entry is None:
+                return None
+            matrix, uris = entry
+            # Rows are unit-normalised, so the dot product is the cosine similarity
+            scores = matrix @ vector
+            best = int(np.argmax(scores))
+            return uris[best] if scores[best] >= min_similarity else None
+
+    def add(self, bucket: Tuple[str, str], vector: np.ndarray, uri: str) -> None:
+        if len(uri) > self.max_bytes:
+            return
+        with self._lock:
+            matrix, uris = self._buckets.get(bucket, (np.empty((0, vector.shape[0]), dtype=np.float32), []))
+            self._buckets[bucket] = (np.vstack([matrix, vector[None, :]]), uris + [uri])
+            self._bytes += len(uri)
+            if len(uris) + 1 > self.max_entries:
+                self._evict_oldest(bucket)
+            # Drop the oldest entry of the fullest bucket until the byte budget fits
+            while self._bytes > self.max_bytes:
+                self._evict_oldest(max(self._buckets, key=lambda b: len(self._buckets[b][1])))
+
+    def _evict_oldest(self, bucket: Tuple[str, str]) -> None:
+        matrix, uris = self._buckets[bucket]
+        self._bytes -= len(uris[0])
+        if len(uris) == 1:
+            del self._buckets[bucket]
+        else:
+            self._buckets[bucket] = (matrix[1:], uris[1:])
+
+
+_image_cache = _SemanticImageCache(IMAGE_CACHE_MAX_ENTRIES, IMAGE_CACHE_MAX_BYTES)
+
+
+def _embed_prompt(prompt: str) -> Optional[np.ndarray]:
+    try:
+        response = _get_client().embeddings.create(model=IMAGE_CACHE_EMBED_MODEL, input=prompt)
+    except Exception:
+        return None
+    vector = np.asarray(response.data[0].embedding, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else None
+
+
+SOCIAL_PLAN_SYSTEM_PROMPT = """
 You are a senior social media strategist and copywriter.
 
 You will be given:
@@ -135,6 +274,22 @@ Return only valid JSON with the structure:
 }
 """.strip()
 
+
+def generate_social_plan(
+    brand_summary: str,
+    campaign_goal: str,
+    target_audience: str,
+    platforms: List[str],
+    num_posts_per_platform: int = 3,
+    extra_instructions: str = "",
+    model: str = DEFAULT_TEXT_MODEL,
+) -> Dict[str, Any]:
+    """Generate platform aware posts and matching image prompts."""
+
+    valid_platforms = [p for p in platforms if p in _SUPPORTED]
+    if not valid_platforms:
+        raise ValueError(f"No valid platforms provided. Supported platforms: {SUPPORTED_PLATFORMS}")
+
     user_payload = {
         "brand_summary": brand_summary,
         "campaign_goal": campaign_goal,
@@ -148,20 +303,20 @@ Return only valid JSON with the structure:
     completion = client.chat.completions.create(
         model=model,
         messages=[
-            {"role": "system", "content": system_prompt},
+            {"role": "system", "content": SOCIAL_PLAN_SYSTEM_PROMPT},
             {
                 "role": "user",
                 "content": (
                     "Generate social posts and image prompts in JSON only. "
                     "Here is the campaign brief:\n"
-                    + json.dumps(user_payload, ensure_ascii=False, indent=2)
+                    + _dumps_compact(user_payload)
                 ),
             },
         ],
         response_format={"type": "json_object"},
     )
 
-    data = json.loads(completion.choices[0].message.content)
+    data = _loads(completion.choices[0].message.content)
     return data
 
 
@@ -171,8 +326,13 @@ def generate_image_with_gpt(
     model: str = DEFAULT_IMAGE_MODEL,
     base_image_bytes: Optional[bytes] = None,
     base_image_name: Optional[str] = None,
+    publish: bool = True,
 ) -> str:
-    """Generate or edit an image via OpenAI's image model and return a data URI."""
+    """Generate or edit an image via OpenAI's image model and return a data URI.
+
+    With IMAGE_STORAGE=s3 a presigned URL is returned instead, unless publish is False
+    (used when the image is post-processed before it leaves the backend).
+    """
     client = _get_client()
     if base_image_bytes:
         # When the user supplies a reference asset we use the edit endpoint so GPT-Image
@@ -186,12 +346,23 @@ def generate_image_with_gpt(
             size=size,
         )
     else:
+        # Near-duplicate prompts (common across platforms) reuse an earlier image
+        # instead of paying for another generation
+        cache_key = (model, size)
+        vector = _embed_prompt(prompt) if IMAGE_SEMANTIC_CACHE else None
+        cached = _image_cache.lookup(cache_key, vector, IMAGE_CACHE_MIN_SIMILARITY) if vector is not None else None
+        if cached:
+            return _publish_image_uri(cached) if publish else cached
         result = client.images.generate(
             model=model,
             prompt=prompt,
             size=size,
         )
+        if vector is not None:
+            _image_cache.add(cache_key, vector, f"data:image/png;base64,{result.data[0].b64_json}")
     b64_data = result.data[0].b64_json
+    if publish and _use_object_storage():
+        return _upload_and_url(base64.b64decode(b64_data), "image/png")
     return f"data:image/png;base64,{b64_data}"
 
 
@@ -211,10 +382,20 @@ def generate_video_with_sora(prompt: str, model: str = DEFAULT_VIDEO_MODEL, max_
         prompt=prompt, # Maximum duration in seconds (typically 4 for Sora)
     )
     
-    # Poll for completion
+    # Poll for completion, honoring the server's Retry-After hint and otherwise
+    # backing off exponentially (capped at 8s) instead of waking every 2s
+    delay = 1.0
+    retry_after = None
     while video.status in ("in_progress", "queued"):
-        time.sleep(2)  # Wait 2 seconds between checks
-        video = client.videos.retrieve(video.id)
+        try:
+            wait = float(retry_after) if retry_after else min(delay, 8.0)
+        except ValueError:
+            wait = min(delay, 8.0)
+        time.sleep(wait)
+        delay *= 1.5
+        raw = client.videos.with_raw_response.retrieve(video.id)
+        retry_after = raw.headers.get("retry-after")
+        video = raw.parse()
         
         if video.status == "failed":
             error_message = getattr(getattr(video, "error", None), "message", "Video generation failed")
@@ -223,13 +404,25 @@ def generate_video_with_sora(prompt: str, model: str = DEFAULT_VIDEO_MODEL, max_
     if video.status != "completed":
         raise RuntimeError(f"Video generation ended with status: {video.status}")
     
-    # Download video content
-    video_content = client.videos.download_content(video.id, variant="video")
-    video_bytes = video_content.read()
-    
-    # Convert to base64 data URI
-    b64_data = base64.b64encode(video_bytes).decode("utf-8")
-    return f"data:video/mp4;base64,{b64_data}"
+    # Stream the download so the whole MP4 and its base64 copy never sit in memory together
+    with client.videos.with_streaming_response.download_content(video.id, variant="video") as response:
+        if _use_object_storage():
+            # Skip base64 entirely; the browser streams the clip from the bucket
+            return _upload_and_url(b"".join(response.iter_bytes(chunk_size=65536)), "video/mp4")
+
+        encoded = BytesIO()
+        encoded.write(b"data:video/mp4;base64,")
+        pending = b""
+        for chunk in response.iter_bytes(chunk_size=65536):
+            pending += chunk
+            # base64 works on 3-byte groups; carry the remainder to the next chunk
+            usable = len(pending) - len(pending) % 3
+            if usable:
+                encoded.write(base64.b64encode(pending[:usable]))
+                pending = pending[usable:]
+        if pending:
+            encoded.write(base64.b64encode(pending))
+    return encoded.getvalue().decode("ascii")
 
 
 def overlay_logo_on_image(
@@ -256,20 +449,25 @@ def overlay_logo_on_image(
     logo_image = logo_image.resize((target_width, target_height), Image.LANCZOS)
 
     margin = max(4, int(base_image.width * 0.03))
-    positions = {
-        "top-left": (margin, margin),
-        "top-right": (base_image.width - target_width - margin, margin),
-        "bottom-left": (margin, base_image.height - target_height - margin),
-        "bottom-right": (base_image.width - target_width - margin, base_image.height - target_height - margin),
-        "center": ((base_image.width - target_width) // 2, (base_image.height - target_height) // 2),
-    }
-    px, py = positions.get(position.lower(), positions["bottom-right"])
+    position = position.lower()
+    if position == "top-left":
+        px, py = margin, margin
+    elif position == "top-right":
+        px, py = base_image.width - target_width - margin, margin
+    elif position == "bottom-left":
+        px, py = margin, base_image.height - target_height - margin
+    elif position == "center":
+        px, py = (base_image.width - target_width) // 2, (base_image.height - target_height) // 2
+    else:  # bottom-right and unknown values
+        px, py = base_image.width - target_width - margin, base_image.height - target_height - margin
     px = max(0, min(base_image.width - target_width, px))
     py = max(0, min(base_image.height - target_height, py))
 
     base_image.paste(logo_image, (px, py), logo_image)
     buffer = BytesIO()
     base_image.save(buffer, format="PNG")
+    if _use_object_storage():
+        return _upload_and_url(buffer.getvalue(), "image/png")
     encoded = base64.b64encode(buffer.getvalue()).decode("utf-8")
     return f"data:image/png;base64,{encoded}"
 
@@ -290,22 +488,52 @@ def attach_images_to_plan(
     if platform_image_sizes:
         size_map.update({k: v for k, v in platform_image_sizes.items() if isinstance(v, str)})
 
+    # Flatten the qualifying posts once so the pools are sized to the real workload
+    work = []
     for platform in social_plan.get("platforms", []):
         platform_name = platform.get("name", "").lower()
         image_size = size_map.get(platform_name, default_size)
         for post in platform.get("posts", []):
-            prompt = post.get("image_prompt")
-            if not prompt:
-                continue
+            if post.get("image_prompt"):
+                work.append((post, image_size))
+    if not work:
+        return social_plan
+
+    def _render(prompt: str, image_size: str) -> str:
+        return generate_image_with_gpt(prompt, size=image_size, model=model, base_image_bytes=reference_image_bytes, base_image_name=reference_image_name, publish=False,)
+
+    def _finalize(uri: str) -> str:
+        if logo_bytes:
+            return overlay_logo_on_image(uri, logo_bytes, position=logo_position, scale=logo_scale)
+        return _publish_image_uri(uri)
+
+    def _set_error(post: Dict[str, Any], exc: Exception) -> None:
+        post["image_data_uri"] = None
+        post["image_error"] = str(exc)
+
+    # Network-bound generations run on one pool while logo overlays (Pillow releases the
+    # GIL) run on another, so each overlay hides behind the generations still in flight.
+    with ThreadPoolExecutor(max_workers=min(IMAGE_GENERATION_WORKERS, len(work))) as gen_pool, \
+            ThreadPoolExecutor(max_workers=min(IMAGE_OVERLAY_WORKERS, len(work))) as overlay_pool:
+        generating = {
+            gen_pool.submit(_render, post["image_prompt"], image_size): post
+            for post, image_size in work
+        }
+
+        finishing = {}
+        for future in as_completed(generating):
+            post = generating[future]
             try:
-                uri = generate_image_with_gpt(prompt, size=image_size, model=model, base_image_bytes=reference_image_bytes, base_image_name=reference_image_name,)
-                if logo_bytes:
-                    uri = overlay_logo_on_image(uri, logo_bytes, position=logo_position, scale=logo_scale)
-                post["image_data_uri"] = uri
+                finishing[overlay_pool.submit(_finalize, future.result())] = post
+            except Exception as exc:
+                _set_error(post, exc)
+
+        for future, post in finishing.items():
+            try:
+                post["image_data_uri"] = future.result()
                 post.pop("image_error", None)
             except Exception as exc:
-                post["image_data_uri"] = None
-                post["image_error"] = str(exc)
+                _set_error(post, exc)
     return social_plan
 
 
@@ -321,6 +549,7 @@ def attach_videos_to_plan(
         model: Sora model name (default: sora-2)
         max_duration: Maximum video duration in seconds (default: 4)
     """
+    work = []
     for platform in social_plan.get("platforms", []):
         for post in platform.get("posts", []):
             # Use image_prompt as video prompt, or create a video-specific prompt
@@ -328,18 +557,19 @@ def attach_videos_to_plan(
             if not prompt:
                 # Create a video prompt from the text if no image prompt exists
                 text = post.get("text", "")
-                if text:
-                    prompt = f"Create a dynamic, engaging video reel for: {text[:200]}"
-                else:
+                if not text:
                     continue
-            
-            try:
-                uri = generate_video_with_sora(prompt, model=model, max_duration=max_duration)
-                post["video_data_uri"] = uri
-                post.pop("video_error", None)
-            except Exception as exc:
-                post["video_data_uri"] = None
-                post["video_error"] = str(exc)
+                prompt = f"Create a dynamic, engaging video reel for: {text[:200]}"
+            work.append((post, prompt))
+
+    for post, prompt in work:
+        try:
+            uri = generate_video_with_sora(prompt, model=model, max_duration=max_duration)
+            post["video_data_uri"] = uri
+            post.pop("video_error", None)
+        except Exception as exc:
+            post["video_data_uri"] = None
+            post["video_error"] = str(exc)
     return social_plan
 
 
@@ -1,15 +1,36 @@
 from __future__ import annotations
 
+import hashlib
 import json
 import os
+import re
+import sqlite3
+import threading
 from collections import Counter
-from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache
 from typing import Any, Dict, List, Optional, Tuple
 
 import numpy as np
 from openai import OpenAI
 
 import logging
+try:
+    import blake3
+except ImportError:
+    blake3 = None
+
+try:
+    import simsimd
+except ImportError:
+    simsimd = None
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = prange = None
+
 try:
     from linkedin_agent import fetch_trends_firecrawl as _fetch_trends_firecrawl
 except Exception:
@@ -21,6 +42,19 @@ SIMILARITY_THRESHOLDS = {
     "covered": float(os.getenv("GAP_THRESHOLD_COVERED", 0.65)),
     "weak": float(os.getenv("GAP_THRESHOLD_WEAK", 0.4)),
 }
+EMBED_BATCH_SIZE = max(1, int(os.getenv("GAP_EMBED_BATCH_SIZE", 128)))
+EMBED_CONCURRENCY = max(1, int(os.getenv("GAP_EMBED_CONCURRENCY", 5)))
+# Persistent content-addressed embedding cache (sqlite); disabled when unset
+EMBED_CACHE_PATH = os.getenv("GAP_EMBED_CACHE_PATH", "")
+EMBED_MEMORY_CACHE_SIZE = max(0, int(os.getenv("GAP_EMBED_MEMORY_CACHE_SIZE", 4096)))
+# Max characters of each trend/product summary sent to the reasoning prompt
+SUMMARY_PROMPT_CHARS = max(1, int(os.getenv("GAP_SUMMARY_PROMPT_CHARS", 240)))
+# "auto" tries simsimd then numpy BLAS; "numba" opts into the JIT kernel below
+SIMILARITY_BACKEND = os.getenv("GAP_SIMILARITY_BACKEND", "auto").lower()
+# Score with int8-quantised embeddings when simsimd is available (float32 otherwise)
+GAP_INT8_SIMILARITY = os.getenv("GAP_INT8_SIMILARITY", "1").lower() not in ("0", "false", "no")
+
+_TOKEN_RE = re.compile(r"[A-Za-z0-9][A-Za-z0-9\-]*")
 
 _client: Optional[OpenAI] = None
 
@@ -74,6 +108,11 @@ def fetch_trends_via_firecrawl(
     return formatted
 
 
+def _debug_enabled() -> bool:
+    # Checked once per call site so hot loops skip argument building when DEBUG is off
+    return logging.getLogger().isEnabledFor(logging.DEBUG)
+
+
 def _get_client() -> OpenAI:
     global _client
     if _client is None:
@@ -84,58 +123,246 @@ def _get_client() -> OpenAI:
     return _client
 
 
+def _embed_chunk(texts: List[str]) -> List[np.ndarray]:
+    resp = _get_client().embeddings.create(model=EMBED_MODEL, input=texts)
+    if not resp.data:
+        return []
+    # One contiguous allocation for the whole chunk; rows are handed out as views
+    out = np.empty((len(resp.data), len(resp.data[0].embedding)), dtype=np.float32)
+    for i, item in enumerate(resp.data):
+        out[i] = item.embedding
+    # Unit-normalise once so similarity downstream is a plain dot product
+    norms = np.linalg.norm(out, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    out /= norms
+    return list(out)
+
+
+class _EmbeddingCache:
+    """sqlite-backed map of hash(model, text) -> unit float32 vector."""
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+        self._conn.commit()
+
+    @staticmethod
+    def key(text: str) -> str:
+        data = (EMBED_MODEL + "\x00" + text).encode("utf-8")
+        if blake3 is not None:
+            return blake3.blake3(data).hexdigest()
+        return hashlib.blake2b(data, digest_size=32).hexdigest()
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        found: Dict[str, np.ndarray] = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32).copy()
+        return found
+
+    def put_many(self, items: List[Tuple[str, np.ndarray]]) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                [(key, vec.astype(np.float32).tobytes()) for key, vec in items],
+            )
+            self._conn.commit()
+
+
+_embed_cache: Optional[_EmbeddingCache] = None
+_MEM_CACHE: Dict[Tuple[str, str], np.ndarray] = {}
+_MEM_CACHE_LOCK = threading.Lock()
+
+
+def _get_embed_cache() -> Optional[_EmbeddingCache]:
+    global _embed_cache
+    if _embed_cache is None and EMBED_CACHE_PATH:
+        try:
+            _embed_cache = _EmbeddingCache(EMBED_CACHE_PATH)
+        except sqlite3.Error as err:
+            logging.warning("Embedding cache unavailable at %s: %s", EMBED_CACHE_PATH, err)
+            return None
+    return _embed_cache
+
+
+def _embed_uncached(texts: List[str]) -> List[np.ndarray]:
+    chunks = [texts[i:i + EMBED_BATCH_SIZE] for i in range(0, len(texts), EMBED_BATCH_SIZE)]
+    if len(chunks) <= 1:
+        return _embed_chunk(texts) if texts else []
+    # Independent chunks go out concurrently; map() keeps them in input order
+    with ThreadPoolExecutor(max_workers=min(EMBED_CONCURRENCY, len(chunks))) as pool:
+        return [vec for chunk_vectors in pool.map(_embed_chunk, chunks) for vec in chunk_vectors]
+
+
+def _embed_persistent(texts: List[str]) -> List[np.ndarray]:
+    """Embed unique texts, going through the sqlite cache when one is configured."""
+    cache = _get_embed_cache()
+    if cache is None:
+        return _embed_uncached(texts)
+    keys = [cache.key(text) for text in texts]
+    cached = cache.get_many(keys)
+    miss_keys = [key for key in keys if key not in cached]
+    miss_texts = [text for key, text in zip(keys, texts) if key not in cached]
+    if miss_texts:
+        fresh = _embed_uncached(miss_texts)
+        cache.put_many(list(zip(miss_keys, fresh)))
+        cached.update(zip(miss_keys, fresh))
+    logging.debug("Embedding disk cache: %d hits, %d misses", len(texts) - len(miss_texts), len(miss_texts))
+    return [cached[key] for key in keys]
+
+
 def _embed(texts: List[str]) -> List[np.ndarray]:
-    client = _get_client()
-    logging.debug("Embedding %d texts", len(texts))
-    for idx, sample in enumerate(texts[:5]):
-        logging.debug("[EMBED INPUT %d]: %s", idx + 1, sample)
-    resp = client.embeddings.create(model=EMBED_MODEL, input=texts)
-    vectors = [np.array(item.embedding, dtype=np.float32) for item in resp.data]
-    logging.debug("Embedding output shapes: %s", [vec.shape for vec in vectors[:5]])
+    debug = _debug_enabled()
+    if debug:
+        logging.debug("Embedding %d texts", len(texts))
+        for idx, sample in enumerate(texts[:5]):
+            logging.debug("[EMBED INPUT %d]: %s", idx + 1, sample)
+    # In-process tier first, then the disk tier, then the API; duplicates within a call embed once
+    with _MEM_CACHE_LOCK:
+        found = {text: _MEM_CACHE[(EMBED_MODEL, text)] for text in texts if (EMBED_MODEL, text) in _MEM_CACHE}
+    misses = list(dict.fromkeys(text for text in texts if text not in found))
+    if misses:
+        fresh = _embed_persistent(misses)
+        found.update(zip(misses, fresh))
+        with _MEM_CACHE_LOCK:
+            for text, vec in zip(misses, fresh):
+                _MEM_CACHE[(EMBED_MODEL, text)] = vec
+            while len(_MEM_CACHE) > EMBED_MEMORY_CACHE_SIZE:
+                _MEM_CACHE.pop(next(iter(_MEM_CACHE)))
+    vectors = [found[text] for text in texts]
+    if debug:
+        logging.debug("Embedding memory cache: %d hits, %d misses", len(texts) - len(misses), len(misses))
+        logging.debug("Embedding output shapes: %s", [vec.shape for vec in vectors[:5]])
     return vectors
 
 
-def _cosine(a: np.ndarray, b: np.ndarray) -> float:
-    denom = np.linalg.norm(a) * np.linalg.norm(b)
-    if denom == 0:
-        return 0.0
-    return float(np.dot(a, b) / denom)
+def _quantize_int8(vector: np.ndarray) -> np.ndarray:
+    # Unit vectors live in [-1, 1], so a fixed 127 scale keeps full int8 range
+    return np.round(vector * 127).astype(np.int8)
+
+
+if njit is not None:
+    @njit(fastmath=True, parallel=True, cache=True)
+    def _dot_matrix_numba(trend_matrix, product_matrix):
+        out = np.empty((trend_matrix.shape[0], product_matrix.shape[0]), dtype=np.float32)
+        for i in prange(trend_matrix.shape[0]):
+            for j in range(product_matrix.shape[0]):
+                acc = 0.0
+                for k in range(trend_matrix.shape[1]):
+                    acc += trend_matrix[i, k] * product_matrix[j, k]
+                out[i, j] = acc
+        return out
+else:
+    _dot_matrix_numba = None
+
+
+def _similarity_matrix(
+    trend_matrix: np.ndarray,
+    product_matrix: np.ndarray,
+    trend_matrix_i8: Optional[np.ndarray] = None,
+    product_matrix_i8: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """Cosine similarity of every trend row against every product row."""
+    if SIMILARITY_BACKEND == "numba" and _dot_matrix_numba is not None:
+        # Rows are unit vectors, so the plain dot-product kernel yields cosine scores
+        return _dot_matrix_numba(trend_matrix, product_matrix)
+    if simsimd is not None and SIMILARITY_BACKEND in ("auto", "simsimd"):
+        try:
+            # SIMD kernels (AVX-512/NEON) beat generic BLAS on these wide embeddings; the
+            # int8 copies move a quarter of the bytes and hit the VNNI dot-product paths
+            if GAP_INT8_SIMILARITY and trend_matrix_i8 is not None and product_matrix_i8 is not None:
+                return 1.0 - np.asarray(simsimd.cdist(trend_matrix_i8, product_matrix_i8, metric="cosine"))
+            return 1.0 - np.asarray(simsimd.cdist(trend_matrix, product_matrix, metric="cosine"))
+        except Exception as err:
+            logging.debug("simsimd cdist failed, falling back to matmul: %s", err)
+    return trend_matrix @ product_matrix.T
 
 
 @dataclass
-class ProductVector:
-    business: str
-    product: str
-    description: str
-    vector: np.ndarray
+class VectorTable:
+    """Struct-of-arrays embedding store: one C-contiguous matrix plus parallel metadata rows."""
+
+    matrix: np.ndarray
+    meta: List[Dict[str, Any]]
+    matrix_i8: np.ndarray = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.matrix = np.ascontiguousarray(self.matrix, dtype=np.float32)
+        self.matrix_i8 = _quantize_int8(self.matrix)
+
+    def __len__(self) -> int:
+        return len(self.meta)
+
+    @classmethod
+    def from_vectors(cls, vectors: List[np.ndarray], meta: List[Dict[str, Any]]) -> "VectorTable":
+        if not vectors:
+            return cls(matrix=np.zeros((0, 0), dtype=np.float32), meta=[])
+        return cls(matrix=np.stack(vectors), meta=meta)
 
 
 @dataclass
-class TrendVector:
-    name: str
-    insight: str
-    evidence: str
-    impact: str
-    vector: np.ndarray
+class CatalogScan:
+    """Everything the catalog report needs, gathered in one walk over businesses/products."""
+
+    products: List[Dict[str, Any]] = field(default_factory=list)
+    business_names: set = field(default_factory=set)
+    prices: List[float] = field(default_factory=list)
+    desc_lengths: List[int] = field(default_factory=list)
+    name_lengths: List[int] = field(default_factory=list)
+    empty_descriptions: int = 0
+    products_per_business: Counter = field(default_factory=Counter)
+    product_keywords: Counter = field(default_factory=Counter)
+    primary_keywords: Counter = field(default_factory=Counter)
+    secondary_keywords: Counter = field(default_factory=Counter)
+    trending_topics: Counter = field(default_factory=Counter)
+
 
+def _bump(counter: Counter, tokens) -> None:
+    counter.update(token.lower() for token in tokens or [] if token)
 
-def _flatten_products(businesses: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    items: List[Dict[str, Any]] = []
+
+def _scan_catalog(businesses: List[Dict[str, Any]]) -> CatalogScan:
+    scan = CatalogScan()
     for biz in businesses or []:
+        scan.business_names.add(biz.get("name") or biz.get("company_name"))
+        _bump(scan.primary_keywords, biz.get("primary_keywords"))
+        _bump(scan.secondary_keywords, biz.get("secondary_keywords"))
+        _bump(scan.trending_topics, biz.get("trending_topics"))
         biz_name = biz.get("name") or biz.get("company_name") or "Unknown Business"
         for product in biz.get("products", []):
             price_raw = product.get("pricing") or product.get("price")
-            items.append(
+            price_numeric = _parse_price(price_raw)
+            name = product.get("name", "").strip()
+            description = (product.get("description") or "").strip()
+            keywords = product.get("keywords") or []
+            scan.products.append(
                 {
                     "business": biz_name,
-                    "name": product.get("name", "").strip(),
-                    "description": (product.get("description") or "").strip(),
-                    "keywords": product.get("keywords") or [],
+                    "name": name,
+                    "description": description,
+                    "keywords": keywords,
                     "pricing_raw": price_raw,
-                    "price_numeric": _parse_price(price_raw),
+                    "price_numeric": price_numeric,
                 }
             )
-    return items
+            scan.products_per_business[biz_name] += 1
+            if price_numeric is not None:
+                scan.prices.append(price_numeric)
+            if description:
+                scan.desc_lengths.append(len(description))
+            else:
+                scan.empty_descriptions += 1
+            if name:
+                scan.name_lengths.append(len(name))
+            _bump(scan.product_keywords, keywords)
+    return scan
 
 
 def _parse_price(price: Optional[str]) -> Optional[float]:
@@ -156,7 +383,7 @@ def _parse_price(price: Optional[str]) -> Optional[float]:
         return None
 
 
-def _prepare_product_vectors(businesses: List[Dict[str, Any]]) -> List[ProductVector]:
+def _product_rows(businesses: List[Dict[str, Any]]) -> Tuple[List[Tuple[str, str, str, str]], List[str]]:
     rows, texts = [], []
     for biz in businesses or []:
         biz_name = biz.get("name", "Unknown Business")
@@ -176,64 +403,65 @@ def _prepare_product_vectors(businesses: List[Dict[str, Any]]) -> List[ProductVe
                 continue
             rows.append((biz_name, product.get("name", "Unnamed"), product.get("description", ""), text))
             texts.append(text)
-    vectors = _embed(texts) if texts else []
-    logging.debug("Product embedding input: %s", texts)
-    logging.debug("Product embedding output shapes: %s", [vec.shape for vec in vectors])
-    return [
-        ProductVector(business=biz, product=prod, description=desc, vector=vec)
-        for (biz, prod, desc, _), vec in zip(rows, vectors)
-    ]
+    return rows, texts
+
+
+def _build_product_table(rows: List[Tuple[str, str, str, str]], vectors: List[np.ndarray]) -> VectorTable:
+    if _debug_enabled():
+        logging.debug("Product embedding input: %s", [text for *_, text in rows])
+        logging.debug("Product embedding output shapes: %s", [vec.shape for vec in vectors])
+    meta = [{"business": biz, "product": prod, "description": desc} for biz, prod, desc, _ in rows]
+    return VectorTable.from_vectors(vectors, meta[:len(vectors)])
+
+
+_TREND_KEYWORD_FIELDS = (
+    "keywords",
+    "semantic_keywords",
+    "products_services",
+    "relevant_products",
+    "relevant_products_services",
+    "relevant_products_or_services",
+)
 
 
 def _normalize_trend_record(raw: Dict[str, Any]) -> Optional[Dict[str, Any]]:
     if not isinstance(raw, dict):
         return None
-    title = (
-        raw.get("trend")
-        or raw.get("title")
-        or raw.get("core_concept")
-        or raw.get("industry")
-        or raw.get("name")
-    )
+    get = raw.get
+    title = get("trend") or get("title") or get("core_concept") or get("industry") or get("name")
     if not title:
         return None
     description_parts: List[str] = []
-    for field in ("description", "business_value"):
-        value = raw.get(field)
-        if isinstance(value, str) and value.strip():
-            description_parts.append(value.strip())
-    core_concept = raw.get("core_concept")
+    append = description_parts.append
+    for field_name in ("description", "business_value"):
+        value = get(field_name)
+        if isinstance(value, str):
+            value = value.strip()
+            if value:
+                append(value)
+    core_concept = get("core_concept")
     if core_concept and core_concept != title:
-        description_parts.append(str(core_concept))
-    target = raw.get("target_audience")
+        append(str(core_concept))
+    target = get("target_audience")
     if isinstance(target, list) and target:
-        audience = ", ".join(str(item).strip() for item in target if str(item).strip())
+        audience = ", ".join(filter(None, map(str.strip, map(str, target))))
         if audience:
-            description_parts.append(f"Audience: {audience}")
+            append(f"Audience: {audience}")
     elif isinstance(target, str) and target.strip():
-        description_parts.append(f"Audience: {target.strip()}")
-    domain = raw.get("domain")
+        append(f"Audience: {target.strip()}")
+    domain = get("domain")
     if isinstance(domain, str) and domain.strip() and domain.lower() != "unknown":
-        description_parts.append(f"Domain: {domain.strip()}")
-    raw_keywords = []
-    for key_field in (
-        "keywords",
-        "semantic_keywords",
-        "products_services",
-        "relevant_products",
-        "relevant_products_services",
-        "relevant_products_or_services",
-    ):
-        field_value = raw.get(key_field)
+        append(f"Domain: {domain.strip()}")
+    raw_keywords: List[Any] = []
+    for key_field in _TREND_KEYWORD_FIELDS:
+        field_value = get(key_field)
         if isinstance(field_value, list):
             raw_keywords.extend(field_value)
-    normalized_keywords: List[str] = [
-        str(item).strip() for item in raw_keywords if str(item).strip()
-    ]
-    description = " ".join(description_parts).strip()
+    # map/filter keep the per-item str/strip work in C
+    normalized_keywords: List[str] = list(filter(None, map(str.strip, map(str, raw_keywords))))
     return {
         "trend": title,
-        "description": description,
+        "description": " ".join(description_parts).strip(),
         "keywords": normalized_keywords,
     }
 
@@ -253,7 +481,7 @@ def _flatten_trend_records(trends: List[Dict[str, Any]]) -> List[Dict[str, Any]]
     return flattened
 
 
-def _prepare_trend_vectors(trends: List[Dict[str, Any]]) -> List[TrendVector]:
+def _trend_rows(trends: List[Dict[str, Any]]) -> Tuple[List[Tuple[str, str, List[str], str]], List[str]]:
     rows, texts = [], []
     normalized_trends = _flatten_trend_records(trends)
     for entry in normalized_trends:
@@ -274,134 +502,101 @@ def _prepare_trend_vectors(trends: List[Dict[str, Any]]) -> List[TrendVector]:
             continue
         rows.append((trend_name, description, keywords, text))
         texts.append(text)
-    vectors = _embed(texts) if texts else []
-    logging.debug("Trend embedding input: %s", texts)
-    logging.debug("Trend embedding output shapes: %s", [vec.shape for vec in vectors])
-    return [
-        TrendVector(name=name, insight=desc, evidence=", ".join(keywords), impact="", vector=vec)
-        for (name, desc, keywords, _), vec in zip(rows, vectors)
-    ]
+    return rows, texts
 
 
-def _catalog_stats(businesses: List[Dict[str, Any]], flat_products: List[Dict[str, Any]]) -> Dict[str, Any]:
-    products_per_business: Dict[str, int] = {}
-    for item in flat_products:
-        products_per_business[item["business"]] = products_per_business.get(item["business"], 0) + 1
+def _build_trend_table(rows: List[Tuple[str, str, List[str], str]], vectors: List[np.ndarray]) -> VectorTable:
+    if _debug_enabled():
+        logging.debug("Trend embedding input: %s", [text for *_, text in rows])
+        logging.debug("Trend embedding output shapes: %s", [vec.shape for vec in vectors])
+    meta = [
+        {"name": name, "insight": desc, "evidence": ", ".join(keywords), "impact": ""}
+        for name, desc, keywords, _ in rows
+    ]
+    return VectorTable.from_vectors(vectors, meta[:len(vectors)])
+
 
+def _catalog_stats(scan: CatalogScan) -> Dict[str, Any]:
     return {
-        "total_products": len(flat_products),
-        "total_businesses": len({biz.get("name") or biz.get("company_name") for biz in businesses or []}),
-        "products_per_business": products_per_business,
+        "total_products": len(scan.products),
+        "total_businesses": len(scan.business_names),
+        "products_per_business": dict(scan.products_per_business),
     }
 
 
-def _pricing_analysis(flat_products: List[Dict[str, Any]]) -> Dict[str, Any]:
-    prices = [p["price_numeric"] for p in flat_products if p["price_numeric"] is not None]
-    if not prices:
+def _pricing_analysis(scan: CatalogScan) -> Dict[str, Any]:
+    if not scan.prices:
         return {"has_pricing": False}
 
-    prices.sort()
-    avg_price = float(np.mean(prices))
-
-    def quantile(q: float) -> Optional[float]:
-        if not prices:
-            return None
-        idx = int(q * (len(prices) - 1))
-        return prices[idx]
-
-    q1, q3 = quantile(0.25), quantile(0.75)
-    buckets = {"low": 0, "mid": 0, "high": 0}
-    for value in prices:
-        if q1 is not None and value <= q1:
-            buckets["low"] += 1
-        elif q3 is not None and value >= q3:
-            buckets["high"] += 1
-        else:
-            buckets["mid"] += 1
+    arr = np.asarray(scan.prices, dtype=np.float64)
+    # Floor-index quartiles via an O(n) partition rather than a full sort
+    k1, k3 = int(0.25 * (arr.size - 1)), int(0.75 * (arr.size - 1))
+    part = np.partition(arr, [k1, k3])
+    q1, q3 = float(part[k1]), float(part[k3])
+    low_mask = arr <= q1
+    low = int(low_mask.sum())
+    high = int(((arr >= q3) & ~low_mask).sum())
+    buckets = {"low": low, "mid": int(arr.size) - low - high, "high": high}
 
     return {
         "has_pricing": True,
-        "avg_price": round(avg_price, 2),
-        "min_price": round(prices[0], 2),
-        "max_price": round(prices[-1], 2),
-        "q1": round(q1, 2) if q1 is not None else None,
-        "q3": round(q3, 2) if q3 is not None else None,
+        "avg_price": round(float(arr.mean()), 2),
+        "min_price": round(float(arr.min()), 2),
+        "max_price": round(float(arr.max()), 2),
+        "q1": round(q1, 2),
+        "q3": round(q3, 2),
         "price_buckets": buckets,
     }
 
 
-def _description_quality(flat_products: List[Dict[str, Any]]) -> Dict[str, Any]:
-    desc_lengths = [len(p["description"]) for p in flat_products if p["description"]]
-    empty_desc = len([p for p in flat_products if not p["description"]])
-
-    name_lengths = [len(p["name"]) for p in flat_products if p["name"]]
-    short_titles = len([length for length in name_lengths if length < 20])
-    long_titles = len([length for length in name_lengths if length > 60])
-    total = len(flat_products) or 1
+def _description_quality(scan: CatalogScan) -> Dict[str, Any]:
+    total_products = len(scan.products)
+    short_titles = sum(1 for length in scan.name_lengths if length < 20)
+    long_titles = sum(1 for length in scan.name_lengths if length > 60)
+    total = total_products or 1
 
     return {
-        "total_products": len(flat_products),
-        "empty_descriptions": empty_desc,
-        "empty_descriptions_pct": round((empty_desc / total) * 100, 2) if flat_products else 0,
-        "avg_description_length": round(float(np.mean(desc_lengths)), 2) if desc_lengths else 0,
-        "avg_title_length": round(float(np.mean(name_lengths)), 2) if name_lengths else 0,
+        "total_products": total_products,
+        "empty_descriptions": scan.empty_descriptions,
+        "empty_descriptions_pct": round((scan.empty_descriptions / total) * 100, 2) if total_products else 0,
+        "avg_description_length": round(float(np.mean(scan.desc_lengths)), 2) if scan.desc_lengths else 0,
+        "avg_title_length": round(float(np.mean(scan.name_lengths)), 2) if scan.name_lengths else 0,
         "short_titles": short_titles,
         "long_titles": long_titles,
     }
 
 
-def _keyword_coverage(businesses: List[Dict[str, Any]], flat_products: List[Dict[str, Any]]) -> Dict[str, Any]:
-    counter_products: Dict[str, int] = {}
-    counter_primary: Dict[str, int] = {}
-    counter_secondary: Dict[str, int] = {}
-    counter_topics: Dict[str, int] = {}
-
-    def bump(counter: Dict[str, int], tokens):
-        for token in tokens or []:
-            if token:
-                key = token.lower()
-                counter[key] = counter.get(key, 0) + 1
-
-    for biz in businesses or []:
-        bump(counter_primary, biz.get("primary_keywords"))
-        bump(counter_secondary, biz.get("secondary_keywords"))
-        bump(counter_topics, biz.get("trending_topics"))
-
-    for product in flat_products:
-        bump(counter_products, product.get("keywords"))
-
-    def top(counter):
-        return sorted(counter.items(), key=lambda x: x[1], reverse=True)[:20]
-
+def _keyword_coverage(scan: CatalogScan) -> Dict[str, Any]:
     return {
-        "top_product_keywords": top(counter_products),
-        "top_primary_keywords": top(counter_primary),
-        "top_secondary_keywords": top(counter_secondary),
-        "trending_topics": top(counter_topics),
+        "top_product_keywords": scan.product_keywords.most_common(20),
+        "top_primary_keywords": scan.primary_keywords.most_common(20),
+        "top_secondary_keywords": scan.secondary_keywords.most_common(20),
+        "trending_topics": scan.trending_topics.most_common(20),
     }
 
 
-def _simple_trend_alignment(flat_products: List[Dict[str, Any]], trends: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    def tokenize(text: str) -> List[str]:
-        return [token.strip(" ,.;:!?\"'()").lower() for token in (text or "").split() if token.strip()]
+@lru_cache(maxsize=4096)
+def _tokenize(text: str) -> Tuple[str, ...]:
+    return tuple(match.group(0).lower() for match in _TOKEN_RE.finditer(text or ""))
+
 
-    catalog_tokens: Dict[str, int] = {}
+def _simple_trend_alignment(flat_products: List[Dict[str, Any]], trends: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    catalog_tokens = set()
     for product in flat_products:
-        for token in tokenize(product.get("name", "")):
-            catalog_tokens[token] = catalog_tokens.get(token, 0) + 1
+        catalog_tokens.update(_tokenize(product.get("name", "")))
         for keyword in product.get("keywords", []):
-            for token in tokenize(keyword):
-                catalog_tokens[token] = catalog_tokens.get(token, 0) + 1
+            catalog_tokens.update(_tokenize(keyword))
+    catalog_set = frozenset(catalog_tokens)
 
     results: List[Dict[str, Any]] = []
     for trend in trends or []:
         label = trend.get("trend") or trend.get("name")
         if not label:
             continue
-        tokens = tokenize(label + " " + " ".join(trend.get("keywords") or []))
+        tokens = _tokenize(label + " " + " ".join(trend.get("keywords") or []))
         if not tokens:
             continue
-        matches = [token for token in tokens if catalog_tokens.get(token)]
+        matches = [token for token in tokens if token in catalog_set]
         normalized = len(matches) / len(tokens)
         if normalized >= 0.7:
             status = "covered"
@@ -435,23 +630,37 @@ def _opportunity_summary(description_stats, pricing_stats, trend_alignment) -> L
     return opps
 
 
-def _categorize(score: float) -> str:
-    if score >= SIMILARITY_THRESHOLDS["covered"]:
-        return "covered"
-    if score >= SIMILARITY_THRESHOLDS["weak"]:
-        return "weak"
-    return "gap"
+_TIER_LABELS = np.array(["gap", "weak", "covered"])
+
+
+def _categorize(scores: np.ndarray) -> np.ndarray:
+    """Map similarity scores to gap/weak/covered labels in one vectorised pass."""
+    tiers = np.digitize(scores, [SIMILARITY_THRESHOLDS["weak"], SIMILARITY_THRESHOLDS["covered"]])
+    return _TIER_LABELS[tiers]
 
 
 def _reason_over_gaps(similarity_map: List[Dict[str, Any]], context: str = "") -> Dict[str, Any]:
     if not similarity_map:
         return {"summary": "No valid comparison could be made.", "actions": [], "priority_matrix": []}
 
+    # Only the fields the model reasons over, with long summaries clipped
+    compact_map = [
+        {
+            "trend": entry["trend"],
+            "best_match_product": entry["best_match_product"],
+            "business": entry["business"],
+            "similarity": entry["similarity"],
+            "category": entry["category"],
+            "trend_summary": (entry.get("trend_summary") or "")[:SUMMARY_PROMPT_CHARS],
+            "product_summary": (entry.get("product_summary") or "")[:SUMMARY_PROMPT_CHARS],
+        }
+        for entry in similarity_map
+    ]
     prompt = f"""
 You are a market intelligence strategist.
 
 Similarity analysis between business products and market trends:
-{json.dumps(similarity_map, indent=2)}
+{json.dumps(compact_map, ensure_ascii=False, separators=(",", ":"))}
 
 Context:
 {context or "N/A"}
@@ -479,34 +688,7 @@ Use High/Medium/Low priorities.
         return {"summary": completion.choices[0].message.content}
 
 
-def _propose_product_extensions(
-    weak_entries: List[Dict[str, Any]],
-    gap_entries: List[Dict[str, Any]],
-    context: str = "",
-    max_trends: int = 6,
-) -> List[Dict[str, Any]]:
-    enriched: List[Dict[str, Any]] = []
-    for entry in gap_entries or []:
-        enriched.append(
-            {
-                **entry,
-                "coverage_level": entry.get("coverage_level") or entry.get("category") or "gap",
-            }
-        )
-    for entry in weak_entries or []:
-        enriched.append(
-            {
-                **entry,
-                "coverage_level": entry.get("coverage_level") or entry.get("category") or "weak",
-            }
-        )
-    if not enriched:
-        return []
-    sample = enriched[:max_trends]
-    payload = {
-        "gaps": sample,
-        "context": context,
-        "instruction": """
+_PRODUCT_EXTENSION_INSTRUCTION = """
 You are a product innovation strategist embedded in a go-to-market intelligence platform.
 Your task is to convert each trend alignment entry into a tangible product extension brief.
 
@@ -539,17 +721,50 @@ Return a JSON array where each object contains:
 - working_hours (number)
 - working_price (number)
 - launch_steps (array of 3–6 short imperative strings)
-""".strip(),
+""".strip()
+
+
+def _propose_product_extensions(
+    weak_entries: List[Dict[str, Any]],
+    gap_entries: List[Dict[str, Any]],
+    context: str = "",
+    max_trends: int = 6,
+) -> List[Dict[str, Any]]:
+    enriched: List[Dict[str, Any]] = []
+    for entry in gap_entries or []:
+        enriched.append(
+            {
+                **entry,
+                "coverage_level": entry.get("coverage_level") or entry.get("category") or "gap",
+            }
+        )
+    for entry in weak_entries or []:
+        enriched.append(
+            {
+                **entry,
+                "coverage_level": entry.get("coverage_level") or entry.get("category") or "weak",
+            }
+        )
+    if not enriched:
+        return []
+    sample = enriched[:max_trends]
+    payload = {
+        "gaps": sample,
+        "context": context,
     }
     client = _get_client()
     completion = client.chat.completions.create(
         model=CHAT_MODEL,
         messages=[
             {
+                # Static text first and identical on every call, so OpenAI's prompt cache can reuse it
                 "role": "system",
-                "content": "You are a pragmatic SaaS product strategist who designs actionable product extensions.",
+                "content": (
+                    "You are a pragmatic SaaS product strategist who designs actionable product extensions.\n\n"
+                    + _PRODUCT_EXTENSION_INSTRUCTION
+                ),
             },
-            {"role": "user", "content": json.dumps(payload, ensure_ascii=False)},
+            {"role": "user", "content": json.dumps(payload, ensure_ascii=False, separators=(",", ":"))},
         ],
         response_format={
             "type": "json_schema",
@@ -636,13 +851,13 @@ def run_gap_analysis(
         except Exception as err:
             raise RuntimeError(f"Unable to fetch trends via Firecrawl: {err}") from err
 
-    flat_products = _flatten_products(businesses)
+    scan = _scan_catalog(businesses)
     catalog_report = {
-        "catalog_stats": _catalog_stats(businesses, flat_products),
-        "pricing_analysis": _pricing_analysis(flat_products),
-        "description_quality": _description_quality(flat_products),
-        "keyword_coverage": _keyword_coverage(businesses, flat_products),
-        "trend_alignment": _simple_trend_alignment(flat_products, trends),
+        "catalog_stats": _catalog_stats(scan),
+        "pricing_analysis": _pricing_analysis(scan),
+        "description_quality": _description_quality(scan),
+        "keyword_coverage": _keyword_coverage(scan),
+        "trend_alignment": _simple_trend_alignment(scan.products, trends),
     }
     catalog_report["opportunity_summary"] = _opportunity_summary(
         catalog_report["description_quality"],
@@ -650,51 +865,68 @@ def run_gap_analysis(
         catalog_report["trend_alignment"],
     )
 
-    product_vectors = _prepare_product_vectors(businesses)
-    trend_vectors = _prepare_trend_vectors(trends)
+    # Embed products and trends in one (chunked, concurrent) pass instead of two serial calls
+    product_rows, product_texts = _product_rows(businesses)
+    trend_rows, trend_texts = _trend_rows(trends)
+    vectors = _embed(product_texts + trend_texts) if product_texts and trend_texts else []
+    product_table = _build_product_table(product_rows, vectors[:len(product_texts)])
+    trend_table = _build_trend_table(trend_rows, vectors[len(product_texts):])
 
-    if not product_vectors or not trend_vectors:
+    if not len(product_table) or not len(trend_table):
         raise ValueError("Insufficient data. Provide at least one product and one trend entry.")
 
     similarity_map: List[Dict[str, Any]] = []
     coverage_buckets = {"covered": [], "weak": [], "gap": []}
 
-    for trend in trend_vectors:
-        best: Optional[Tuple[ProductVector, float]] = None
-        for product in product_vectors:
-            score = _cosine(trend.vector, product.vector)
+    # _embed returns unit vectors, so one GEMM of dot products gives every cosine score
+    sim = _similarity_matrix(
+        trend_table.matrix,
+        product_table.matrix,
+        trend_table.matrix_i8,
+        product_table.matrix_i8,
+    )
+    best_idx = sim.argmax(axis=1)
+    best_scores = sim[np.arange(len(trend_table)), best_idx]
+    categories = _categorize(best_scores)
+    debug = _debug_enabled()
+    if debug:
+        logging.debug("Similarity matrix shape: %s", sim.shape)
+
+    for trend, product_index, best_score, label in zip(trend_table.meta, best_idx, best_scores, categories):
+        product = product_table.meta[int(product_index)]
+        score = float(best_score)
+        if debug:
             logging.debug(
-                "Matrix entry: trend '%s' vs product '%s' -> %.4f",
-                trend.name,
-                product.product,
+                "Similarity score for trend '%s' vs best product '%s': %.4f",
+                trend["name"],
+                product["product"],
                 score,
             )
-            if best is None or score > best[1]:
-                best = (product, score)
-        if best is None:
-            continue
-        product, score = best
-        logging.debug(
-            "Similarity score for trend '%s' vs best product '%s': %.4f",
-            trend.name,
-            product.product,
-            score,
-        )
-        category = _categorize(score)
+        category = str(label)
         entry = {
-            "trend": trend.name,
-            "trend_summary": trend.impact or trend.insight or trend.evidence,
-            "best_match_product": product.product,
-            "business": product.business,
+            "trend": trend["name"],
+            "trend_summary": trend["impact"] or trend["insight"] or trend["evidence"],
+            "best_match_product": product["product"],
+            "business": product["business"],
             "similarity": round(score, 4),
             "category": category,
             "keywords": [],
-            "product_summary": product.description,
+            "product_summary": product["description"],
         }
         similarity_map.append(entry)
         coverage_buckets[category].append(entry)
 
-    insights = _reason_over_gaps(similarity_map, additional_context)
+    # The insight and proposal prompts are independent, so run them side by side
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        insights_future = pool.submit(_reason_over_gaps, similarity_map, additional_context)
+        proposals_future = (
+            pool.submit(_propose_product_extensions, coverage_buckets["weak"], coverage_buckets["gap"], additional_context)
+            if generate_product_proposals
+            else None
+        )
+        insights = insights_future.result()
+        product_proposals = proposals_future.result() if proposals_future is not None else []
+
     coverage_counts = {k: len(v) for k, v in coverage_buckets.items()}
     total_trends = sum(coverage_counts.values()) or 1
     coverage_summary = {
@@ -711,11 +943,6 @@ def run_gap_analysis(
             if kw:
                 gap_keywords[kw.lower()] += 1
     top_gap_themes = gap_keywords.most_common(10)
-    product_proposals = (
-        _propose_product_extensions(coverage_buckets["weak"], coverage_buckets["gap"], additional_context)
-        if generate_product_proposals
-        else []
-    )
 
     opportunity_map: List[Dict[str, Any]] = []
     for entry in coverage_buckets["gap"][:8]:
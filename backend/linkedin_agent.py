@@ -7,15 +7,21 @@ from __future__ import annotations
 
 import os
 import re
+import logging
 import json
+import functools
 import time
 import tempfile
 import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import List, Optional, Dict, Any, Tuple
+from typing import List, Optional, Dict, Any, Iterator, Mapping, Tuple
 
 import requests
 from pydantic import BaseModel
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Optional imports
 try:
@@ -35,8 +41,15 @@ try:
 except Exception:
     Firecrawl = None
 
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
 from PIL import Image
 
+logger = logging.getLogger(__name__)
+
 # Constants
 PHANTOM_LAUNCH_URL = "https://api.phantombuster.com/api/v2/agents/launch"
 PHANTOM_FETCH_OUTPUT_URL = "https://api.phantombuster.com/api/v2/containers/fetch-output"
@@ -46,8 +59,44 @@ POST_AGENT_ID = "4269915876888936"    # LinkedIn Auto Poster
 
 DEFAULT_POLL_SECONDS = 5
 DEFAULT_MAX_WAIT_SECONDS = 180
+# fetch-output backoff: check early, then back off towards MAX_POLL_SECONDS
+POLL_START_SECONDS = 2.0
+POLL_BACKOFF_FACTOR = 1.6
+MAX_POLL_SECONDS = 15.0
+TREND_SNIPPET_CHARS = 400
+MAX_CORPUS_CHARS = 15000
 DEFAULT_OPENAI_MODEL = "gpt-4o-mini"
 
+DEFAULT_CSV_NAME = "result"
+_KW_SPLIT_PAT = re.compile(r"[\n,]+")
+
+
+@functools.lru_cache(maxsize=8)
+def _json_url_patterns(csv_name: str) -> Tuple[re.Pattern, re.Pattern]:
+    """(primary, fallback) patterns for the <csv_name>.json url in a container log."""
+    file_name = re.escape(f"{csv_name}.json")
+    return (
+        re.compile(rf"JSON saved at\s+(https?://\S+?)\s+{file_name}", re.IGNORECASE),
+        re.compile(rf"(https?://\S*?{file_name})", re.IGNORECASE),
+    )
+
+_SCOPES = (
+    "https://www.googleapis.com/auth/spreadsheets",
+    "https://www.googleapis.com/auth/drive",
+)
+SHEET_CACHE_TTL_SECONDS = 300
+
+# Shared HTTP session: keeps TLS connections to PhantomBuster / S3 alive between polls
+_SESSION = requests.Session()
+_SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=10,
+        pool_maxsize=20,
+        max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504]),
+    ),
+)
+
 
 # Data structures
 @dataclass
@@ -68,6 +117,9 @@ class PostItem:
     postTimestamp: Optional[str]
 
 
+_POSTITEM_KEYS = tuple(PostItem.__annotations__.keys())
+
+
 class TrendItem(BaseModel):
     title: str
     url: str
@@ -75,38 +127,45 @@ class TrendItem(BaseModel):
 
 
 # HTTP utilities
-def _http_post_json(url: str, headers: Dict[str, str], payload: Dict[str, Any], timeout: int = 60, debug: bool = True) -> Dict[str, Any]:
-    if debug:
-        print(f"[HTTP POST] url: {url}")
-    r = requests.post(url, headers=headers, json=payload, timeout=timeout)
-    if debug:
-        print(f"[HTTP POST] status: {r.status_code}")
+def _http_post_json(url: str, headers: Dict[str, str], payload: Dict[str, Any], timeout: int = 60) -> Dict[str, Any]:
+    logger.debug("[HTTP POST] url: %s", url)
+    r = _SESSION.post(url, headers=headers, json=payload, timeout=timeout)
+    logger.debug("[HTTP POST] status: %s", r.status_code)
     r.raise_for_status()
     return r.json()
 
 
-def _http_get_text(url: str, headers: Optional[Dict[str, str]] = None, timeout: int = 60, debug: bool = True) -> str:
-    if debug:
-        print(f"[HTTP GET] url: {url}")
-    r = requests.get(url, headers=headers, timeout=timeout)
-    if debug:
-        print(f"[HTTP GET] status: {r.status_code}")
+def _http_get_text(url: str, headers: Optional[Dict[str, str]] = None, timeout: int = 60) -> str:
+    logger.debug("[HTTP GET] url: %s", url)
+    r = _SESSION.get(url, headers=headers, timeout=timeout)
+    logger.debug("[HTTP GET] status: %s", r.status_code)
     r.raise_for_status()
     return r.text
 
 
-def _http_get_json(url: str, headers: Optional[Dict[str, str]] = None, params: Optional[Dict[str, Any]] = None, timeout: int = 60, debug: bool = True) -> Dict[str, Any]:
-    if debug:
-        print(f"[HTTP GET JSON] url: {url}")
-    r = requests.get(url, headers=headers, params=params, timeout=timeout)
-    if debug:
-        print(f"[HTTP GET JSON] status: {r.status_code}")
+def _http_iter_lines(url: str, headers: Optional[Dict[str, str]] = None, timeout: int = 60) -> Iterator[str]:
+    """Yield decoded lines as they arrive; closing the generator early drops the rest of the body."""
+    logger.debug("[HTTP GET STREAM] url: %s", url)
+    with _SESSION.get(url, headers=headers, stream=True, timeout=timeout) as r:
+        logger.debug("[HTTP GET STREAM] status: %s", r.status_code)
+        r.raise_for_status()
+        if r.encoding is None:
+            r.encoding = "utf-8"
+        for line in r.iter_lines(decode_unicode=True):
+            if line:
+                yield line
+
+
+def _http_get_json(url: str, headers: Optional[Dict[str, str]] = None, params: Optional[Dict[str, Any]] = None, timeout: int = 60) -> Dict[str, Any]:
+    logger.debug("[HTTP GET JSON] url: %s", url)
+    r = _SESSION.get(url, headers=headers, params=params, timeout=timeout)
+    logger.debug("[HTTP GET JSON] status: %s", r.status_code)
     r.raise_for_status()
     return r.json()
 
 
 # PhantomBuster functions
-def launch_linkedin_scrape(phantom_api_key: str, session_cookie: str, user_agent: str, profile_url: str, number_of_lines_per_launch: int = 1, number_max_posts: int = 20, csv_name: str = "result", debug: bool = True) -> str:
+def launch_linkedin_scrape(phantom_api_key: str, session_cookie: str, user_agent: str, profile_url: str, number_of_lines_per_launch: int = 1, number_max_posts: int = 20, csv_name: str = DEFAULT_CSV_NAME, debug: bool = True) -> str:
     headers = {
         "x-phantombuster-key": phantom_api_key,
         "Content-Type": "application/json",
@@ -123,37 +182,49 @@ def launch_linkedin_scrape(phantom_api_key: str, session_cookie: str, user_agent
             "userAgent": user_agent,
         },
     }
-    data = _http_post_json(PHANTOM_LAUNCH_URL, headers, payload, debug=debug)
+    data = _http_post_json(PHANTOM_LAUNCH_URL, headers, payload)
     container_id = str(data.get("containerId") or data.get("id") or "")
     if not container_id:
         raise RuntimeError("No container id returned by PhantomBuster")
     return container_id
 
 
-def fetch_container_output_for_json_url(phantom_api_key: str, container_id: str, poll_seconds: int = DEFAULT_POLL_SECONDS, max_wait_seconds: int = DEFAULT_MAX_WAIT_SECONDS, debug: bool = True, progress_callback=None) -> str:
+def fetch_container_output_for_json_url(phantom_api_key: str, container_id: str, poll_seconds: float = POLL_START_SECONDS, max_wait_seconds: int = DEFAULT_MAX_WAIT_SECONDS, debug: bool = True, progress_callback=None, csv_name: str = DEFAULT_CSV_NAME) -> str:
     """
     Fetch container output with optional progress callback.
     progress_callback should be a function that takes a message string.
+    poll_seconds is the first sleep; later sleeps grow by POLL_BACKOFF_FACTOR up to MAX_POLL_SECONDS.
+    csv_name must match the one the container was launched with.
     """
+    primary_pat, fallback_pat = _json_url_patterns(csv_name)
     headers = {"x-phantombuster-key": phantom_api_key}
     deadline = time.time() + max_wait_seconds
-    primary_pat = re.compile(r"JSON saved at\s+(https?://\S+?)\s+result\.json", re.IGNORECASE)
-    fallback_pat = re.compile(r"(https?://\S*?result\.json)", re.IGNORECASE)
     found_url = None
     poll_count = 0
     last_progress_time = time.time()
+    current_sleep = float(poll_seconds)
 
     while time.time() < deadline and not found_url:
         url_with_id = f"{PHANTOM_FETCH_OUTPUT_URL}?id={container_id}"
-        text = _http_get_text(url_with_id, headers=headers, debug=debug)
-        m = primary_pat.search(text)
-        if m:
-            base = m.group(1).rstrip("/")
-            found_url = f"{base}/result.json"
-            break
-        m2 = fallback_pat.search(text)
-        if m2:
-            found_url = m2.group(1)
+        # Scan the log as it streams and stop reading at the "JSON saved at" line;
+        # a bare <csv_name>.json url is only used if that line never shows up.
+        fallback_url = None
+        lines = _http_iter_lines(url_with_id, headers=headers)
+        try:
+            for line in lines:
+                m = primary_pat.search(line)
+                if m:
+                    base = m.group(1).rstrip("/")
+                    found_url = f"{base}/{csv_name}.json"
+                    break
+                if fallback_url is None:
+                    m2 = fallback_pat.search(line)
+                    if m2:
+                        fallback_url = m2.group(1)
+        finally:
+            lines.close()
+        found_url = found_url or fallback_url
+        if found_url:
             break
         
         poll_count += 1
@@ -170,26 +241,32 @@ def fetch_container_output_for_json_url(phantom_api_key: str, container_id: str,
             progress_callback(msg)
             last_progress_time = time.time()
         
+        # Don't sleep just to make one last request past the deadline
+        if time.time() + current_sleep > deadline:
+            break
         if debug:
-            print(f"[FETCH OUTPUT] result url not found yet, sleeping {poll_seconds}")
-        time.sleep(poll_seconds)
+            logger.debug("[FETCH OUTPUT] result url not found yet, sleeping %.1f", current_sleep)
+        time.sleep(current_sleep)
+        current_sleep = min(current_sleep * POLL_BACKOFF_FACTOR, MAX_POLL_SECONDS)
 
     if not found_url:
-        raise TimeoutError("Could not locate result.json url in PhantomBuster output")
+        raise TimeoutError(f"Could not locate {csv_name}.json url in PhantomBuster output")
     return found_url
 
 
 def download_posts_json(json_url: str, debug: bool = True) -> List[PostItem]:
-    r = requests.get(json_url, timeout=60)
-    r.raise_for_status()
-    arr = r.json()
-    posts: List[PostItem] = []
-    if isinstance(arr, list):
-        for x in arr:
-            item_data = {k: x.get(k) for k in PostItem.__annotations__.keys()}
-            posts.append(PostItem(**item_data))
+    with _SESSION.get(json_url, timeout=60, stream=True) as r:
+        r.raise_for_status()
+        if ijson is not None:
+            # Parse array items off the socket so the raw list never sits in memory next to the PostItems
+            r.raw.decode_content = True
+            items = ijson.items(r.raw, "item", use_float=True)
+        else:
+            arr = r.json()
+            items = arr if isinstance(arr, list) else []
+        posts = [PostItem(*(x.get(k) for k in _POSTITEM_KEYS)) for x in items if isinstance(x, dict)]
     if debug:
-        print(f"[DOWNLOAD POSTS] total posts: {len(posts)}")
+        logger.debug("[DOWNLOAD POSTS] total posts: %d", len(posts))
     return posts
 
 
@@ -209,14 +286,37 @@ def trigger_phantombuster_autopost(phantom_api_key: str, session_cookie: str, us
             "numberOfPostsPerLaunch": number_of_posts_per_launch,
         },
     }
-    return _http_post_json(PHANTOM_LAUNCH_URL, headers, payload, debug=debug)
+    return _http_post_json(PHANTOM_LAUNCH_URL, headers, payload)
 
 
 # OpenAI helpers
+def _join_capped(texts, sep: str = "\n\n", limit: int = MAX_CORPUS_CHARS) -> str:
+    """Same result as sep.join(texts)[:limit] without building the full string first."""
+    buf: List[str] = []
+    n = 0
+    for t in texts:
+        if buf:
+            if n + len(sep) >= limit:
+                break
+            n += len(sep)
+        t = t[:limit - n]
+        buf.append(t)
+        n += len(t)
+        if n >= limit:
+            break
+    return sep.join(buf)
+
+
+@functools.lru_cache(maxsize=4)
+def _get_openai_client(api_key: str):
+    """One client per key so its httpx connection pool is reused across calls."""
+    return OpenAI(api_key=api_key)
+
+
 def summarize_image_with_openai(image_url: str, openai_api_key: str, model: str = DEFAULT_OPENAI_MODEL, debug: bool = True) -> str:
     if OpenAI is None:
         raise RuntimeError("openai package is not installed")
-    client = OpenAI(api_key=openai_api_key)
+    client = _get_openai_client(openai_api_key)
     content = [
         {"type": "text", "text": "Summarize this LinkedIn image post in two sentences. No hashtags."},
         {"type": "image_url", "image_url": {"url": image_url}},
@@ -224,29 +324,61 @@ def summarize_image_with_openai(image_url: str, openai_api_key: str, model: str
     resp = client.chat.completions.create(model=model, messages=[{"role": "user", "content": content}], temperature=0.2)
     summary = resp.choices[0].message.content.strip()
     if debug:
-        print(f"[OPENAI IMG] summary: {summary}")
+        logger.debug("[OPENAI IMG] summary: %s", summary)
     return summary
 
 
-def extract_common_interests(posts: List[PostItem], openai_api_key: str, model: str = DEFAULT_OPENAI_MODEL, max_image_summaries: int = 5, debug: bool = True) -> List[str]:
+def summarize_images_batch(image_urls: List[str], openai_api_key: str, model: str = DEFAULT_OPENAI_MODEL, debug: bool = True) -> List[str]:
+    """Summarize several images in one vision call; returns one summary per image, in order."""
+    if not image_urls:
+        return []
+    if OpenAI is None:
+        raise RuntimeError("openai package is not installed")
+    client = _get_openai_client(openai_api_key)
+    content = [
+        {"type": "text", "text": (
+            "Summarize each LinkedIn image post in two sentences. No hashtags. "
+            "Return only a JSON array of strings, one per image, in the same order."
+        )},
+    ] + [{"type": "image_url", "image_url": {"url": u}} for u in image_urls]
+    resp = client.chat.completions.create(model=model, messages=[{"role": "user", "content": content}], temperature=0.2)
+    raw = resp.choices[0].message.content.strip()
+    raw_clean = raw.replace("```json", "").replace("```", "").strip()
+    if debug:
+        logger.debug("[OPENAI IMG BATCH] images: %d raw: %.400s", len(image_urls), raw_clean)
+    try:
+        arr = json.loads(raw_clean)
+        if isinstance(arr, list):
+            return [str(x).strip() for x in arr if str(x).strip()][:len(image_urls)]
+    except Exception as e:
+        if debug:
+            logger.debug("[OPENAI IMG BATCH] parse error: %s", e)
+    return [line.strip() for line in raw_clean.split("\n") if line.strip()][:len(image_urls)]
+
+
+def extract_common_interests(posts: List[Mapping[str, Any]], openai_api_key: str, model: str = DEFAULT_OPENAI_MODEL, max_image_summaries: int = 5, debug: bool = True) -> List[str]:
     if OpenAI is None:
         raise RuntimeError("openai package is not installed")
-    client = OpenAI(api_key=openai_api_key)
+    client = _get_openai_client(openai_api_key)
     texts: List[str] = []
+    image_urls: List[str] = []
+    text_chars = 0
     for p in posts:
-        if p.postContent:
-            texts.append(str(p.postContent))
-    image_summaries = 0
-    for p in posts:
-        if not p.postContent and p.imgUrl and image_summaries < max_image_summaries:
-            try:
-                summary = summarize_image_with_openai(p.imgUrl, openai_api_key, model=model, debug=debug)
-                texts.append(summary)
-                image_summaries += 1
-            except Exception as e:
-                if debug:
-                    print(f"[OPENAI IMG] error for image summary: {e}")
-    corpus = "\n\n".join(texts)[:15000]
+        content = p.get("postContent")
+        if content:
+            content = str(content)
+            texts.append(content)
+            text_chars += len(content) + 2
+        elif p.get("imgUrl") and len(image_urls) < max_image_summaries:
+            image_urls.append(p["imgUrl"])
+    # Image summaries go after the post texts, so they would be cut off by the corpus cap anyway
+    if image_urls and text_chars < MAX_CORPUS_CHARS:
+        try:
+            texts.extend(summarize_images_batch(image_urls, openai_api_key, model=model, debug=debug))
+        except Exception as e:
+            if debug:
+                logger.warning("[OPENAI IMG] error for image summaries: %s", e)
+    corpus = _join_capped(texts)
     sys_prompt = (
         "Analyze the following LinkedIn posts and image summaries and extract eight to twelve "
         "multi word interest phrases. Requirements: "
@@ -267,22 +399,23 @@ def extract_common_interests(posts: List[PostItem], openai_api_key: str, model:
     raw = resp.choices[0].message.content.strip()
     raw_clean = raw.replace("```json", "").replace("```", "").strip()
     if debug:
-        print(f"[OPENAI KW] raw: {raw_clean}")
+        logger.debug("[OPENAI KW] raw: %s", raw_clean)
     try:
         arr = json.loads(raw_clean)
         if isinstance(arr, list):
             return [str(x).strip().lower() for x in arr if str(x).strip()]
     except Exception as e:
         if debug:
-            print(f"[OPENAI KW] parse error: {e}")
+            logger.debug("[OPENAI KW] parse error: %s", e)
     return [w.strip().lower() for w in raw.split("\n") if w.strip()][:12]
 
 
-def infer_writing_style_from_posts(posts: List[PostItem], openai_api_key: str, model: str = DEFAULT_OPENAI_MODEL, debug: bool = True) -> str:
+def infer_writing_style_from_posts(posts: List[Mapping[str, Any]], openai_api_key: str, model: str = DEFAULT_OPENAI_MODEL, debug: bool = True) -> str:
     if OpenAI is None:
         raise RuntimeError("openai package is not installed")
-    client = OpenAI(api_key=openai_api_key)
-    sample = "\n\n".join([p.postContent or "" for p in posts])[:15000]
+    client = _get_openai_client(openai_api_key)
+    # Skip empty posts so they don't spend the character budget on blank separators
+    sample = _join_capped(c for c in (p.get("postContent") for p in posts) if c)
     sys_prompt = (
         "You will receive multiple LinkedIn posts from one profile. "
         "Summarize the writing style in six to ten bullet style points. "
@@ -302,14 +435,14 @@ def infer_writing_style_from_posts(posts: List[PostItem], openai_api_key: str, m
     )
     notes = resp.choices[0].message.content.strip()
     if debug:
-        print(f"[STYLE] notes: {notes[:400]}")
+        logger.debug("[STYLE] notes: %.400s", notes)
     return notes
 
 
 def generate_linkedin_post(openai_key: str, topic: str, style_notes: Optional[str], keywords: List[str], model: str = DEFAULT_OPENAI_MODEL, debug: bool = True) -> str:
     if OpenAI is None:
         raise RuntimeError("openai package is not installed")
-    client = OpenAI(api_key=openai_key)
+    client = _get_openai_client(openai_key)
     sys_prompt = (
         "You are a LinkedIn copywriter. Write a polished LinkedIn post about the given topic "
         "and do NOT introduce unrelated topics. Focus only on the provided topic. "
@@ -333,19 +466,19 @@ def generate_linkedin_post(openai_key: str, topic: str, style_notes: Optional[st
     )
     post_text = resp.choices[0].message.content.strip()
     if debug:
-        print(f"[GEN POST] length: {len(post_text)}")
+        logger.debug("[GEN POST] length: %d", len(post_text))
     return post_text
 
 
 def _sanitize_keywords_input(keywords, debug=False):
     if keywords is None:
         return []
-    if isinstance(keywords, List):
+    if isinstance(keywords, list):
         cleaned = []
         for k in keywords:
             if isinstance(k, str):
                 ck = k.strip().strip('`')
-                if ck and ck not in ["[", "]"]:
+                if ck and ck not in ("[", "]"):
                     cleaned.append(ck)
         return cleaned
     if isinstance(keywords, str):
@@ -353,11 +486,11 @@ def _sanitize_keywords_input(keywords, debug=False):
         txt2 = txt.replace("```json", "").replace("```", "").strip()
         try:
             arr = json.loads(txt2)
-            if isinstance(arr, list):
-                return [str(x).strip() for x in arr if str(x).strip()]
-        except:
-            pass
-        parts = re.split(r"[\n,]+", txt2)
+        except ValueError:
+            arr = None
+        if isinstance(arr, list):
+            return [t for t in (str(x).strip() for x in arr) if t]
+        parts = _KW_SPLIT_PAT.split(txt2)
         return [p.strip() for p in parts if p.strip()]
     return []
 
@@ -380,46 +513,25 @@ def fetch_trends_firecrawl(firecrawl_api_key: str, openai_api_key: str, keywords
         joined = ", ".join(kw)
         query_text = f"latest trends about {joined}"
     if debug:
-        print(f"[FIRECRAWL] query: {query_text}")
+        logger.debug("[FIRECRAWL] query: %s", query_text)
     firecrawl_client = Firecrawl(api_key=firecrawl_api_key)
     result = firecrawl_client.search(query=query_text, limit=max_web_items + max_news_items)
     data = result if hasattr(result, "web") or hasattr(result, "news") else None
     data_web = data.web if hasattr(data, "web") and data.web else []
     data_news = data.news if hasattr(data, "news") and data.news else []
-    client = OpenAI(api_key=openai_api_key)
-    summaries: List[str] = []
-
-    def summarize(text_block: str) -> str:
-        try:
-            resp = client.chat.completions.create(
-                model=DEFAULT_OPENAI_MODEL,
-                messages=[
-                    {"role": "system", "content": "Summarize the item in one clear sentence."},
-                    {"role": "user", "content": text_block},
-                ],
-                temperature=0.2,
-            )
-            return resp.choices[0].message.content.strip()
-        except Exception as e:
-            if debug:
-                print(f"[SUMMARY ERROR] {e}")
-            return ""
-
-    for item in data_web[:max_web_items]:
-        title = item.title or ""
-        desc = item.description or ""
-        url = item.url or ""
-        block = f"{title}. {desc}. Source: {url}"
-        summaries.append(summarize(block))
-    for item in data_news[:max_news_items]:
-        title = item.title or ""
-        desc = item.snippet or ""
-        url = item.url or ""
-        block = f"{title}. {desc}. Source: {url}"
-        summaries.append(summarize(block))
-    combined_text = "\n".join(summaries)[:15000]
+    client = _get_openai_client(openai_api_key)
+    # Search snippets are short enough to go straight into the trend prompt,
+    # so there is no per-item summarisation round trip.
+    blocks = [
+        f"{item.title or ''}: {(item.description or '')[:TREND_SNIPPET_CHARS]}"
+        for item in data_web[:max_web_items]
+    ] + [
+        f"{item.title or ''}: {(item.snippet or '')[:TREND_SNIPPET_CHARS]}"
+        for item in data_news[:max_news_items]
+    ]
+    combined_text = _join_capped(blocks, sep="\n---\n")
     if debug:
-        print(f"[FIRECRAWL] combined summary length: {len(combined_text)}")
+        logger.debug("[FIRECRAWL] combined snippet length: %d", len(combined_text))
     sys_prompt = (
         "You are an expert trend analyst. "
         "Extract exactly five clear phrase level trends. "
@@ -452,22 +564,56 @@ def fetch_trends_firecrawl(firecrawl_api_key: str, openai_api_key: str, keywords
 
 
 # Google Sheets functions
+@functools.lru_cache(maxsize=2)
+def _gspread_client_for(service_account_info: str):
+    creds = Credentials.from_service_account_info(json.loads(service_account_info), scopes=list(_SCOPES))
+    return gspread.authorize(creds)
+
+
+def _get_gspread_client(service_account_json_path: str):
+    """
+    Authorized gspread client, cached by key contents rather than path:
+    app.py writes the key to a fresh temp dir on every request.
+    """
+    with open(service_account_json_path, "r", encoding="utf-8") as fh:
+        return _gspread_client_for(fh.read())
+
+
+_SHEET_CACHE: Dict[Tuple[int, str], Tuple[float, Any]] = {}
+_SHEET_CACHE_LOCK = threading.Lock()
+
+
+def _open_sheet(sheet_url: str, service_account_json_path: str):
+    """open_by_url with a short TTL cache so repeated saves skip the spreadsheet lookup."""
+    gc = _get_gspread_client(service_account_json_path)
+    key = (id(gc), sheet_url)
+    now = time.time()
+    with _SHEET_CACHE_LOCK:
+        hit = _SHEET_CACHE.get(key)
+        if hit and now - hit[0] < SHEET_CACHE_TTL_SECONDS:
+            return hit[1]
+    sh = gc.open_by_url(sheet_url)
+    with _SHEET_CACHE_LOCK:
+        for k in [k for k, (ts, _) in _SHEET_CACHE.items() if now - ts >= SHEET_CACHE_TTL_SECONDS]:
+            del _SHEET_CACHE[k]
+        _SHEET_CACHE[key] = (now, sh)
+    return sh
+
+
 def save_post_to_google_sheet(sheet_url: str, content: str, service_account_json_path: str, debug: bool = True) -> Tuple[str, int]:
+    return save_posts_to_google_sheet(sheet_url, [content], service_account_json_path, debug=debug)
+
+
+def save_posts_to_google_sheet(sheet_url: str, contents: List[str], service_account_json_path: str, debug: bool = True) -> Tuple[str, int]:
+    """Append one row per post in a single Sheets API call."""
     if gspread is None or Credentials is None:
         raise RuntimeError("gspread or google auth is not installed")
     if debug:
-        print(f"[GSHEETS] save content length: {len(content)}")
-    scopes = [
-        "https://www.googleapis.com/auth/spreadsheets",
-        "https://www.googleapis.com/auth/drive",
-    ]
-    creds = Credentials.from_service_account_file(service_account_json_path, scopes=scopes)
-    gc = gspread.authorize(creds)
-    sh = gc.open_by_url(sheet_url)
-    ws = sh.sheet1
-    ws.append_row([content], value_input_option="RAW")
+        logger.debug("[GSHEETS] save %d post(s), total length: %d", len(contents), sum(map(len, contents)))
+    ws = _open_sheet(sheet_url, service_account_json_path).sheet1
+    ws.append_rows([[c] for c in contents], value_input_option="RAW")
     if debug:
-        print(f"[GSHEETS] append done {ws.id} {ws.row_count}")
+        logger.debug("[GSHEETS] append done %s %s", ws.id, ws.row_count)
     return (ws.id, ws.row_count)
 
 
@@ -476,41 +622,25 @@ def clear_google_sheet(sheet_url: str, service_account_json_path: str, debug: bo
     if gspread is None or Credentials is None:
         raise RuntimeError("gspread or google auth is not installed")
     if debug:
-        print(f"[GSHEETS] clearing sheet: {sheet_url}")
-    scopes = [
-        "https://www.googleapis.com/auth/spreadsheets",
-        "https://www.googleapis.com/auth/drive",
-    ]
-    creds = Credentials.from_service_account_file(service_account_json_path, scopes=scopes)
-    gc = gspread.authorize(creds)
-    sh = gc.open_by_url(sheet_url)
-    ws = sh.sheet1
-    
-    # Get all values
-    all_values = ws.get_all_values()
-    if not all_values:
-        if debug:
-            print(f"[GSHEETS] sheet is already empty")
-        return True
-    
-    # Clear all rows (including header if you want, or keep first row)
-    # Option 1: Clear everything including header
+        logger.debug("[GSHEETS] clearing sheet: %s", sheet_url)
+    ws = _open_sheet(sheet_url, service_account_json_path).sheet1
+
+    # Clear everything including header; clearing an empty sheet is a no-op,
+    # so there is no need to read the values first.
+    # To keep a header row instead: ws.batch_clear([f"2:{ws.row_count}"])
     ws.clear()
-    
-    # Option 2: If you want to keep header row, uncomment below and comment above
-    # if len(all_values) > 1:
-    #     ws.delete_rows(2, len(all_values))
-    
+
     if debug:
-        print(f"[GSHEETS] cleared {len(all_values)} rows")
+        logger.debug("[GSHEETS] cleared sheet (%s rows allocated)", ws.row_count)
     return True
 
 
 # Tool implementations for function calling
-def scrape_profile_tool(phantom_api_key: str, session_cookie: str, user_agent: str, profile_url: str, progress_callback=None) -> Dict[str, Any]:
+def scrape_profile_tool(phantom_api_key: str, session_cookie: str, user_agent: str, profile_url: str, progress_callback=None, csv_name: str = DEFAULT_CSV_NAME) -> Dict[str, Any]:
     """
     Scrape profile with optional progress callback.
     progress_callback should be a function that takes a message string.
+    Concurrent scrapes need distinct csv_names so they don't share one result file.
     """
     if progress_callback:
         progress_callback("Launching PhantomBuster scrape...")
@@ -520,6 +650,7 @@ def scrape_profile_tool(phantom_api_key: str, session_cookie: str, user_agent: s
         session_cookie=session_cookie,
         user_agent=user_agent,
         profile_url=profile_url,
+        csv_name=csv_name,
     )
     
     if progress_callback:
@@ -529,6 +660,7 @@ def scrape_profile_tool(phantom_api_key: str, session_cookie: str, user_agent: s
         phantom_api_key=phantom_api_key,
         container_id=container_id,
         progress_callback=progress_callback,
+        csv_name=csv_name,
     )
     
     if progress_callback:
@@ -546,20 +678,12 @@ def scrape_profile_tool(phantom_api_key: str, session_cookie: str, user_agent: s
 
 
 def extract_keywords_tool(openai_api_key: str, posts: List[Dict[str, Any]]) -> Dict[str, Any]:
-    post_objs = [
-        PostItem(**{k: d.get(k) for k in PostItem.__annotations__.keys()})
-        for d in posts
-    ]
-    keywords = extract_common_interests(post_objs, openai_api_key=openai_api_key)
+    keywords = extract_common_interests(posts, openai_api_key=openai_api_key)
     return {"keywords": keywords}
 
 
 def infer_style_tool(openai_api_key: str, posts: List[Dict[str, Any]]) -> Dict[str, Any]:
-    post_objs = [
-        PostItem(**{k: d.get(k) for k in PostItem.__annotations__.keys()})
-        for d in posts
-    ]
-    style = infer_writing_style_from_posts(post_objs, openai_api_key=openai_api_key)
+    style = infer_writing_style_from_posts(posts, openai_api_key=openai_api_key)
     return {"style_notes": style}
 
 
@@ -574,7 +698,7 @@ def fetch_trends_firecrawl_tool(firecrawl_api_key: str, openai_api_key: str, key
 
 
 def call_tool_by_name(name: str, args: Dict[str, Any]) -> Dict[str, Any]:
-    print(f"[DISPATCH] tool: {name}")
+    logger.info("[DISPATCH] tool: %s", name)
     try:
         if name == "scrape_profile_tool":
             return scrape_profile_tool(**args)
@@ -585,7 +709,7 @@ def call_tool_by_name(name: str, args: Dict[str, Any]) -> Dict[str, Any]:
         if name == "fetch_trends_firecrawl_tool":
             return fetch_trends_firecrawl_tool(**args)
     except Exception as e:
-        print(f"[DISPATCH] tool error: {e}")
+        logger.exception("[DISPATCH] tool error: %s", e)
         return {"error": str(e)}
     return {"error": f"unknown tool {name}"}
 
@@ -652,11 +776,56 @@ def make_functions_schema() -> List[Dict[str, Any]]:
     ]
 
 
+# Built once; the agent loop sends the same schema on every step
+_FUNCTIONS_SCHEMA = make_functions_schema()
+
+
 # Agent orchestration using function calling
+def _run_two_profile_pipeline(openai_api_key: str, phantom_api_key: str, firecrawl_api_key: str, session_cookie: str, user_agent: str, user_profile_url: str, style_profile_url: str) -> Dict[str, Any]:
+    """
+    Scrape the user and style profiles concurrently, then run keyword and style
+    analysis concurrently. Returns the same shape as run_agent_sequence.
+    """
+    try:
+        with ThreadPoolExecutor(max_workers=2) as ex:
+            # Both containers run the same agent, so each writes to its own result file
+            fut_user = ex.submit(scrape_profile_tool, phantom_api_key, session_cookie, user_agent, user_profile_url, csv_name="result_user")
+            fut_style = ex.submit(scrape_profile_tool, phantom_api_key, session_cookie, user_agent, style_profile_url, csv_name="result_style")
+            user_scrape = fut_user.result()
+            try:
+                style_scrape = fut_style.result()
+            except Exception as e:
+                # PhantomBuster may refuse a second concurrent launch of the same agent;
+                # the user scrape has finished by now, so retry the style scrape on its own.
+                logger.warning("[AGENT] parallel style scrape failed, retrying: %s", e)
+                style_scrape = scrape_profile_tool(phantom_api_key, session_cookie, user_agent, style_profile_url, csv_name="result_style")
+
+            fut_kw = ex.submit(extract_keywords_tool, openai_api_key, user_scrape["posts"])
+            fut_st = ex.submit(infer_style_tool, openai_api_key, style_scrape["posts"])
+            keywords = fut_kw.result()["keywords"]
+            style_notes = fut_st.result()["style_notes"]
+
+        trends_result = fetch_trends_firecrawl_tool(firecrawl_api_key, openai_api_key, keywords)
+    except Exception as e:
+        logger.exception("[AGENT] two-profile pipeline error: %s", e)
+        return {"success": False, "error": str(e), "tool_result": None}
+
+    return {
+        "json_url": user_scrape["json_url"],
+        "keywords": keywords,
+        "style_notes": style_notes,
+        "trends": trends_result["trends"],
+        "tool_result": trends_result,
+        "success": True,
+    }
+
+
 def run_agent_sequence(openai_api_key: str, phantom_api_key: str, firecrawl_api_key: str, session_cookie: str, user_agent: str, user_profile_url: str, style_profile_url: str, debug: bool = True) -> Dict[str, Any]:
     """
     Agent loop that uses OpenAI function calling.
     GPT orchestrates the workflow by deciding which tools to call and in what order.
+    When the style profile differs from the user profile the fixed two-profile
+    pipeline runs instead, so both scrapes can happen at once.
     The final assistant message must be a JSON object string with:
     {
       "json_url": str,
@@ -668,50 +837,35 @@ def run_agent_sequence(openai_api_key: str, phantom_api_key: str, firecrawl_api_
     if OpenAI is None:
         raise RuntimeError("openai package is not installed")
 
-    client = OpenAI(api_key=openai_api_key)
-
-    # Check if style profile is same as user profile (optimize scraping)
-    use_same_profile = (user_profile_url == style_profile_url)
-    
-    if use_same_profile:
-        system_prompt = (
-            "You are an automation agent for a LinkedIn content tool. "
-            "The user profile and style profile are the same, so you only need to scrape once. "
-            "You must perform the following steps using the provided tools. "
-            "First, scrape the user profile to get posts (only once since it's the same profile). "
-            "Second, extract recurring interest phrases from the user posts. "
-            "Third, infer writing style from the same user posts (use the same posts from step 1). "
-            "Fourth, fetch Firecrawl trends using the interest phrases and no specific topic. "
-            "When you have completed all steps, reply with a single JSON object only, "
-            "with this exact structure: "
-            "{"
-            '"json_url": "<string with the user profile scrape json url>", '
-            '"keywords": ["list", "of", "interest phrases"], '
-            '"style_notes": "<string with style description>", '
-            '"trends": [<array of trend objects exactly as returned by fetch_trends_firecrawl_tool>]'
-            "}. "
-            "Do not add explanations or extra text outside the JSON."
-        )
-    else:
-        system_prompt = (
-            "You are an automation agent for a LinkedIn content tool. "
-            "You must perform the following steps using the provided tools. "
-            "First, scrape the user profile to get posts. "
-            "Second, extract recurring interest phrases from the user posts. "
-            "Third, scrape the style profile to get posts. "
-            "Fourth, infer writing style from the style profile posts. "
-            "Fifth, fetch Firecrawl trends using the interest phrases and no specific topic. "
-            "When you have completed all steps, reply with a single JSON object only, "
-            "with this exact structure: "
-            "{"
-            '"json_url": "<string with the user profile scrape json url>", '
-            '"keywords": ["list", "of", "interest phrases"], '
-            '"style_notes": "<string with style description>", '
-            '"trends": [<array of trend objects exactly as returned by fetch_trends_firecrawl_tool>]'
-            "}. "
-            "Do not add explanations or extra text outside the JSON."
+    # Two different profiles: the scrapes are independent, so run the fixed pipeline
+    # directly instead of letting GPT serialise them one tool call at a time.
+    if user_profile_url != style_profile_url:
+        return _run_two_profile_pipeline(
+            openai_api_key, phantom_api_key, firecrawl_api_key,
+            session_cookie, user_agent, user_profile_url, style_profile_url,
         )
 
+    client = _get_openai_client(openai_api_key)
+
+    system_prompt = (
+        "You are an automation agent for a LinkedIn content tool. "
+        "The user profile and style profile are the same, so you only need to scrape once. "
+        "You must perform the following steps using the provided tools. "
+        "First, scrape the user profile to get posts (only once since it's the same profile). "
+        "Second, extract recurring interest phrases from the user posts. "
+        "Third, infer writing style from the same user posts (use the same posts from step 1). "
+        "Fourth, fetch Firecrawl trends using the interest phrases and no specific topic. "
+        "When you have completed all steps, reply with a single JSON object only, "
+        "with this exact structure: "
+        "{"
+        '"json_url": "<string with the user profile scrape json url>", '
+        '"keywords": ["list", "of", "interest phrases"], '
+        '"style_notes": "<string with style description>", '
+        '"trends": [<array of trend objects exactly as returned by fetch_trends_firecrawl_tool>]'
+        "}. "
+        "Do not add explanations or extra text outside the JSON."
+    )
+
     user_payload = {
         "phantom_api_key": phantom_api_key,
         "firecrawl_api_key": firecrawl_api_key,
@@ -722,7 +876,7 @@ def run_agent_sequence(openai_api_key: str, phantom_api_key: str, firecrawl_api_
         "style_profile_url": style_profile_url,
     }
 
-    functions_schema = make_functions_schema()
+    functions_schema = _FUNCTIONS_SCHEMA
 
     history: List[Dict[str, Any]] = [
         {"role": "system", "content": system_prompt},
@@ -733,7 +887,7 @@ def run_agent_sequence(openai_api_key: str, phantom_api_key: str, firecrawl_api_
 
     for step in range(max_steps):
         if debug:
-            print(f"[AGENT] step {step + 1}")
+            logger.debug("[AGENT] step %d", step + 1)
 
         resp = client.chat.completions.create(
             model=DEFAULT_OPENAI_MODEL,
@@ -755,7 +909,7 @@ def run_agent_sequence(openai_api_key: str, phantom_api_key: str, firecrawl_api_
                 args = {}
 
             if debug:
-                print(f"[AGENT] function call: {name}, args: {args}")
+                logger.debug("[AGENT] function call: %s, args: %s", name, list(args))
             
             tool_result = call_tool_by_name(name, args)
             last_tool_result = tool_result
@@ -775,7 +929,7 @@ def run_agent_sequence(openai_api_key: str, phantom_api_key: str, firecrawl_api_
         # Final response
         content = msg.content or ""
         if debug:
-            print(f"[AGENT] final text: {content[:400]}")
+            logger.debug("[AGENT] final text: %.400s", content)
 
         try:
             result = json.loads(content)
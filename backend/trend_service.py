@@ -1,9 +1,27 @@
+import functools
+import hashlib
 import json
+import logging
 import os
-from typing import List, Dict, Any, Optional
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Optional, Tuple
 
+import httpx
+import numpy as np
 import requests
 from openai import OpenAI
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson  # optional: faster parsing of the markdown-heavy Firecrawl payloads
+except ImportError:
+    orjson = None
 
 TREND_SYSTEM_PROMPT = """
 You are TrendMatch, an analytical model that extracts structured, comparable information from web trend articles.
@@ -26,20 +44,211 @@ Rules:
 5. Output only one valid JSON object.
 """.strip()
 
+TREND_BATCH_SYSTEM_PROMPT = TREND_SYSTEM_PROMPT + """
+
+You will receive {"articles": [{"id": <int>, "article": {...}}, ...]}. Apply the rules above to each article
+independently and return one JSON object: {"results": [{"id": <same id>, "title": ..., "domain": ..., "core_concept": ...,
+"target_audience": ..., "relevant_products_or_services": [...], "business_value": ..., "keywords": [...]}, ...]}
+with exactly one entry per input article.
+""".rstrip()
+
+# Built once so every request starts with byte-identical system messages, which
+# is the prefix OpenAI's automatic prompt caching matches on.
+_SYSTEM_MSG = {"role": "system", "content": TREND_SYSTEM_PROMPT}
+_BATCH_SYSTEM_MSG = {"role": "system", "content": TREND_BATCH_SYSTEM_PROMPT}
+
+# Firecrawl searches and TrendMatch calls are network-bound; fan them out.
+TREND_MAX_WORKERS = int(os.getenv("TREND_MAX_WORKERS", "16"))
+
+# TrendMatch results are cached by article url + modified time (and model).
+# TREND_CACHE_PATH adds a sqlite copy that survives restarts; the semantic tier
+# (off by default) also reuses results for near-duplicate article bodies.
+TREND_CACHE_PATH = os.getenv("TREND_CACHE_PATH", "")
+TREND_CACHE_MAX_ENTRIES = max(1, int(os.getenv("TREND_CACHE_MAX_ENTRIES", 2048)))
+TREND_SEMANTIC_CACHE = os.getenv("TREND_SEMANTIC_CACHE", "0").lower() not in ("0", "false", "no")
+TREND_CACHE_EMBED_MODEL = os.getenv("TREND_CACHE_EMBED_MODEL", "text-embedding-3-small")
+TREND_CACHE_MIN_SIMILARITY = float(os.getenv("TREND_CACHE_MIN_SIMILARITY", 0.92))
+# Markdown characters per article sent to TrendMatch (metadata blobs are never sent)
+TREND_MARKDOWN_CHARS = max(0, int(os.getenv("TREND_MARKDOWN_CHARS", 4000)))
+# Articles per TrendMatch request, and a cap on the serialized size of one batch
+TREND_BATCH_SIZE = max(1, int(os.getenv("TREND_BATCH_SIZE", 8)))
+TREND_BATCH_MAX_CHARS = max(1, int(os.getenv("TREND_BATCH_MAX_CHARS", 200000)))
+
+# Successful Firecrawl searches are reused for a few minutes per (keyword, limit)
+TREND_SEARCH_CACHE_TTL = float(os.getenv("TREND_SEARCH_CACHE_TTL", 600))
+TREND_SEARCH_CACHE_MAX_ENTRIES = max(1, int(os.getenv("TREND_SEARCH_CACHE_MAX_ENTRIES", 1024)))
+
+# Proactive client-side throttles so the fan-out stays under provider limits instead of hitting 429s
+TREND_FIRECRAWL_RPS = float(os.getenv("TREND_FIRECRAWL_RPS", 2.0))
+TREND_OPENAI_RPS = float(os.getenv("TREND_OPENAI_RPS", 8.0))
+TREND_OPENAI_TPM = int(os.getenv("TREND_OPENAI_TPM", 200000))
+# Rough completion budget per article when estimating token cost
+_COMPLETION_TOKENS_PER_ARTICLE = 300
+
+# Shared session so the fanned-out Firecrawl searches reuse TLS connections
+_SESSION = requests.Session()
+_SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=TREND_MAX_WORKERS,
+        pool_maxsize=TREND_MAX_WORKERS,
+        # Search POSTs are safe to repeat; hand the last response back so the status check below still applies
+        max_retries=Retry(
+            total=3,
+            backoff_factor=0.2,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=None,
+            raise_on_status=False,
+        ),
+    ),
+)
+
+
+def _dumps(payload: Any) -> str:
+    if orjson is not None:
+        return orjson.dumps(payload, default=str).decode("utf-8")
+    return json.dumps(payload, default=str)
+
+
+def _loads(raw: Any) -> Any:
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+
+_RESET_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_RESET_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def _parse_reset(value: str) -> Optional[float]:
+    """Seconds until reset from '6m0s' / '20ms' style (OpenAI) or plain seconds / epoch (Firecrawl)."""
+    value = value.strip()
+    try:
+        number = float(value)
+    except ValueError:
+        parts = _RESET_PART.findall(value)
+        return sum(float(n) * _RESET_UNITS[u] for n, u in parts) if parts else None
+    return number - time.time() if number > 1e9 else number
+
+
+class _RateLimiter:
+    """Thread-safe token bucket on requests per second and, optionally, tokens per minute."""
+
+    def __init__(self, rps: float, tokens_per_min: int = 0):
+        self.rps = max(rps, 0.001)
+        self.tpm = tokens_per_min
+        self._requests = self.rps
+        self._tokens = float(tokens_per_min)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, cost: int = 0) -> None:
+        cost = min(cost, self.tpm) if self.tpm else 0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                elapsed = now - self._updated
+                self._updated = now
+                self._requests = min(self.rps, self._requests + elapsed * self.rps)
+                if self.tpm:
+                    self._tokens = min(float(self.tpm), self._tokens + elapsed * self.tpm / 60.0)
+                wait = self._blocked_until - now
+                if wait <= 0:
+                    if self._requests >= 1 and self._tokens >= cost:
+                        self._requests -= 1
+                        self._tokens -= cost
+                        return
+                    wait = max(
+                        (1 - self._requests) / self.rps,
+                        (cost - self._tokens) * 60.0 / self.tpm if self.tpm else 0.0,
+                    )
+            time.sleep(max(wait, 0.01))
+
+    def update_from_headers(self, headers: Any) -> None:
+        """Pause the bucket until the provider's reset time once it reports no requests/tokens left."""
+        if not headers:
+            return
+        for remaining_key, reset_key in (
+            ("x-ratelimit-remaining-requests", "x-ratelimit-reset-requests"),
+            ("x-ratelimit-remaining-tokens", "x-ratelimit-reset-tokens"),
+            ("x-ratelimit-remaining", "x-ratelimit-reset"),
+        ):
+            remaining = headers.get(remaining_key)
+            if remaining is None or remaining.strip() not in ("0", "0.0"):
+                continue
+            reset = _parse_reset(headers.get(reset_key) or "")
+            if reset and reset > 0:
+                with self._lock:
+                    self._blocked_until = max(self._blocked_until, time.monotonic() + reset)
+
+
+_firecrawl_limiter = _RateLimiter(TREND_FIRECRAWL_RPS)
+_openai_limiter = _RateLimiter(TREND_OPENAI_RPS, TREND_OPENAI_TPM)
+
+
+def _estimate_tokens(payload: str, articles: int = 1) -> int:
+    return len(payload) // 4 + _COMPLETION_TOKENS_PER_ARTICLE * articles
+
+
+@functools.lru_cache(maxsize=4)
+def _openai_client_for(api_key: str) -> OpenAI:
+    # One client per key keeps its httpx pool (and TLS sessions) warm across calls and threads
+    return OpenAI(api_key=api_key, timeout=httpx.Timeout(60.0, connect=5.0))
+
 
 def _get_openai_client(api_key: Optional[str] = None) -> OpenAI:
     api_key = api_key or os.getenv("OPENAI_API_KEY")
     if not api_key:
         raise RuntimeError("OPENAI_API_KEY is not configured.")
-    return OpenAI(api_key=api_key)
+    return _openai_client_for(api_key)
+
+
+_search_cache: "OrderedDict[Tuple[str, int], Tuple[float, Dict[str, Any]]]" = OrderedDict()
+_search_cache_lock = threading.Lock()
+
+
+def _normalize_keyword(keyword: str) -> str:
+    return " ".join(keyword.split())
+
+
+def _unique_keywords(keywords: Optional[List[Any]]) -> List[str]:
+    """Strip, collapse whitespace and drop case-insensitive repeats, keeping the first spelling."""
+    seen = set()
+    unique = []
+    for kw in keywords or []:
+        if not isinstance(kw, str):
+            continue
+        kw = _normalize_keyword(kw)
+        folded = kw.casefold()
+        if kw and folded not in seen:
+            seen.add(folded)
+            unique.append(kw)
+    return unique
 
 
 def firecrawl_search(keyword: str, firecrawl_api_key: Optional[str], limit: int = 5) -> Dict[str, Any]:
     api_key = firecrawl_api_key or os.getenv("FIRECRAWL_API_KEY")
     if not api_key:
         raise RuntimeError("FIRECRAWL_API_KEY is not configured.")
+    cache_key = (_normalize_keyword(keyword).casefold(), limit)
+    with _search_cache_lock:
+        hit = _search_cache.get(cache_key)
+        if hit is not None and time.monotonic() - hit[0] < TREND_SEARCH_CACHE_TTL:
+            return {**hit[1], "keyword": keyword}
+
+    result = _firecrawl_search_uncached(keyword, api_key, limit)
+    if result["error"] is None:
+        with _search_cache_lock:
+            _search_cache[cache_key] = (time.monotonic(), result)
+            _search_cache.move_to_end(cache_key)
+            while len(_search_cache) > TREND_SEARCH_CACHE_MAX_ENTRIES:
+                _search_cache.popitem(last=False)
+    return result
+
+
+def _firecrawl_search_uncached(keyword: str, api_key: str, limit: int) -> Dict[str, Any]:
     query = f"latest trends about {keyword}"
-    response = requests.post(
+    _firecrawl_limiter.acquire()
+    response = _SESSION.post(
         "https://api.firecrawl.dev/v2/search",
         headers={
             "Authorization": f"Bearer {api_key}",
@@ -52,10 +261,11 @@ def firecrawl_search(keyword: str, firecrawl_api_key: Optional[str], limit: int
         },
         timeout=60,
     )
+    _firecrawl_limiter.update_from_headers(response.headers)
     return {
         "keyword": keyword,
         "query": query,
-        "data": response.json() if response.status_code == 200 else None,
+        "data": _loads(response.content) if response.status_code == 200 else None,
         "error": None if response.status_code == 200 else response.text,
     }
 
@@ -68,47 +278,265 @@ def extract_full_results(raw_firecrawl_json: Optional[Dict[str, Any]]) -> List[D
     except Exception:
         return []
 
-    cleaned = []
-    for item in web_entries:
-        meta = item.get("metadata", {}) or {}
-        og_image = (
-            meta.get("og:image")
-            or meta.get("ogImage")
-            or meta.get("twitter:image")
-            or meta.get("image")
-        )
-        cleaned.append({
-            "title": item.get("title"),
-            "url": item.get("url"),
-            "description": item.get("description"),
-            "markdown": item.get("markdown"),
-            "og_image": og_image,
-            "published_time": meta.get("article:published_time"),
-            "modified_time": meta.get("article:modified_time"),
-            "site_name": meta.get("og:site_name"),
-            "meta_description": meta.get("description"),
-            "raw_metadata": meta,
-        })
-    return cleaned
+    return [_clean_web_entry(item) for item in web_entries]
+
+
+def _clean_web_entry(item: Dict[str, Any]) -> Dict[str, Any]:
+    get = item.get
+    meta = get("metadata") or {}
+    meta_get = meta.get
+    return {
+        "title": get("title"),
+        "url": get("url"),
+        "description": get("description"),
+        "markdown": get("markdown"),
+        "og_image": meta_get("og:image") or meta_get("ogImage") or meta_get("twitter:image") or meta_get("image"),
+        "published_time": meta_get("article:published_time"),
+        "modified_time": meta_get("article:modified_time"),
+        "site_name": meta_get("og:site_name"),
+        "meta_description": meta_get("description"),
+        "raw_metadata": meta,
+    }
+
+
+class _TrendCache:
+    """Exact-match TrendMatch cache: bounded in-memory LRU, optionally backed by sqlite."""
+
+    def __init__(self, max_entries: int, path: str = ""):
+        self.max_entries = max_entries
+        self._mem: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        if path:
+            try:
+                self._conn = sqlite3.connect(path, check_same_thread=False)
+                self._conn.execute("CREATE TABLE IF NOT EXISTS trendmatch (key TEXT PRIMARY KEY, payload TEXT NOT NULL)")
+                self._conn.commit()
+            except sqlite3.Error as err:
+                logging.warning("Trend cache unavailable at %s: %s", path, err)
+                self._conn = None
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            hit = self._mem.get(key)
+            if hit is not None:
+                self._mem.move_to_end(key)
+                return dict(hit)
+            if self._conn is None:
+                return None
+            row = self._conn.execute("SELECT payload FROM trendmatch WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            hit = _loads(row[0])
+            self._remember(key, hit)
+            return dict(hit)
+
+    def put(self, key: str, result: Dict[str, Any]) -> None:
+        with self._lock:
+            self._remember(key, result)
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO trendmatch (key, payload) VALUES (?, ?)", (key, _dumps(result))
+                )
+                self._conn.commit()
+
+    def _remember(self, key: str, result: Dict[str, Any]) -> None:
+        self._mem[key] = result
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_entries:
+            self._mem.popitem(last=False)
+
+
+class _SemanticTrendCache:
+    """In-process nearest-neighbour cache of TrendMatch results, bucketed by model."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._buckets: Dict[str, Tuple[np.ndarray, List[Dict[str, Any]]]] = {}
+        self._lock = threading.Lock()
+
+    def lookup(self, model: str, vector: np.ndarray, min_similarity: float) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._buckets.get(model)
+            if entry is None:
+                return None
+            matrix, results = entry
+            # Rows are unit-normalised, so the dot product is the cosine similarity
+            scores = matrix @ vector
+            best = int(np.argmax(scores))
+            return dict(results[best]) if scores[best] >= min_similarity else None
+
+    def add(self, model: str, vector: np.ndarray, result: Dict[str, Any]) -> None:
+        with self._lock:
+            matrix, results = self._buckets.get(model, (np.empty((0, vector.shape[0]), dtype=np.float32), []))
+            matrix = np.vstack([matrix, vector[None, :]])[-self.max_entries:]
+            results = (results + [result])[-self.max_entries:]
+            self._buckets[model] = (matrix, results)
+
+
+_trend_cache = _TrendCache(TREND_CACHE_MAX_ENTRIES, TREND_CACHE_PATH)
+_semantic_cache = _SemanticTrendCache(TREND_CACHE_MAX_ENTRIES)
+
+
+def _article_cache_key(article: Dict[str, Any], model: str) -> str:
+    if article.get("url"):
+        ident = f"{article['url']}\x00{article.get('modified_time') or ''}"
+    else:
+        ident = json.dumps(article, sort_keys=True, default=str)
+    return hashlib.blake2b(f"{model}\x00{ident}".encode("utf-8"), digest_size=32).hexdigest()
+
+
+def _embed_article(article: Dict[str, Any], client: OpenAI) -> Optional[np.ndarray]:
+    text = (article.get("markdown") or article.get("description") or article.get("title") or "")[:2000]
+    if not text.strip():
+        return None
+    try:
+        _openai_limiter.acquire(_estimate_tokens(text, 0))
+        response = client.embeddings.create(model=TREND_CACHE_EMBED_MODEL, input=text)
+    except Exception:
+        return None
+    vector = np.asarray(response.data[0].embedding, dtype=np.float32)
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm else None
+
+
+def _compact_article(article: Dict[str, Any]) -> Dict[str, Any]:
+    """The fields TrendMatch actually reads; drops raw_metadata/og_image and trims markdown."""
+    return {
+        "title": article.get("title"),
+        "description": article.get("description") or article.get("meta_description"),
+        "site_name": article.get("site_name"),
+        "url": article.get("url"),
+        "markdown": (article.get("markdown") or "")[:TREND_MARKDOWN_CHARS],
+    }
 
 
 def call_llm(article: Dict[str, Any], client: Optional[OpenAI] = None, model: str = "gpt-4o-mini") -> Dict[str, Any]:
+    """TrendMatch one article, reusing cached results for repeated (or, optionally, near-duplicate) articles."""
+    key = _article_cache_key(article, model)
+    cached = _trend_cache.get(key)
+    if cached is not None:
+        return cached
+
+    vector = None
+    if TREND_SEMANTIC_CACHE:
+        try:
+            client = client or _get_openai_client()
+        except RuntimeError as exc:
+            return {"error": "Invalid JSON from model", "raw": str(exc)}
+        vector = _embed_article(article, client)
+        if vector is not None:
+            cached = _semantic_cache.lookup(model, vector, TREND_CACHE_MIN_SIMILARITY)
+            if cached is not None:
+                _trend_cache.put(key, cached)
+                return cached
+
+    result = _call_llm_uncached(article, client=client, model=model)
+    if isinstance(result, dict) and "error" not in result:
+        _trend_cache.put(key, dict(result))
+        if vector is not None:
+            _semantic_cache.add(model, vector, dict(result))
+    return result
+
+
+def _call_llm_uncached(article: Dict[str, Any], client: Optional[OpenAI] = None, model: str = "gpt-4o-mini") -> Dict[str, Any]:
     try:
         client = client or _get_openai_client()
-        response = client.chat.completions.create(
+        user_content = _dumps(_compact_article(article))
+        _openai_limiter.acquire(_estimate_tokens(TREND_SYSTEM_PROMPT + user_content))
+        raw = client.chat.completions.with_raw_response.create(
             model=model,
             messages=[
-                {"role": "system", "content": TREND_SYSTEM_PROMPT},
-                {"role": "user", "content": json.dumps(article)},
+                _SYSTEM_MSG,
+                {"role": "user", "content": user_content},
             ],
             temperature=0,
+            response_format={"type": "json_object"},
         )
+        _openai_limiter.update_from_headers(raw.headers)
+        response = raw.parse()
         content = response.choices[0].message.content
-        return json.loads(content)
+        return _loads(content)
     except Exception as exc:
         return {"error": "Invalid JSON from model", "raw": str(exc)}
 
 
+def _pack_batches(articles: List[Dict[str, Any]], batch_size: int) -> List[List[int]]:
+    """Group article indexes into batches bounded by count and serialized size."""
+    batches: List[List[int]] = []
+    current: List[int] = []
+    size = 0
+    for idx, article in enumerate(articles):
+        article_size = len(_dumps(_compact_article(article)))
+        if current and (len(current) >= batch_size or size + article_size > TREND_BATCH_MAX_CHARS):
+            batches.append(current)
+            current, size = [], 0
+        current.append(idx)
+        size += article_size
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _call_llm_batch_uncached(articles: List[Dict[str, Any]], client: OpenAI, model: str) -> Dict[int, Any]:
+    user_content = _dumps({"articles": [{"id": i, "article": _compact_article(a)} for i, a in enumerate(articles)]})
+    try:
+        _openai_limiter.acquire(_estimate_tokens(TREND_BATCH_SYSTEM_PROMPT + user_content, len(articles)))
+        raw = client.chat.completions.with_raw_response.create(
+            model=model,
+            messages=[
+                _BATCH_SYSTEM_MSG,
+                {"role": "user", "content": user_content},
+            ],
+            temperature=0,
+            response_format={"type": "json_object"},
+        )
+        _openai_limiter.update_from_headers(raw.headers)
+        payload = _loads(raw.parse().choices[0].message.content)
+    except Exception as exc:
+        logging.warning("TrendMatch batch of %d failed, falling back per article: %s", len(articles), exc)
+        return {}
+    parsed: Dict[int, Any] = {}
+    for entry in payload.get("results") or []:
+        if isinstance(entry, dict) and isinstance(entry.get("id"), int):
+            parsed[entry.pop("id")] = entry
+    return parsed
+
+
+def call_llm_batch(
+    articles: List[Dict[str, Any]],
+    client: Optional[OpenAI] = None,
+    model: str = "gpt-4o-mini",
+    batch_size: int = TREND_BATCH_SIZE,
+) -> List[Dict[str, Any]]:
+    """
+    TrendMatch several articles with one request per batch. Cached articles are
+    skipped, and any article the batch response misses goes through call_llm.
+    """
+    if not articles:
+        return []
+    client = client or _get_openai_client()
+    keys = [_article_cache_key(a, model) for a in articles]
+    results: List[Optional[Dict[str, Any]]] = [_trend_cache.get(k) for k in keys]
+    misses = [i for i, r in enumerate(results) if r is None]
+    miss_articles = [articles[i] for i in misses]
+    for batch in _pack_batches(miss_articles, batch_size):
+        if len(batch) == 1:
+            i = misses[batch[0]]
+            results[i] = call_llm(articles[i], client=client, model=model)
+            continue
+        parsed = _call_llm_batch_uncached([miss_articles[j] for j in batch], client, model)
+        for pos, j in enumerate(batch):
+            i = misses[j]
+            entry = parsed.get(pos)
+            if isinstance(entry, dict) and "error" not in entry:
+                _trend_cache.put(keys[i], dict(entry))
+                results[i] = entry
+            else:
+                results[i] = call_llm(articles[i], client=client, model=model)
+    return results  # type: ignore[return-value]
+
+
 def generate_trends_from_keywords(
     keywords: List[str],
     firecrawl_api_key: Optional[str] = None,
@@ -116,26 +544,39 @@ def generate_trends_from_keywords(
     limit: int = 5,
 ) -> List[Dict[str, Any]]:
     """Run Firecrawl + OpenAI TrendMatch workflow and return the same payload as /generate-trends."""
-    keywords = [kw for kw in (keywords or []) if isinstance(kw, str) and kw.strip()]
+    # "AI", " ai " and "ai" are one search; run it once
+    keywords = _unique_keywords(keywords)
     if not keywords:
         return []
 
     client = _get_openai_client(openai_api_key)
-    results: List[Dict[str, Any]] = []
-    for kw in keywords:
-        try:
-            search_result = firecrawl_search(kw, firecrawl_api_key, limit=limit)
-        except Exception as exc:
-            results.append({"keyword": kw, "error": str(exc)})
-            continue
+    results: Dict[int, Dict[str, Any]] = {}
+    pending: Dict[int, List[Future]] = {}
+    with ThreadPoolExecutor(max_workers=min(TREND_MAX_WORKERS, len(keywords) * (limit + 1))) as executor:
+        searches = {
+            executor.submit(firecrawl_search, kw, firecrawl_api_key, limit=limit): idx
+            for idx, kw in enumerate(keywords)
+        }
+        # Queue each keyword's TrendMatch batches as soon as its search lands
+        for fut in as_completed(searches):
+            idx = searches[fut]
+            kw = keywords[idx]
+            try:
+                search_result = fut.result()
+            except Exception as exc:
+                results[idx] = {"keyword": kw, "error": str(exc)}
+                continue
 
-        if search_result.get("error"):
-            results.append({"keyword": kw, "error": search_result.get("error")})
-            continue
+            if search_result.get("error"):
+                results[idx] = {"keyword": kw, "error": search_result.get("error")}
+                continue
+
+            articles = extract_full_results(search_result.get("data"))
+            pending[idx] = [
+                executor.submit(call_llm_batch, articles[start:start + TREND_BATCH_SIZE], client=client)
+                for start in range(0, len(articles), TREND_BATCH_SIZE)
+            ]
 
-        articles = extract_full_results(search_result.get("data"))
-        trend_entries = []
-        for article in articles:
-            trend_entries.append(call_llm(article, client=client))
-        results.append({"keyword": kw, "results": trend_entries})
-    return results
+        for idx, futures in pending.items():
+            results[idx] = {"keyword": keywords[idx], "results": [r for f in futures for r in f.result()]}
+    return [results[idx] for idx in range(len(keywords))]
@@ -1,27 +1,279 @@
 from flask import Flask, render_template, request, jsonify, session, url_for, redirect
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import re
 import os
 from dotenv import load_dotenv
 from pathlib import Path
 from functools import wraps
+import gzip
 import json
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+try:
+    import orjson  # optional: uploaded catalogs can be several MB
+except ImportError:
+    orjson = None
+
+try:
+    import redis
+    from flask_session import Session as FlaskSession
+except ImportError:
+    redis = None
+    FlaskSession = None
 
 # Load environment variables from .env file at project root
 # Go up one level from frontend/ to project root
 env_path = Path(__file__).parent.parent / '.env'
 load_dotenv(dotenv_path=env_path)
 
+logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'INFO').upper())
+logger = logging.getLogger(__name__)
+
 app = Flask(__name__)
 app.secret_key = os.environ.get('SECRET_KEY', 'dev-key-123-abc!@#')
+
+# Opt-in server-side sessions: with REDIS_URL set the cookie only carries a session id.
+# Without it Flask's signed-cookie sessions are kept (no extra round trip per request).
+REDIS_URL = os.environ.get('REDIS_URL')
+if REDIS_URL and FlaskSession is not None:
+    app.config['SESSION_TYPE'] = 'redis'
+    app.config['SESSION_REDIS'] = redis.Redis.from_url(REDIS_URL)
+    FlaskSession(app)
+
 BACKEND_API_URL = 'http://backend:5000'
 Fetch_Website_API_URL = os.environ.get('FETCH_WEBSITE_URL', 'http://fetch_website:3001')
 LLM_API_URL = os.environ.get('LLM_API_URL', 'http://trend_keywords:3002')
 TRENDS_SEARCH_URL = os.environ.get('TRENDS_SEARCH_URL', 'http://trends_search:3003')
 PUBLIC_BACKEND_URL = "http://localhost:5000"
 
+# Static per-process values the page templates need, resolved once at import
+_BACKEND_BASE = PUBLIC_BACKEND_URL.rstrip('/')
+_CONTENT_API = f"{_BACKEND_BASE}/api/content/generate"
+_PROPOSAL_API = f"{_BACKEND_BASE}/api/proposal/generate"
+_GAP_API = f"{_BACKEND_BASE}/api/gap-analysis"
+_TRENDS_API = f"{_BACKEND_BASE}/api/gap/trends"
+# API keys from environment variables (if set) for the LinkedIn agent pages
+_ENV_CONFIG_STATIC = {
+    'openai_api_key': os.environ.get('OPENAI_API_KEY', ''),
+    'phantombuster_api_key': os.environ.get('PHANTOMBUSTER_API_KEY', ''),
+    'firecrawl_api_key': os.environ.get('FIRECRAWL_API_KEY', ''),
+    'user_agent': os.environ.get('USER_AGENT', ''),
+    'google_sheet_url': os.environ.get('GOOGLE_SHEET_URL', ''),
+    'linkedin_session_cookie': os.environ.get('LINKEDIN_SESSION_COOKIE', ''),
+}
+
+# One pooled session for the backend and sibling services so routes reuse sockets.
+# Retries only cover failed connects (and idempotent reads), so POSTs are never replayed.
+_RETRY = Retry(total=2, backoff_factor=0.1, status_forcelist=())
+_SESSION = requests.Session()
+_SESSION.mount("http://", HTTPAdapter(pool_connections=32, pool_maxsize=64, max_retries=_RETRY))
+_SESSION.mount("https://", HTTPAdapter(pool_connections=32, pool_maxsize=64, max_retries=_RETRY))
+
+# (connect, read) timeouts so a stuck service cannot pin a worker; website extraction and
+# LLM phrase extraction legitimately take minutes
+BACKEND_TIMEOUT = (3.05, float(os.environ.get('BACKEND_READ_TIMEOUT', 30)))
+SLOW_TIMEOUT = (3.05, float(os.environ.get('SLOW_READ_TIMEOUT', 900)))
+
+_EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
 def validate_email_format(email):
-    return re.match(r"[^@]+@[^@]+\.[^@]+", email) is not None
+    return _EMAIL_RE.match(email) is not None
+
+# Profiles for the page headers are cached in the shared Redis (REDIS_URL, provided
+# by the redis service in docker-compose) so that POST /account and signout invalidate
+# them for every gunicorn worker at once. Running without REDIS_URL disables the
+# cache: a per-worker copy would keep serving the old profile from the workers that
+# did not handle the update.
+ACCOUNT_CACHE_TTL = int(os.environ.get('ACCOUNT_CACHE_TTL', 60))
+_PROFILE_CACHE = redis.Redis.from_url(REDIS_URL) if REDIS_URL and redis is not None else None
+_ACCOUNT_CACHE = 'frontend:account:'
+_ACCOUNT_INFLIGHT_LOCK = threading.Lock()
+
+_ACCOUNT_INFLIGHT = {}
+
+def fetch_account(user_id):
+    """Return the backend /account user dict (None on a non-200), cached briefly per user.
+
+    Concurrent misses for the same user (several tabs loading at once) share one backend call.
+    """
+    hit = _cache_get(_ACCOUNT_CACHE, user_id)
+    if hit is not None:
+        return hit
+    with _ACCOUNT_INFLIGHT_LOCK:
+        pending = _ACCOUNT_INFLIGHT.get(user_id)
+        owner = pending is None
+        if owner:
+            pending = _ACCOUNT_INFLIGHT[user_id] = Future()
+    if not owner:
+        return pending.result()
+    try:
+        response = _SESSION.get(f'{BACKEND_API_URL}/account', params={'user_id': user_id}, timeout=BACKEND_TIMEOUT)
+        user_data = response.json().get('user') if response.status_code == 200 else None
+        if user_data is not None:
+            remember_account(user_id, user_data)
+        pending.set_result(user_data)
+        return user_data
+    except Exception as e:
+        pending.set_exception(e)
+        raise
+    finally:
+        with _ACCOUNT_INFLIGHT_LOCK:
+            _ACCOUNT_INFLIGHT.pop(user_id, None)
+
+def _cache_put(prefix, key, value, ttl):
+    if _PROFILE_CACHE is None:
+        return
+    try:
+        _PROFILE_CACHE.setex(f"{prefix}{key}", ttl, _json_dumps(value))
+    except Exception as e:
+        logger.warning("Profile cache write failed: %s", e)
+
+def _cache_get(prefix, key):
+    if _PROFILE_CACHE is None:
+        return None
+    try:
+        raw = _PROFILE_CACHE.get(f"{prefix}{key}")
+    except Exception as e:
+        logger.warning("Profile cache read failed: %s", e)
+        return None
+    return _json_loads(raw) if raw is not None else None
+
+def remember_account(user_id, user_data):
+    _cache_put(_ACCOUNT_CACHE, user_id, user_data, ACCOUNT_CACHE_TTL)
+
+def invalidate_account(user_id):
+    if _PROFILE_CACHE is None:
+        return
+    try:
+        _PROFILE_CACHE.delete(f"{_ACCOUNT_CACHE}{user_id}", f"{_LINKEDIN_DATA_CACHE}{user_id}")
+    except Exception as e:
+        logger.warning("Profile cache invalidation failed: %s", e)
+
+# Saved LinkedIn keywords/tone change only when an analysis finishes, so completed
+# results are reused briefly; "still analysing" responses are never cached.
+LINKEDIN_DATA_CACHE_TTL = int(os.environ.get('LINKEDIN_DATA_CACHE_TTL', 60))
+_LINKEDIN_DATA_CACHE = 'frontend:linkedin-data:'
+
+def fetch_account_and_linkedin_data(user_id, label="LinkedIn agent"):
+    """Fetch the account profile and saved LinkedIn keywords/tone in one backend call.
+
+    Returns (user_data, linkedin_url, linkedin_data); user_data is None when the
+    backend cannot return the profile. Served from the shared profile cache when both are warm.
+    """
+    user_data = _cache_get(_ACCOUNT_CACHE, user_id)
+    linkedin_data = _cache_get(_LINKEDIN_DATA_CACHE, user_id)
+    if user_data is not None and linkedin_data is not None:
+        return user_data, user_data.get('linkedin', ''), linkedin_data
+
+    response = _SESSION.get(f'{BACKEND_API_URL}/api/bootstrap/linkedin-agent', params={'user_id': user_id},
+                            timeout=BACKEND_TIMEOUT)
+    if response.status_code != 200:
+        logger.error("Error fetching %s bootstrap data: HTTP %s", label, response.status_code)
+        return None, '', None
+    payload = response.json()
+    user_data = payload.get('user') or {}
+    linkedin_data = payload.get('linkedin_data')
+    remember_account(user_id, user_data)
+    if linkedin_data and linkedin_data.get('keywords') and linkedin_data.get('tone_of_writing'):
+        _cache_put(_LINKEDIN_DATA_CACHE, user_id, linkedin_data, LINKEDIN_DATA_CACHE_TTL)
+    return user_data, user_data.get('linkedin', ''), linkedin_data
+
+def _json_loads(raw):
+    if orjson is None:
+        return json.loads(raw)
+    # orjson rejects the UTF-8 BOM that Windows editors like to add
+    return orjson.loads(raw[3:] if raw[:3] == b'\xef\xbb\xbf' else raw)
+
+def _json_dumps(payload):
+    return orjson.dumps(payload) if orjson is not None else json.dumps(payload).encode('utf-8')
+
+_JSON_HEADERS = {'Content-Type': 'application/json'}
+
+GZIP_MIN_BYTES = 8 * 1024
+
+def _post_json(url, payload, compress=False, timeout=BACKEND_TIMEOUT):
+    """POST a JSON body serialised once with orjson (when installed) instead of requests' stdlib encoder.
+
+    With compress=True, bodies over GZIP_MIN_BYTES are sent gzip-encoded; only for
+    backend routes that decode Content-Encoding: gzip.
+    """
+    body = _json_dumps(payload)
+    if compress and len(body) > GZIP_MIN_BYTES:
+        return _SESSION.post(url, data=gzip.compress(body, compresslevel=1),
+                             headers={**_JSON_HEADERS, 'Content-Encoding': 'gzip'}, timeout=timeout)
+    return _SESSION.post(url, data=body, headers=_JSON_HEADERS, timeout=timeout)
+
+def _put_json(url, payload, timeout=BACKEND_TIMEOUT):
+    return _SESSION.put(url, data=_json_dumps(payload), headers=_JSON_HEADERS, timeout=timeout)
+
+def backend_passthrough(response):
+    """Relay a backend JSON response as-is instead of decoding and re-encoding it."""
+    return response.content, response.status_code, {'Content-Type': response.headers.get('Content-Type', 'application/json')}
+
+def _update_trend_keywords(result):
+    website_id = result.get("website_id")
+    trend_keywords = result.get("trend_keywords", [])
+    try:
+        update_resp = _put_json(
+            f"{BACKEND_API_URL}/update-trend-keywords/{website_id}",
+            {"trend_keywords": trend_keywords}
+        )
+        updated = update_resp.status_code == 200
+    except Exception as e:
+        logger.error("Updating website %s: %s", website_id, e)
+        updated = False
+    return {
+        "website_id": website_id,
+        "domain": result.get("domain"),
+        "updated": updated,
+        "trend_keywords": trend_keywords
+    }
+
+def _fanout_updates(llm_results):
+    """Save every website's trend keywords in parallel; results keep the llm_results order."""
+    if not llm_results:
+        return []
+    with ThreadPoolExecutor(max_workers=min(16, len(llm_results))) as pool:
+        return list(pool.map(_update_trend_keywords, llm_results))
+
+def _save_trend_keywords(llm_results):
+    """Save all trend keywords in one backend call, retrying rows it did not update one by one."""
+    if not llm_results:
+        return []
+    try:
+        response = _post_json(
+            f"{BACKEND_API_URL}/update-trend-keywords-batch",
+            {"updates": [
+                {"website_id": r.get("website_id"), "trend_keywords": r.get("trend_keywords", [])}
+                for r in llm_results
+            ]}
+        )
+        response.raise_for_status()
+        updated = [row.get("updated") for row in response.json().get("results", [])]
+    except Exception as e:
+        logger.error("Batch trend keyword update failed, updating per website: %s", e)
+        return _fanout_updates(llm_results)
+    if len(updated) != len(llm_results):
+        return _fanout_updates(llm_results)
+
+    results = [None] * len(llm_results)
+    retry = [i for i, ok in enumerate(updated) if not ok]
+    for i, ok in enumerate(updated):
+        if ok:
+            result = llm_results[i]
+            results[i] = {
+                "website_id": result.get("website_id"),
+                "domain": result.get("domain"),
+                "updated": True,
+                "trend_keywords": result.get("trend_keywords", [])
+            }
+    for i, retried in zip(retry, _fanout_updates([llm_results[i] for i in retry])):
+        results[i] = retried
+    return results
 
 # Login required decorator
 def login_required(f):
@@ -45,15 +297,15 @@ def index():
 def signup():
     if request.method == 'POST':
         data = request.get_json() if request.is_json else request.form
-        response = requests.post(f"{BACKEND_API_URL}/signup", json=data)
-        return jsonify(response.json()), response.status_code
+        response = _SESSION.post(f"{BACKEND_API_URL}/signup", json=data, timeout=BACKEND_TIMEOUT)
+        return backend_passthrough(response)
     return render_template('signup.html')
 
 @app.route('/signin', methods=['GET', 'POST'])
 def signin():
     if request.method == 'POST':
         data = request.get_json() if request.is_json else request.form
-        response = requests.post(f"{BACKEND_API_URL}/signin", json=data)
+        response = _SESSION.post(f"{BACKEND_API_URL}/signin", json=data, timeout=BACKEND_TIMEOUT)
         if response.status_code == 200:
             result = response.json()
             session['user'] = {
@@ -61,7 +313,7 @@ def signin():
                 'email': result.get('email'),
                 'full_name': result.get('full_name')
             }
-        return jsonify(response.json()), response.status_code
+        return backend_passthrough(response)
     return render_template('signin.html')
 
 
@@ -84,17 +336,18 @@ def upload_json():
 
         if file and file.filename.endswith('.json'):
             try:
-                json_data = json.load(file)
-                print(f"Uploaded JSON data: {json_data}", flush=True)
+                json_data = _json_loads(file.read())
+                logger.info("Uploaded JSON file: %s", file.filename)
 
                 # --- Call save_uploaded_json API ---
                 try:
-                    response = requests.post(
+                    response = _post_json(
                         f"{BACKEND_API_URL}/upload-json",
-                        json={
+                        {
                             "user_id": user_id,
                             "json_data": json_data
-                        }
+                        },
+                        compress=True
                     )
                     response_data = response.json()
                     status_code = response.status_code
@@ -133,7 +386,10 @@ def account():
         # Save the basic account info first
         try:
             
-            response = requests.post(f"{BACKEND_API_URL}/account", json={**data, "user_id": user_id})
+            # A changed LinkedIn url makes the backend scrape it synchronously (PhantomBuster
+            # polling can exceed three minutes), so this call gets the slow read timeout
+            response = _post_json(f"{BACKEND_API_URL}/account", {**data, "user_id": user_id}, timeout=SLOW_TIMEOUT)
+            invalidate_account(user_id)
             response.raise_for_status()
         except Exception as e:
             return jsonify({"success": False, "message": f"Failed to update profile: {e}"}), 500
@@ -141,11 +397,11 @@ def account():
 
         # Check if user already has website data
         try:
-            check_resp = requests.get(f"{BACKEND_API_URL}/user-has-data/{user_id}")
+            check_resp = _SESSION.get(f"{BACKEND_API_URL}/user-has-data/{user_id}", timeout=BACKEND_TIMEOUT)
             check_resp.raise_for_status()
             has_data = check_resp.json().get("has_data", False)
         except Exception as e:
-            print(f"Failed to check user website data: {e}", flush=True)
+            logger.error("Failed to check user website data: %s", e)
             return jsonify({"success": False, "message": f"Failed to check user website data: {e}"}), 500
          # Handle JSON upload via backend API
        
@@ -158,17 +414,17 @@ def account():
 
             # 1️⃣ Fetch website data from extract_website endpoint
             try:
-                extract_resp = requests.post(f"{Fetch_Website_API_URL}/extract-website", json={"url": website_url})
+                extract_resp = _post_json(f"{Fetch_Website_API_URL}/extract-website", {"url": website_url}, timeout=SLOW_TIMEOUT)
                 extract_resp.raise_for_status()
                 extracted_data = extract_resp.json().get("data")
                 if not extracted_data:
                     return jsonify({"success": False, "message": "No data extracted from website."}), 500
             except Exception as e:
                 return jsonify({"success": False, "message": f"Website extraction failed: {e}"}), 500
-            print(f"Extracted data: {extracted_data}", flush=True)
+            logger.debug("Extracted data: %s", extracted_data)
             # 2️⃣ Save extracted website data
             try:
-                save_resp = requests.post(f"{BACKEND_API_URL}/save-website-data", json={
+                save_resp = _post_json(f"{BACKEND_API_URL}/save-website-data", {
                     "user_id": user_id,
                     "extracted": extracted_data
                 })
@@ -176,88 +432,47 @@ def account():
                 save_result = save_resp.json()
             except Exception as e:
                 return jsonify({"success": False, "message": f"Failed to save website data: {e}"}), 500
-            print("Website data fetched and saved successfully.", flush=True)
-            print(f"Save result: {save_result}", flush=True)
+            logger.info("Website data fetched and saved successfully.")
+            logger.debug("Save result: %s", save_result)
           
             # Get user websites again after saving Without products
             websites_data = []
-            response = requests.get(f"{BACKEND_API_URL}/get-websites/{user_id}")
+            response = _SESSION.get(f"{BACKEND_API_URL}/get-websites/{user_id}", timeout=BACKEND_TIMEOUT)
             if response.status_code == 200:
                 websites_data = response.json().get("data", [])
-                print(f"Websites data: {websites_data}", flush=True)
-            print(f"Websites to process: {websites_data}", flush=True)
+                logger.debug("Websites data: %s", websites_data)
+            logger.debug("Websites to process: %s", websites_data)
 
             # extract Keywords using LLM in batch from website contents
             try:
-                llm_response = requests.post(f"{LLM_API_URL}/extract-phrases-batch", json={"websites": websites_data})
+                llm_response = _post_json(f"{LLM_API_URL}/extract-phrases-batch", {"websites": websites_data}, timeout=SLOW_TIMEOUT)
                 llm_response.raise_for_status()
                 llm_results = llm_response.json().get("results", [])
             except Exception as e:
                 return jsonify({"success": False, "message": f"LLM extraction failed: {e}"}), 500
-            print(f"LLM results: {llm_results}", flush=True)
+            logger.debug("LLM results: %s", llm_results)
             
-            # Update backend
-            update_results = []
-           
-            # for each result, update the trend keywords in backend
-            for result in llm_results:   
-                website_id = result.get("website_id")
-                trend_keywords = result.get("trend_keywords", [])
-                try:
-                    update_resp = requests.put(
-                        f"{BACKEND_API_URL}/update-trend-keywords/{website_id}",
-                        json={"trend_keywords": trend_keywords}
-                    )
-                    updated = update_resp.status_code == 200
-                except Exception as e:
-                    print(f"[ERROR] Updating website {website_id}: {e}", flush=True)
-                    updated = False
-
-                update_results.append({
-                    "website_id": website_id,
-                    "domain": result.get("domain"),
-                    "updated": updated,
-                    "trend_keywords": trend_keywords
-                })
-        
-
-
-        #this part not needed use to test only 
-        response = requests.get(f"{BACKEND_API_URL}/get-websites/{user_id}")
-        if response.status_code == 200:
-                wbebsites_data = response.json().get("data", [])
-        print(f"Websites to process: {wbebsites_data}", flush=True)
-        
-        # response = requests.get(f"{BACKEND_API_URL}/get-trend-keywords-by-user/{user_id}")
-        # if response.status_code == 200:
-        #         keywords = response.json().get("data", [])
-        #         print(f"keywords: {keywords}", flush=True)
-        # first_keyword = keywords[0]["trend_keywords"][0]
-        # print(first_keyword,flush=True)
-
-        # llm_response = requests.post(
-        #         f"{LLM_API_URL}/generate-trends",
-        #         json={"keywords": [first_keyword]}   # <-- SEND AS LIST WITH ONE STRING
-        #     )
-        
-        # llm_response.raise_for_status()
+            # Update backend: one batched call, per-website PUTs only for rows it missed
+            update_results = _save_trend_keywords(llm_results)
+            logger.debug("Trend keyword updates: %s", update_results)
 
-        # trend_results = llm_response.json()
-        # print(f"[TRENDS GENERATED]: {trend_results}", flush=True)   
         # If website data exists, no extraction needed
         return jsonify({"success": True, "message": "Profile updated. Website data already exists."}), 200
 
     # GET request - render profile
     try:
-        profile_resp = requests.get(f"{BACKEND_API_URL}/account", json={"user_id": user_id})
-        profile_resp.raise_for_status()
-        profile = profile_resp.json().get("user")
+        profile = fetch_account(user_id)
+        if profile is None:
+            raise RuntimeError("backend could not return the profile")
         return render_template('account.html', user=profile)
     except Exception as e:
         return jsonify({"success": False, "message": f"Could not load profile: {e}"}), 400
 
 @app.route('/signout')
 def signout():
+    user = session.get('user') or {}
+    if user.get('user_id'):
+        invalidate_account(user['user_id'])
     session.clear()
     return redirect(url_for('signin'))
 
@@ -271,15 +486,14 @@ def home():
             return redirect(url_for('signin'))
         
         # Get user data from backend
-        response = requests.get(f'{BACKEND_API_URL}/account', json={'user_id': user_id})
+        user_data = fetch_account(user_id)
         
-        if response.status_code == 200:
-            user_data = response.json().get('user')
+        if user_data is not None:
             return render_template('home.html', user=user_data)
         else:
             return redirect(url_for('signin'))
     except Exception as e:
-        print(f"Error fetching user data: {e}")
+        logger.error("Error fetching user data: %s", e)
         return redirect(url_for('signin'))
 
 
@@ -292,14 +506,10 @@ def content_studio():
     profile = None
     try:
         if user_id:
-            response = requests.get(f'{BACKEND_API_URL}/account', json={'user_id': user_id})
-            if response.status_code == 200:
-                profile = response.json().get('user')
+            profile = fetch_account(user_id)
     except Exception as exc:
-        print(f"Error fetching user profile for content studio: {exc}")
-    backend_base = PUBLIC_BACKEND_URL.rstrip('/')
-    content_api = f"{backend_base}/api/content/generate"
-    return render_template('content_generation.html', user=profile or user, content_api=content_api)
+        logger.error("Error fetching user profile for content studio: %s", exc)
+    return render_template('content_generation.html', user=profile or user, content_api=_CONTENT_API)
 
 @app.route('/chat-interface')
 @login_required
@@ -310,11 +520,9 @@ def chat_interface():
     profile = None
     try:
         if user_id:
-            response = requests.get(f'{BACKEND_API_URL}/account', json={'user_id': user_id})
-            if response.status_code == 200:
-                profile = response.json().get('user')
+            profile = fetch_account(user_id)
     except Exception as exc:
-        print(f"Error fetching user profile for chat interface: {exc}")
+        logger.error("Error fetching user profile for chat interface: %s", exc)
     return render_template('chat_interface.html', user=profile or user)
 
 @app.route('/content-studio-chat')
@@ -326,14 +534,10 @@ def content_studio_chat():
     profile = None
     try:
         if user_id:
-            response = requests.get(f'{BACKEND_API_URL}/account', json={'user_id': user_id})
-            if response.status_code == 200:
-                profile = response.json().get('user')
+            profile = fetch_account(user_id)
     except Exception as exc:
-        print(f"Error fetching user profile for content studio chat: {exc}")
-    backend_base = PUBLIC_BACKEND_URL.rstrip('/')
-    content_api = f"{backend_base}/api/content/generate"
-    return render_template('content_studio_chat.html', user=profile or user, content_api=content_api)
+        logger.error("Error fetching user profile for content studio chat: %s", exc)
+    return render_template('content_studio_chat.html', user=profile or user, content_api=_CONTENT_API)
 
 @app.route('/proposal-content')
 @login_required
@@ -343,14 +547,10 @@ def proposal_content():
     profile = None
     try:
         if user_id:
-            response = requests.get(f'{BACKEND_API_URL}/account', json={'user_id': user_id})
-            if response.status_code == 200:
-                profile = response.json().get('user')
+            profile = fetch_account(user_id)
     except Exception as exc:
-        print(f"Error fetching user profile for proposal content: {exc}")
-    backend_base = PUBLIC_BACKEND_URL.rstrip('/')
-    proposal_api = f"{backend_base}/api/proposal/generate"
-    return render_template('proposal_content.html', user=profile or user, content_api=proposal_api)
+        logger.error("Error fetching user profile for proposal content: %s", exc)
+    return render_template('proposal_content.html', user=profile or user, content_api=_PROPOSAL_API)
 # LinkedIn Agent page
 @app.route('/linkedin-agent')
 @login_required
@@ -368,13 +568,7 @@ def linkedin_agent():
                                  user_linkedin_data=None,
                                  error_message="Please sign in to access the LinkedIn Agent.")
         
-        user_data = None
-        user_linkedin_url = ''
-        
-        response = requests.get(f'{BACKEND_API_URL}/account', json={'user_id': user_id})
-        if response.status_code == 200:
-            user_data = response.json().get('user', {})
-            user_linkedin_url = user_data.get('linkedin', '')
+        user_data, user_linkedin_url, user_linkedin_data = fetch_account_and_linkedin_data(user_id)
         
         # Check if LinkedIn URL is set
         if not user_linkedin_url:
@@ -385,15 +579,6 @@ def linkedin_agent():
                                  user_linkedin_data=None,
                                  error_message="Please add your LinkedIn Profile URL in your account settings first.")
         
-        # Get user's saved LinkedIn data (keywords and tone)
-        user_linkedin_data = None
-        try:
-            response = requests.get(f'{BACKEND_API_URL}/api/linkedin/user-data', params={'user_id': user_id})
-            if response.status_code == 200:
-                user_linkedin_data = response.json()
-        except Exception as e:
-            print(f"Error fetching user LinkedIn data: {e}")
-        
         # Check if keywords and tone are extracted
         has_data = (user_linkedin_data and 
                    user_linkedin_data.get('success') and 
@@ -410,21 +595,15 @@ def linkedin_agent():
                                  error_message="Your LinkedIn profile is being analyzed. Please wait a few minutes and refresh the page. If this message persists, try saving your LinkedIn URL again in account settings.")
         
     except Exception as e:
-        print(f"Error in linkedin_agent route: {e}")
+        logger.error("Error in linkedin_agent route: %s", e)
         return render_template('linkedin_agent.html', 
                              user=None, 
                              env_config={},
                              user_linkedin_data=None,
                              error_message="An error occurred. Please try again.")
     
-    # Read API keys from environment variables (if set)
     env_config = {
-        'openai_api_key': os.environ.get('OPENAI_API_KEY', ''),
-        'phantombuster_api_key': os.environ.get('PHANTOMBUSTER_API_KEY', ''),
-        'firecrawl_api_key': os.environ.get('FIRECRAWL_API_KEY', ''),
-        'user_agent': os.environ.get('USER_AGENT', ''),
-        'google_sheet_url': os.environ.get('GOOGLE_SHEET_URL', ''),
-        'linkedin_session_cookie': os.environ.get('LINKEDIN_SESSION_COOKIE', ''),
+        **_ENV_CONFIG_STATIC,
         'user_linkedin_url': user_linkedin_url,  # From database
         'user_id': user_id,  # Pass user_id to template
     }
@@ -448,13 +627,7 @@ def linkedin_agent_chat():
                 error_message="Please sign in to access the LinkedIn Chat Agent."
             )
 
-        user_data = None
-        user_linkedin_url = ''
-
-        response = requests.get(f'{BACKEND_API_URL}/account', json={'user_id': user_id})
-        if response.status_code == 200:
-            user_data = response.json().get('user', {})
-            user_linkedin_url = user_data.get('linkedin', '')
+        user_data, user_linkedin_url, user_linkedin_data = fetch_account_and_linkedin_data(user_id, "chat agent")
 
         if not user_linkedin_url:
             return render_template(
@@ -465,14 +638,6 @@ def linkedin_agent_chat():
                 error_message="Please add your LinkedIn Profile URL in your account settings first."
             )
 
-        user_linkedin_data = None
-        try:
-            response = requests.get(f'{BACKEND_API_URL}/api/linkedin/user-data', params={'user_id': user_id})
-            if response.status_code == 200:
-                user_linkedin_data = response.json()
-        except Exception as exc:
-            print(f"Error fetching user LinkedIn data for chat agent: {exc}")
-
         has_data = (
             user_linkedin_data
             and user_linkedin_data.get('success')
@@ -491,7 +656,7 @@ def linkedin_agent_chat():
             )
 
     except Exception as exc:
-        print(f"Error in linkedin_agent_chat route: {exc}")
+        logger.error("Error in linkedin_agent_chat route: %s", exc)
         return render_template(
             'linkedin_agent_chat.html',
             user=None,
@@ -501,12 +666,7 @@ def linkedin_agent_chat():
         )
 
     env_config = {
-        'openai_api_key': os.environ.get('OPENAI_API_KEY', ''),
-        'phantombuster_api_key': os.environ.get('PHANTOMBUSTER_API_KEY', ''),
-        'firecrawl_api_key': os.environ.get('FIRECRAWL_API_KEY', ''),
-        'user_agent': os.environ.get('USER_AGENT', ''),
-        'google_sheet_url': os.environ.get('GOOGLE_SHEET_URL', ''),
-        'linkedin_session_cookie': os.environ.get('LINKEDIN_SESSION_COOKIE', ''),
+        **_ENV_CONFIG_STATIC,
         'user_linkedin_url': user_linkedin_url,
         'user_id': user_id,
     }
@@ -526,30 +686,24 @@ def gap_analysis():
     profile = None
     try:
         if user_id:
-            response = requests.get(f'{BACKEND_API_URL}/account', json={'user_id': user_id})
-            if response.status_code == 200:
-                profile = response.json().get('user')
-                if profile and profile.get('id'):
-                    user_id = profile.get('id')
+            profile = fetch_account(user_id)
+            if profile and profile.get('id'):
+                user_id = profile.get('id')
     except Exception as exc:
-        print(f"Error fetching user profile for gap analysis: {exc}")
-    backend_base = PUBLIC_BACKEND_URL.rstrip('/')
-    gap_api = f"{backend_base}/api/gap-analysis"
-    # keywords_api = f"{backend_base}/api/gap/keywords"
-    keywords_api = f"{backend_base}/get-trend-keywords-list/{user_id}"
-    
-    business_api = f"{backend_base}/get-json/{user_id}"
-    trends_api = f"{backend_base}/api/gap/trends"
-    print(f"trend api {keywords_api}", flush=True)
+        logger.error("Error fetching user profile for gap analysis: %s", exc)
+    keywords_api = f"{_BACKEND_BASE}/get-trend-keywords-list/{user_id}"
+    business_api = f"{_BACKEND_BASE}/get-json/{user_id}"
+    logger.debug("trend api %s", keywords_api)
     return render_template(
         'gap_analysis.html',
         user=profile or user,
         user_id=user_id,
-        gap_api=gap_api,
+        gap_api=_GAP_API,
         gap_keywords_api=keywords_api,
         gap_business_api=business_api,
-        gap_trends_api=trends_api,
+        gap_trends_api=_TRENDS_API,
     )
 
+# Development server only; the container runs gunicorn with gevent workers (see Dockerfile)
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=3000)
@@ -16,7 +16,7 @@ Flow
 
 Requirements
 Python 3.10+
-pip install requests gradio pydantic gspread google-auth openai pillow firecrawl
+pip install requests gradio gspread google-auth openai pillow firecrawl
 """
 
 from __future__ import annotations
@@ -28,15 +28,20 @@ import json
 import time
 import shutil
 import tempfile
+import queue
+import threading
 import datetime as dt
+import functools
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import List, Optional, Dict, Any, Tuple
+from typing import List, Optional, Dict, Any, Tuple, Callable
 
 import requests
-import gradio as gr
-from pydantic import BaseModel
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-# Optional imports
+# Optional imports. gradio, gspread/google-auth and firecrawl are imported where
+# they are used, so importing the agent functions does not pay for them.
 
 try:
     from openai import OpenAI
@@ -44,18 +49,20 @@ except Exception:
     OpenAI = None
 
 try:
-    import gspread
-    from google.oauth2.service_account import Credentials
-except Exception:
-    gspread = None
-    Credentials = None
+    import ijson
+except ImportError:
+    ijson = None
 
 try:
-    from firecrawl import Firecrawl
-except Exception:
-    Firecrawl = None
+    import orjson
+except ImportError:
+    orjson = None
 
-from PIL import Image
+try:
+    import httpx
+    import h2  # noqa: F401  (httpx needs it for http2=True)
+except ImportError:
+    httpx = None
 
 
 # ======================================================================
@@ -68,18 +75,86 @@ PHANTOM_FETCH_OUTPUT_URL = "https://api.phantombuster.com/api/v2/containers/fetc
 SCRAPE_AGENT_ID = "6779421181804593"  # LinkedIn Activities Scraper
 POST_AGENT_ID = "5247540140692981"    # LinkedIn Auto Poster
 
+# Debug tracing is opt-in per process: the per-call debug=True defaults only print
+# when APP_DEBUG=1, so the header masking and response previews are skipped otherwise
+_DEBUG = os.getenv("APP_DEBUG", "0") == "1"
+
 DEFAULT_POLL_SECONDS = 5
 DEFAULT_MAX_WAIT_SECONDS = 180
+# fetch-output polling starts at POLL_START_SECONDS and backs off towards poll_seconds
+POLL_START_SECONDS = 2.0
+POLL_BACKOFF_FACTOR = 1.5
+
+_PRIMARY_JSON_PAT = re.compile(r"JSON saved at\s+(https?://\S+?)\s+result\.json", re.IGNORECASE)
+_FALLBACK_JSON_PAT = re.compile(r"(https?://\S*?result\.json)", re.IGNORECASE)
+_KW_SPLIT_PAT = re.compile(r"[\n,]+")
 
 # Use a GPT 4 family model
 DEFAULT_OPENAI_MODEL = "gpt-4o-mini"
 
+# Post text sent to the model is cut at this many characters
+POST_CORPUS_MAX_CHARS = 15000
+
+# Structured output for the phrase extraction calls: the API guarantees a
+# {"phrases": [...]} object, so no fence stripping or line-split fallback is needed
+_PHRASES_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "phrases",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {"phrases": {"type": "array", "items": {"type": "string"}}},
+            "required": ["phrases"],
+            "additionalProperties": False,
+        },
+    },
+}
+
+# Shared HTTP session: the PhantomBuster poll loop and result download reuse one
+# pooled keep-alive connection per host instead of a new TLS handshake per call
+_SESSION = requests.Session()
+for _scheme in ("https://", "http://"):
+    _SESSION.mount(
+        _scheme,
+        HTTPAdapter(
+            pool_connections=10,
+            pool_maxsize=20,
+            max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504]),
+        ),
+    )
+
+
+@functools.lru_cache(maxsize=8)
+def _openai_client(api_key: str):
+    """One OpenAI client per key so its httpx connection pool survives across calls.
+
+    With h2 installed the client speaks HTTP/2, multiplexing requests over one connection.
+    """
+    if httpx is None:
+        return OpenAI(api_key=api_key)
+    return OpenAI(
+        api_key=api_key,
+        http_client=httpx.Client(
+            http2=True,
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+            timeout=60,
+        ),
+    )
+
+
+@functools.lru_cache(maxsize=8)
+def _firecrawl_client(api_key: str):
+    from firecrawl import Firecrawl
+
+    return Firecrawl(api_key=api_key)
+
 
 # ======================================================================
 # Data structures
 # ======================================================================
 
-@dataclass
+@dataclass(slots=True)
 class PostItem:
     """
     Representation of a single LinkedIn post entry as returned by PhantomBuster.
@@ -101,7 +176,11 @@ class PostItem:
     postTimestamp: Optional[str]
 
 
-class TrendItem(BaseModel):
+_POSTITEM_KEYS: Tuple[str, ...] = tuple(PostItem.__annotations__)
+
+
+@dataclass(slots=True)
+class TrendItem:
     """
     Simple structure to hold a single trend phrase.
     The title is the full phrase.
@@ -111,11 +190,33 @@ class TrendItem(BaseModel):
     url: str
     source: Optional[str] = None
 
+    def model_dump(self) -> Dict[str, Any]:
+        return {"title": self.title, "url": self.url, "source": self.source}
+
 
 # ======================================================================
 # HTTP utilities
 # ======================================================================
 
+def _json_loads(raw: Any) -> Any:
+    """Parse bytes or str with orjson when installed; it reads response bytes without a text decode."""
+    if orjson is None:
+        return json.loads(raw)
+    # orjson rejects a leading UTF-8 BOM
+    if isinstance(raw, (bytes, bytearray)) and raw[:3] == b"\xef\xbb\xbf":
+        raw = raw[3:]
+    return orjson.loads(raw)
+
+
+def _json_preview(obj: Any, limit: int = 1000) -> str:
+    try:
+        if orjson is not None:
+            return orjson.dumps(obj)[:limit].decode("utf-8", "replace")
+        return json.dumps(obj)[:limit]
+    except Exception:
+        return str(obj)[:limit]
+
+
 def _http_post_json(
     url: str,
     headers: Dict[str, str],
@@ -123,25 +224,21 @@ def _http_post_json(
     timeout: int = 60,
     debug: bool = True,
 ) -> Dict[str, Any]:
-    if debug:
+    if debug and _DEBUG:
         print("[HTTP POST] url:", url)
         print(
             "[HTTP POST] headers:",
             {k: ("***" if "key" in k.lower() else v) for k, v in headers.items()},
         )
-        try:
-            preview = json.dumps(payload)[:1000]
-        except Exception:
-            preview = str(payload)[:1000]
-        print("[HTTP POST] payload preview:", preview)
+        print("[HTTP POST] payload preview:", _json_preview(payload))
 
-    r = requests.post(url, headers=headers, json=payload, timeout=timeout)
-    if debug:
+    r = _SESSION.post(url, headers=headers, json=payload, timeout=timeout)
+    if debug and _DEBUG:
         print("[HTTP POST] status:", r.status_code)
         print("[HTTP POST] response preview:", r.text[:1000].replace("\n", "\\n"))
 
     r.raise_for_status()
-    return r.json()
+    return _json_loads(r.content)
 
 
 def _http_get_text(
@@ -150,7 +247,7 @@ def _http_get_text(
     timeout: int = 60,
     debug: bool = True,
 ) -> str:
-    if debug:
+    if debug and _DEBUG:
         print("[HTTP GET] url:", url)
         if headers:
             print(
@@ -158,8 +255,8 @@ def _http_get_text(
                 {k: ("***" if "key" in k.lower() else v) for k, v in headers.items()},
             )
 
-    r = requests.get(url, headers=headers, timeout=timeout)
-    if debug:
+    r = _SESSION.get(url, headers=headers, timeout=timeout)
+    if debug and _DEBUG:
         print("[HTTP GET] status:", r.status_code)
         print("[HTTP GET] response preview:", r.text[:1000].replace("\n", "\\n"))
 
@@ -174,7 +271,7 @@ def _http_get_json(
     timeout: int = 60,
     debug: bool = True,
 ) -> Dict[str, Any]:
-    if debug:
+    if debug and _DEBUG:
         print("[HTTP GET JSON] url:", url)
         if headers:
             print(
@@ -182,19 +279,15 @@ def _http_get_json(
                 {k: ("***" if "key" in k.lower() else v) for k, v in headers.items()},
             )
         if params:
-            try:
-                params_preview = json.dumps(params)[:1000]
-            except Exception:
-                params_preview = str(params)[:1000]
-            print("[HTTP GET JSON] params preview:", params_preview)
+            print("[HTTP GET JSON] params preview:", _json_preview(params))
 
-    r = requests.get(url, headers=headers, params=params, timeout=timeout)
-    if debug:
+    r = _SESSION.get(url, headers=headers, params=params, timeout=timeout)
+    if debug and _DEBUG:
         print("[HTTP GET JSON] status:", r.status_code)
         print("[HTTP GET JSON] response preview:", r.text[:1000].replace("\n", "\\n"))
 
     r.raise_for_status()
-    return r.json()
+    return _json_loads(r.content)
 
 
 # ======================================================================
@@ -211,7 +304,7 @@ def launch_linkedin_scrape(
     csv_name: str = "result",
     debug: bool = True,
 ) -> str:
-    if debug:
+    if debug and _DEBUG:
         print("[SCRAPE LAUNCH] profile_url:", profile_url)
 
     headers = {
@@ -235,7 +328,7 @@ def launch_linkedin_scrape(
     data = _http_post_json(PHANTOM_LAUNCH_URL, headers, payload, debug=debug)
     container_id = str(data.get("containerId") or data.get("id") or "")
 
-    if debug:
+    if debug and _DEBUG:
         print("[SCRAPE LAUNCH] container_id:", container_id)
 
     if not container_id:
@@ -251,72 +344,80 @@ def fetch_container_output_for_json_url(
     max_wait_seconds: int = DEFAULT_MAX_WAIT_SECONDS,
     debug: bool = True,
 ) -> str:
-    if debug:
+    if debug and _DEBUG:
         print("[FETCH OUTPUT] container_id:", container_id)
 
     headers = {"x-phantombuster-key": phantom_api_key}
     deadline = time.time() + max_wait_seconds
-
-    primary_pat = re.compile(
-        r"JSON saved at\s+(https?://\S+?)\s+result\.json",
-        re.IGNORECASE,
-    )
-    fallback_pat = re.compile(
-        r"(https?://\S*?result\.json)",
-        re.IGNORECASE,
-    )
+    url_with_id = f"{PHANTOM_FETCH_OUTPUT_URL}?id={container_id}"
 
     found_url = None
+    validators: Dict[str, str] = {}
+    attempt = 0
 
     while time.time() < deadline and not found_url:
-        url_with_id = f"{PHANTOM_FETCH_OUTPUT_URL}?id={container_id}"
-        text = _http_get_text(url_with_id, headers=headers, debug=debug)
-
-        m = primary_pat.search(text)
-        if m:
-            base = m.group(1).rstrip("/")
-            found_url = f"{base}/result.json"
-            break
-
-        m2 = fallback_pat.search(text)
-        if m2:
-            found_url = m2.group(1)
-            break
-
-        if debug:
-            print("[FETCH OUTPUT] result url not found yet, sleeping", poll_seconds)
-
-        time.sleep(poll_seconds)
+        # Conditional GET: an unchanged output log comes back as an empty 304
+        r = _SESSION.get(url_with_id, headers={**headers, **validators}, timeout=60)
+        if debug and _DEBUG:
+            print("[FETCH OUTPUT] status:", r.status_code)
+
+        if r.status_code != 304:
+            r.raise_for_status()
+            if r.headers.get("ETag"):
+                validators["If-None-Match"] = r.headers["ETag"]
+            if r.headers.get("Last-Modified"):
+                validators["If-Modified-Since"] = r.headers["Last-Modified"]
+            text = r.text
+
+            m = _PRIMARY_JSON_PAT.search(text)
+            if m:
+                base = m.group(1).rstrip("/")
+                found_url = f"{base}/result.json"
+                break
+
+            m2 = _FALLBACK_JSON_PAT.search(text)
+            if m2:
+                found_url = m2.group(1)
+                break
+
+        delay = min(poll_seconds, POLL_START_SECONDS * POLL_BACKOFF_FACTOR ** attempt)
+        attempt += 1
+        if debug and _DEBUG:
+            print("[FETCH OUTPUT] result url not found yet, sleeping", round(delay, 1))
+
+        time.sleep(delay)
 
     if not found_url:
         raise TimeoutError("Could not locate result.json url in PhantomBuster output")
 
-    if debug:
+    if debug and _DEBUG:
         print("[FETCH OUTPUT] result json url:", found_url)
 
     return found_url
 
 
 def download_posts_json(json_url: str, debug: bool = True) -> List[PostItem]:
-    if debug:
+    if debug and _DEBUG:
         print("[DOWNLOAD POSTS] json_url:", json_url)
 
-    r = requests.get(json_url, timeout=60)
-
-    if debug:
-        print("[DOWNLOAD POSTS] status:", r.status_code)
-
-    r.raise_for_status()
-    arr = r.json()
+    with _SESSION.get(json_url, timeout=60, stream=True) as r:
+        if debug and _DEBUG:
+            print("[DOWNLOAD POSTS] status:", r.status_code)
 
-    posts: List[PostItem] = []
+        r.raise_for_status()
+        if ijson is not None:
+            # Parse array items off the socket instead of holding the whole export in memory
+            r.raw.decode_content = True
+            items = ijson.items(r.raw, "item", use_float=True)
+        else:
+            arr = _json_loads(r.content)
+            items = arr if isinstance(arr, list) else []
 
-    if isinstance(arr, list):
-        for x in arr:
-            item_data = {k: x.get(k) for k in PostItem.__annotations__.keys()}
-            posts.append(PostItem(**item_data))
+        posts: List[PostItem] = [
+            PostItem(*(x.get(k) for k in _POSTITEM_KEYS)) for x in items if isinstance(x, dict)
+        ]
 
-    if debug:
+    if debug and _DEBUG:
         print("[DOWNLOAD POSTS] total posts:", len(posts))
 
     return posts
@@ -330,7 +431,7 @@ def trigger_phantombuster_autopost(
     number_of_posts_per_launch: int = 1,
     debug: bool = True,
 ) -> Dict[str, Any]:
-    if debug:
+    if debug and _DEBUG:
         print("[AUTOPOST] sheet_url:", sheet_url)
 
     headers = {
@@ -357,36 +458,6 @@ def trigger_phantombuster_autopost(
 # OpenAI helpers
 # ======================================================================
 
-def summarize_image_with_openai(
-    image_url: str,
-    openai_api_key: str,
-    model: str = DEFAULT_OPENAI_MODEL,
-    debug: bool = True,
-) -> str:
-    if OpenAI is None:
-        raise RuntimeError("openai package is not installed")
-
-    client = OpenAI(api_key=openai_api_key)
-
-    content = [
-        {"type": "text", "text": "Summarize this LinkedIn image post in two sentences. No hashtags."},
-        {"type": "image_url", "image_url": {"url": image_url}},
-    ]
-
-    resp = client.chat.completions.create(
-        model=model,
-        messages=[{"role": "user", "content": content}],
-        temperature=0.2,
-    )
-
-    summary = resp.choices[0].message.content.strip()
-
-    if debug:
-        print("[OPENAI IMG] summary:", summary)
-
-    return summary
-
-
 def extract_common_interests(
     posts: List[PostItem],
     openai_api_key: str,
@@ -400,66 +471,67 @@ def extract_common_interests(
     if OpenAI is None:
         raise RuntimeError("openai package is not installed")
 
-    client = OpenAI(api_key=openai_api_key)
+    client = _openai_client(openai_api_key)
 
+    # One pass: post texts for the corpus, plus image-only posts, which are attached
+    # to the extraction call itself instead of being summarised one request at a time
     texts: List[str] = []
-
+    texts_len = 0
+    image_urls: List[str] = []
     for p in posts:
-        if p.postContent:
-            texts.append(str(p.postContent))
+        content = p.postContent
+        if content:
+            # Stop collecting text once the corpus cap is reached; later posts would be cut anyway
+            if texts_len < POST_CORPUS_MAX_CHARS:
+                texts.append(str(content))
+                texts_len += len(texts[-1]) + 2
+        elif p.imgUrl and len(image_urls) < max_image_summaries:
+            image_urls.append(p.imgUrl)
 
-    image_summaries = 0
-    for p in posts:
-        if not p.postContent and p.imgUrl and image_summaries < max_image_summaries:
-            try:
-                summary = summarize_image_with_openai(
-                    image_url=p.imgUrl,
-                    openai_api_key=openai_api_key,
-                    model=model,
-                    debug=debug,
-                )
-                texts.append(summary)
-                image_summaries += 1
-            except Exception as e:
-                if debug:
-                    print("[OPENAI IMG] error for image summary:", e)
-
-    corpus = "\n\n".join(texts)[:15000]
+    corpus = "\n\n".join(texts)[:POST_CORPUS_MAX_CHARS]
 
     sys_prompt = (
-        "Analyze the following LinkedIn posts and image summaries and extract eight to twelve "
+        "Analyze the following LinkedIn posts and any attached post images and extract eight to twelve "
         "multi word interest phrases. Requirements: "
         "1. Each phrase must be 3 to 8 words long. "
         "2. No single words or bigrams. "
         "3. No vague generalities like 'innovation' or 'leadership'. "
         "4. Each phrase must describe a concrete recurring theme or topic visible across the posts. "
-        "5. Output only a JSON array of clean phrases."
+        "5. Return an object with a `phrases` field holding the clean phrases."
     )
 
-    resp = client.chat.completions.create(
-        model=model,
-        messages=[
-            {"role": "system", "content": sys_prompt},
-            {"role": "user", "content": corpus or "No content"},
-        ],
-        temperature=0.2,
-    )
-
-    raw = resp.choices[0].message.content.strip()
-    raw_clean = raw.replace("```json", "").replace("```", "").strip()
-
-    if debug:
-        print("[OPENAI KW] raw:", raw_clean)
+    def extract(with_images: bool):
+        user_content: Any = corpus or "No content"
+        if with_images:
+            user_content = [{"type": "text", "text": user_content}] + [
+                {"type": "image_url", "image_url": {"url": url}} for url in image_urls
+            ]
+        return client.chat.completions.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": sys_prompt},
+                {"role": "user", "content": user_content},
+            ],
+            temperature=0.2,
+            response_format=_PHRASES_RESPONSE_FORMAT,
+        )
 
     try:
-        arr = json.loads(raw_clean)
-        if isinstance(arr, list):
-            return [str(x).strip().lower() for x in arr if str(x).strip()]
+        resp = extract(with_images=bool(image_urls))
     except Exception as e:
-        if debug:
-            print("[OPENAI KW] parse error:", e)
+        if not image_urls:
+            raise
+        # An expired or unreachable image url fails the whole request; retry on the text alone
+        if debug and _DEBUG:
+            print("[OPENAI KW] image context failed, retrying text only:", e)
+        resp = extract(with_images=False)
 
-    return [w.strip().lower() for w in raw.split("\n") if w.strip()][:12]
+    phrases = _json_loads(resp.choices[0].message.content)["phrases"]
+
+    if debug and _DEBUG:
+        print("[OPENAI KW] phrases:", phrases)
+
+    return [p.strip().lower() for p in phrases if p.strip()]
 
 
 def infer_writing_style_from_posts(
@@ -471,9 +543,17 @@ def infer_writing_style_from_posts(
     if OpenAI is None:
         raise RuntimeError("openai package is not installed")
 
-    client = OpenAI(api_key=openai_api_key)
+    client = _openai_client(openai_api_key)
+
+    texts: List[str] = []
+    texts_len = 0
+    for p in posts:
+        if texts_len >= POST_CORPUS_MAX_CHARS:
+            break
+        texts.append(p.postContent or "")
+        texts_len += len(texts[-1]) + 2
 
-    sample = "\n\n".join([p.postContent or "" for p in posts])[:15000]
+    sample = "\n\n".join(texts)[:POST_CORPUS_MAX_CHARS]
 
     sys_prompt = (
         "You will receive multiple LinkedIn posts from one profile. "
@@ -489,11 +569,16 @@ def infer_writing_style_from_posts(
             {"role": "system", "content": sys_prompt},
             {"role": "user", "content": sample or "No content"},
         ],
+        # Ten full bullet points run to ~500 tokens; the cap only stops runaway output
+        max_tokens=800,
     )
 
     notes = resp.choices[0].message.content.strip()
+    # These notes go into every generated post, so never pass on a half-written point
+    if resp.choices[0].finish_reason == "length" and "\n" in notes:
+        notes = notes.rsplit("\n", 1)[0].rstrip()
 
-    if debug:
+    if debug and _DEBUG:
         print("[STYLE] notes:", notes[:400])
 
     return notes
@@ -510,7 +595,7 @@ def generate_linkedin_post(
     if OpenAI is None:
         raise RuntimeError("openai package is not installed")
 
-    client = OpenAI(api_key=openai_key)
+    client = _openai_client(openai_key)
 
     sys_prompt = (
         "You are a LinkedIn copywriter. Write a polished LinkedIn post about the given topic "
@@ -527,18 +612,34 @@ def generate_linkedin_post(
         "Note: Do NOT use any user interest keywords or other profile keywords. Write only about the topic above."
     )
 
-    resp = client.chat.completions.create(
-        model=model,
-        messages=[
-            {"role": "system", "content": sys_prompt},
-            {"role": "user", "content": user_content},
-        ],
-        temperature=0.6,
-    )
+    messages = [
+        {"role": "system", "content": sys_prompt},
+        {"role": "user", "content": user_content},
+    ]
+    for attempt in range(2):
+        resp = client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=0.6,
+            # Well above the ~1300 character target (hashtags and emoji cost extra tokens);
+            # only stops runaway generations
+            max_tokens=1000,
+        )
+        # A post cut at the cap would be saved and autoposted mid-sentence
+        if resp.choices[0].finish_reason != "length":
+            break
+        if debug and _DEBUG:
+            print("[GEN POST] hit max_tokens, attempt:", attempt + 1)
+        messages = messages + [
+            {"role": "assistant", "content": resp.choices[0].message.content or ""},
+            {"role": "user", "content": "That was too long. Rewrite it well under 1300 characters."},
+        ]
+    else:
+        raise RuntimeError("Generated post exceeded the length limit; please try again.")
 
     post_text = resp.choices[0].message.content.strip()
 
-    if debug:
+    if debug and _DEBUG:
         print("[GEN POST] length:", len(post_text))
         print("[GEN POST] preview:", post_text[:300].replace("\n", " "))
 
@@ -549,35 +650,50 @@ def _sanitize_keywords_input(keywords, debug=False):
     if keywords is None:
         return []
 
-    if isinstance(keywords, List):
+    if isinstance(keywords, list):
         cleaned = []
         for k in keywords:
             if isinstance(k, str):
                 ck = k.strip().strip('`')
-                if ck and ck not in ["[", "]"]:
+                if ck and ck not in ("[", "]"):
                     cleaned.append(ck)
         return cleaned
 
     if isinstance(keywords, str):
-        txt = keywords.strip().strip("`")
-        txt2 = txt.replace("```json", "").replace("```", "").strip()
-        try:
-            arr = json.loads(txt2)
-            if isinstance(arr, list):
-                return [str(x).strip() for x in arr if str(x).strip()]
-        except:
-            pass
-
-        parts = re.split(r"[\n,]+", txt2)
-        return [p.strip() for p in parts if p.strip()]
+        return list(_sanitize_keywords_str(keywords))
 
     return []
 
 
+@functools.lru_cache(maxsize=256)
+def _sanitize_keywords_str(keywords: str) -> Tuple[str, ...]:
+    # The agent passes the same model-produced keyword string on retries; a tuple keeps cached results immutable
+    txt = keywords.strip().strip("`")
+    txt2 = txt.replace("```json", "").replace("```", "").strip()
+    try:
+        arr = json.loads(txt2)
+    except ValueError:
+        arr = None
+    if isinstance(arr, list):
+        return tuple(t for t in (str(x).strip() for x in arr) if t)
+
+    parts = _KW_SPLIT_PAT.split(txt2)
+    return tuple(p.strip() for p in parts if p.strip())
+
+
 # ======================================================================
 # Firecrawl based trend fetching
 # ======================================================================
 
+# Agent retries and multi post sessions ask for the same trends repeatedly; each miss
+# costs a Firecrawl search plus an OpenAI extraction call
+TREND_CACHE_TTL = float(os.getenv("TREND_CACHE_TTL", 600))
+TREND_CACHE_MAX_ENTRIES = 64
+
+_trend_cache: "OrderedDict[Tuple[Any, ...], Tuple[float, Tuple[TrendItem, ...]]]" = OrderedDict()
+_trend_cache_lock = threading.Lock()
+
+
 def fetch_trends_firecrawl(
     firecrawl_api_key: str,
     openai_api_key: str,
@@ -588,7 +704,9 @@ def fetch_trends_firecrawl(
     debug: bool = True,
 ) -> List[TrendItem]:
 
-    if Firecrawl is None:
+    try:
+        import firecrawl  # noqa: F401
+    except Exception:
         raise RuntimeError("firecrawl package is not installed")
 
     if OpenAI is None:
@@ -599,6 +717,19 @@ def fetch_trends_firecrawl(
 
     cleaned = _sanitize_keywords_input(keywords, debug=debug)
 
+    cache_key = (
+        (topic or "").strip(),
+        tuple(sorted(cleaned[:6])),
+        max_web_items,
+        max_news_items,
+    )
+    with _trend_cache_lock:
+        hit = _trend_cache.get(cache_key)
+        if hit is not None and time.monotonic() - hit[0] < TREND_CACHE_TTL:
+            if debug and _DEBUG:
+                print("[FIRECRAWL] trend cache hit:", cache_key[:2])
+            return list(hit[1])
+
     if topic and topic.strip():
         query_text = f"latest trends about {topic.strip()}"
     else:
@@ -608,10 +739,10 @@ def fetch_trends_firecrawl(
         joined = ", ".join(kw)
         query_text = f"latest trends about {joined}"
 
-    if debug:
+    if debug and _DEBUG:
         print("[FIRECRAWL] query:", query_text)
 
-    firecrawl_client = Firecrawl(api_key=firecrawl_api_key)
+    firecrawl_client = _firecrawl_client(firecrawl_api_key)
     result = firecrawl_client.search(query=query_text,
                                      limit=max_web_items + max_news_items)
 
@@ -619,48 +750,27 @@ def fetch_trends_firecrawl(
     data_web = data.web if hasattr(data, "web") and data.web else []
     data_news = data.news if hasattr(data, "news") and data.news else []
 
-    client = OpenAI(api_key=openai_api_key)
-    summaries: List[str] = []
+    client = _openai_client(openai_api_key)
 
-    def summarize(text_block: str) -> str:
-        try:
-            resp = client.chat.completions.create(
-                model=DEFAULT_OPENAI_MODEL,
-                messages=[
-                    {"role": "system", "content": "Summarize the item in one clear sentence."},
-                    {"role": "user", "content": text_block},
-                ],
-                temperature=0.2,
-            )
-            return resp.choices[0].message.content.strip()
-        except Exception as e:
-            if debug:
-                print("[SUMMARY ERROR]", e)
-            return ""
-
-    for item in data_web[:max_web_items]:
-        title = item.title or ""
-        desc = item.description or ""
-        url = item.url or ""
-        block = f"{title}. {desc}. Source: {url}"
-        summaries.append(summarize(block))
-
-    for item in data_news[:max_news_items]:
-        title = item.title or ""
-        desc = item.snippet or ""
-        url = item.url or ""
-        block = f"{title}. {desc}. Source: {url}"
-        summaries.append(summarize(block))
+    # Raw title/description/url lines go straight into the single trend-extraction call;
+    # per-item summaries cost one request each and carried the same information
+    summaries = [
+        f"- {item.title or ''}: {item.description or ''} [{item.url or ''}]"
+        for item in data_web[:max_web_items]
+    ] + [
+        f"- {item.title or ''}: {item.snippet or ''} [{item.url or ''}]"
+        for item in data_news[:max_news_items]
+    ]
 
     combined_text = "\n".join(summaries)[:15000]
 
-    if debug:
+    if debug and _DEBUG:
         print("[FIRECRAWL] combined summary length:", len(combined_text))
 
     sys_prompt = (
         "You are an expert trend analyst. "
         "Extract exactly five clear phrase level trends. "
-        "Return only a JSON array of five strings."
+        "Return an object with a `phrases` field holding the five strings."
     )
 
     resp = client.chat.completions.create(
@@ -670,21 +780,12 @@ def fetch_trends_firecrawl(
             {"role": "user", "content": combined_text or "No data"},
         ],
         temperature=0.3,
+        response_format=_PHRASES_RESPONSE_FORMAT,
+        max_tokens=200,
     )
 
-    raw = resp.choices[0].message.content.strip()
-    raw_clean = raw.replace("```json", "").replace("```", "").strip()
-
-    try:
-        phrases = json.loads(raw_clean)
-        if isinstance(phrases, list):
-            phrases = [p.strip() for p in phrases if p.strip()]
-        else:
-            phrases = []
-    except Exception:
-        phrases = [line.strip() for line in raw_clean.split("\n") if line.strip()]
-
-    phrases = phrases[:5]
+    phrases = _json_loads(resp.choices[0].message.content)["phrases"]
+    phrases = [p.strip() for p in phrases if p.strip()][:5]
 
     first_url = ""
     if len(data_web) > 0:
@@ -695,6 +796,13 @@ def fetch_trends_firecrawl(
         for phrase in phrases
     ]
 
+    if trend_items:
+        with _trend_cache_lock:
+            _trend_cache[cache_key] = (time.monotonic(), tuple(trend_items))
+            _trend_cache.move_to_end(cache_key)
+            while len(_trend_cache) > TREND_CACHE_MAX_ENTRIES:
+                _trend_cache.popitem(last=False)
+
     return trend_items
 
 
@@ -708,10 +816,13 @@ def save_post_to_google_sheet(
     service_account_json_path: str,
     debug: bool = True,
 ) -> Tuple[str, int]:
-    if gspread is None or Credentials is None:
+    try:
+        import gspread
+        from google.oauth2.service_account import Credentials
+    except Exception:
         raise RuntimeError("gspread or google auth is not installed")
 
-    if debug:
+    if debug and _DEBUG:
         print("[GSHEETS] save content length:", len(content))
 
     scopes = [
@@ -730,7 +841,7 @@ def save_post_to_google_sheet(
 
     ws.append_row([content], value_input_option="RAW")
 
-    if debug:
+    if debug and _DEBUG:
         print("[GSHEETS] append done", ws.id, ws.row_count)
 
     return (ws.id, ws.row_count)
@@ -744,7 +855,10 @@ def make_functions_schema() -> List[Dict[str, Any]]:
     return [
         {
             "name": "scrape_profile_tool",
-            "description": "Scrape a LinkedIn profile posts via PhantomBuster and return posts array.",
+            "description": (
+                "Scrape a LinkedIn profile posts via PhantomBuster. The result carries a tool_id; "
+                "pass it as posts_ref to the tools that read posts."
+            ),
             "parameters": {
                 "type": "object",
                 "properties": {
@@ -768,12 +882,12 @@ def make_functions_schema() -> List[Dict[str, Any]]:
                 "type": "object",
                 "properties": {
                     "openai_api_key": {"type": "string"},
-                    "posts": {
-                        "type": "array",
-                        "items": {"type": "object"}
+                    "posts_ref": {
+                        "type": "string",
+                        "description": "tool_id of the scrape_profile_tool result holding the posts",
                     },
                 },
-                "required": ["openai_api_key", "posts"],
+                "required": ["openai_api_key", "posts_ref"],
             },
         },
         {
@@ -783,12 +897,12 @@ def make_functions_schema() -> List[Dict[str, Any]]:
                 "type": "object",
                 "properties": {
                     "openai_api_key": {"type": "string"},
-                    "posts": {
-                        "type": "array",
-                        "items": {"type": "object"}
+                    "posts_ref": {
+                        "type": "string",
+                        "description": "tool_id of the scrape_profile_tool result holding the posts",
                     },
                 },
-                "required": ["openai_api_key", "posts"],
+                "required": ["openai_api_key", "posts_ref"],
             },
         },
         {
@@ -899,7 +1013,7 @@ def scrape_profile_tool(
 
     return {
         "json_url": json_url,
-        "posts": [p.__dict__ for p in posts],
+        "posts": [{k: getattr(p, k) for k in _POSTITEM_KEYS} for p in posts],
     }
 
 
@@ -907,10 +1021,7 @@ def extract_keywords_tool(
     openai_api_key: str,
     posts: List[Dict[str, Any]],
 ) -> Dict[str, Any]:
-    post_objs = [
-        PostItem(**{k: d.get(k) for k in PostItem.__annotations__.keys()})
-        for d in posts
-    ]
+    post_objs = [PostItem(*(d.get(k) for k in _POSTITEM_KEYS)) for d in posts]
 
     keywords = extract_common_interests(post_objs, openai_api_key=openai_api_key)
 
@@ -921,10 +1032,7 @@ def infer_style_tool(
     openai_api_key: str,
     posts: List[Dict[str, Any]],
 ) -> Dict[str, Any]:
-    post_objs = [
-        PostItem(**{k: d.get(k) for k in PostItem.__annotations__.keys()})
-        for d in posts
-    ]
+    post_objs = [PostItem(*(d.get(k) for k in _POSTITEM_KEYS)) for d in posts]
 
     style = infer_writing_style_from_posts(
         post_objs,
@@ -996,44 +1104,121 @@ def autopost_tool(
     return {"autopost_response": resp}
 
 
+_TOOLS = {
+    "scrape_profile_tool": scrape_profile_tool,
+    "extract_keywords_tool": extract_keywords_tool,
+    "infer_style_tool": infer_style_tool,
+    "fetch_trends_firecrawl_tool": fetch_trends_firecrawl_tool,
+    "generate_post_tool": generate_post_tool,
+    "save_to_sheet_tool": save_to_sheet_tool,
+    "autopost_tool": autopost_tool,
+}
+
+
 def call_tool_by_name(name: str, args: Dict[str, Any]) -> Dict[str, Any]:
     print("[DISPATCH] tool:", name)
 
+    fn = _TOOLS.get(name)
+    if fn is None:
+        return {"error": f"unknown tool {name}"}
+
     try:
-        if name == "scrape_profile_tool":
-            return scrape_profile_tool(**args)
-        if name == "extract_keywords_tool":
-            return extract_keywords_tool(**args)
-        if name == "infer_style_tool":
-            return infer_style_tool(**args)
-        if name == "fetch_trends_firecrawl_tool":
-            return fetch_trends_firecrawl_tool(**args)
-        if name == "generate_post_tool":
-            return generate_post_tool(**args)
-        if name == "save_to_sheet_tool":
-            return save_to_sheet_tool(**args)
-        if name == "autopost_tool":
-            return autopost_tool(**args)
+        return fn(**args)
     except Exception as e:
         print("[DISPATCH] tool error:", e)
         return {"error": str(e)}
 
-    return {"error": f"unknown tool {name}"}
-
 
 # ======================================================================
 # Agent loop using function calling
 # ======================================================================
 
+# Only the most recent tool call/result pairs are replayed verbatim to the model; older
+# ones are folded into one compact note so the prompt does not grow with every step
+AGENT_KEEP_TOOL_PAIRS = 3
+AGENT_NOTE_VALUE_CHARS = 1000
+# Full tool results stay in a local store; the model sees them compacted to this size
+# per field, with a tool_id it can hand back (posts_ref) instead of copying posts
+AGENT_TOOL_VALUE_CHARS = 4000
+
+
+def _compact_tool_result(result: Any, limit: int = AGENT_NOTE_VALUE_CHARS) -> Any:
+    """Keep small fields (urls, keywords, style notes) and replace bulky ones like posts."""
+    if not isinstance(result, dict):
+        return _json_preview(result, limit)
+    compact: Dict[str, Any] = {}
+    for k, v in result.items():
+        if len(_json_preview(v, limit + 1)) <= limit:
+            compact[k] = v
+        elif isinstance(v, (list, dict)):
+            compact[k] = f"<{len(v)} items omitted>"
+        else:
+            compact[k] = str(v)[:limit] + "..."
+    return compact
+
+
+def _resolve_posts_ref(args: Dict[str, Any], tool_store: Dict[str, Any]) -> Dict[str, Any]:
+    """Swap a posts_ref tool id for the stored posts; an unknown id leaves posts unset so the tool errors."""
+    ref = args.pop("posts_ref", None)
+    if ref is not None and isinstance(tool_store.get(ref), dict) and "posts" in tool_store[ref]:
+        args["posts"] = tool_store[ref]["posts"]
+    return args
+
+
+# Final-answer deltas between progress callbacks while an agent step streams
+AGENT_PROGRESS_EVERY_CHUNKS = 20
+
+
+def _stream_agent_step(
+    client: Any,
+    history: List[Dict[str, Any]],
+    functions_schema: List[Dict[str, Any]],
+    on_progress: Optional[Callable[[str], None]] = None,
+) -> Tuple[Optional[str], str, str]:
+    """
+    Run one streamed agent step and return (function name or None, arguments, content).
+    Deltas are collected in lists and joined once; on_progress sees the answer as it arrives.
+    """
+    stream = client.chat.completions.create(
+        model=DEFAULT_OPENAI_MODEL,
+        messages=history,
+        functions=functions_schema,
+        function_call="auto",
+        temperature=0.2,
+        stream=True,
+    )
+
+    name_parts: List[str] = []
+    arg_parts: List[str] = []
+    content_parts: List[str] = []
+    for chunk in stream:
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta
+        if delta.function_call:
+            if delta.function_call.name:
+                name_parts.append(delta.function_call.name)
+            if delta.function_call.arguments:
+                arg_parts.append(delta.function_call.arguments)
+        elif delta.content:
+            content_parts.append(delta.content)
+            if on_progress and len(content_parts) % AGENT_PROGRESS_EVERY_CHUNKS == 0:
+                on_progress("Writing final answer: " + "".join(content_parts)[-300:])
+
+    return ("".join(name_parts) or None), "".join(arg_parts), "".join(content_parts)
+
+
 def run_agent_sequence(
     openai_api_key: str,
     system_prompt: str,
     user_payload: Dict[str, Any],
     functions_schema: List[Dict[str, Any]],
     max_steps: int = 10,
+    on_progress: Optional[Callable[[str], None]] = None,
 ) -> Dict[str, Any]:
     """
-    Agent loop that uses function calling.
+    Agent loop that uses function calling. Steps are streamed; on_progress, when given,
+    receives short status strings while the loop runs.
     The final assistant message must be a JSON object string with:
     {
       "json_url": str,
@@ -1045,60 +1230,82 @@ def run_agent_sequence(
     if OpenAI is None:
         raise RuntimeError("openai package is not installed")
 
-    client = OpenAI(api_key=openai_api_key)
+    client = _openai_client(openai_api_key)
 
-    history: List[Dict[str, Any]] = [
+    head: List[Dict[str, Any]] = [
         {"role": "system", "content": system_prompt},
         {
             "role": "user",
             "content": json.dumps(user_payload),
         },
     ]
+    # Recent (function_call message, function result message, raw result, tool_id), oldest first
+    turns: List[Tuple[Dict[str, Any], Dict[str, Any], Any, str]] = []
+    earlier_notes: List[str] = []
+    tool_store: Dict[str, Any] = {}
     last_tool_result: Optional[Dict[str, Any]] = None
 
     for step in range(max_steps):
         print(f"[AGENT] step {step + 1}")
 
-        resp = client.chat.completions.create(
-            model=DEFAULT_OPENAI_MODEL,
-            messages=history,
-            functions=functions_schema,
-            function_call="auto",
-            temperature=0.2,
-        )
+        history = list(head)
+        if earlier_notes:
+            history.append(
+                {
+                    "role": "system",
+                    "content": "Earlier tool calls, results compacted:\n" + "\n".join(earlier_notes),
+                }
+            )
+        for call_msg, result_msg, _, _ in turns:
+            history.append(call_msg)
+            history.append(result_msg)
 
-        msg = resp.choices[0].message
+        name, arguments, content = _stream_agent_step(client, history, functions_schema, on_progress)
 
-        if msg.function_call:
-            fn = msg.function_call
-            name = fn.name
+        if name:
             try:
-                args = json.loads(fn.arguments or "{}")
+                args = json.loads(arguments or "{}")
             except Exception:
                 args = {}
 
             print("[AGENT] function call:", name, "args:", args)
-            tool_result = call_tool_by_name(name, args)
+            if on_progress:
+                on_progress(f"Step {step + 1}: running {name}")
+            call_args = json.dumps(args)
+            tool_result = call_tool_by_name(name, _resolve_posts_ref(args, tool_store))
             last_tool_result = tool_result
-
-            history.append(
-                {
-                    "role": "assistant",
-                    "content": None,
-                    "function_call": {"name": name, "arguments": json.dumps(args)},
-                }
-            )
-            history.append(
-                {
-                    "role": "function",
-                    "name": name,
-                    "content": json.dumps(tool_result),
-                }
+            tool_id = f"tool_{step + 1}"
+            tool_store[tool_id] = tool_result
+            shown = _compact_tool_result(tool_result, AGENT_TOOL_VALUE_CHARS)
+            if isinstance(shown, dict):
+                shown = {"tool_id": tool_id, **shown}
+
+            turns.append(
+                (
+                    {
+                        "role": "assistant",
+                        "content": None,
+                        "function_call": {"name": name, "arguments": call_args},
+                    },
+                    {
+                        "role": "function",
+                        "name": name,
+                        "content": json.dumps(shown, default=str),
+                    },
+                    tool_result,
+                    tool_id,
+                )
             )
+            if len(turns) > AGENT_KEEP_TOOL_PAIRS:
+                # Keep the tool_id so the model can still pass it as posts_ref
+                _, old_result_msg, old_result, old_tool_id = turns.pop(0)
+                earlier_notes.append(
+                    f"- {old_result_msg['name']} (tool_id={old_tool_id}) -> "
+                    + json.dumps(_compact_tool_result(old_result), default=str)
+                )
 
             continue
 
-        content = msg.content or ""
         print("[AGENT] final text:", content[:400])
 
         try:
@@ -1124,209 +1331,149 @@ def run_agent_sequence(
 # Gradio user interface
 # ======================================================================
 
-with gr.Blocks(title="LinkedIn Content Agent") as demo:
-    gr.Markdown("## LinkedIn Content Agent")
+def build_demo():
+    """Build the Gradio app; gradio is imported here so only launching the UI pays for it."""
+    import gradio as gr
 
-    with gr.Column():
-        gr.Markdown(
-            "Enter your keys and inputs, upload a Google service account json, then click Run Agent."
-        )
+    with gr.Blocks(title="LinkedIn Content Agent") as demo:
+        gr.Markdown("## LinkedIn Content Agent")
 
-        with gr.Row():
-            openai_key_in = gr.Textbox(
-                label="OpenAI API Key",
-                type="password",
-            )
-            phantom_key_in = gr.Textbox(
-                label="PhantomBuster API Key",
-                type="password",
-            )
-            firecrawl_key_in = gr.Textbox(
-                label="Firecrawl API Key for trends",
-                type="password",
+        with gr.Column():
+            gr.Markdown(
+                "Enter your keys and inputs, upload a Google service account json, then click Run Agent."
             )
 
-        with gr.Row():
-            session_cookie_in = gr.Textbox(
-                label="LinkedIn session cookie",
-                type="password",
-            )
-            user_agent_in = gr.Textbox(
-                label="Browser User Agent",
-            )
+            with gr.Row():
+                openai_key_in = gr.Textbox(
+                    label="OpenAI API Key",
+                    type="password",
+                )
+                phantom_key_in = gr.Textbox(
+                    label="PhantomBuster API Key",
+                    type="password",
+                )
+                firecrawl_key_in = gr.Textbox(
+                    label="Firecrawl API Key for trends",
+                    type="password",
+                )
 
-        with gr.Row():
-            user_profile_url_in = gr.Textbox(
-                label="Your LinkedIn profile url for scraping interests",
-            )
-            style_profile_url_in = gr.Textbox(
-                label="Another LinkedIn profile url for style inference",
-            )
+            with gr.Row():
+                session_cookie_in = gr.Textbox(
+                    label="LinkedIn session cookie",
+                    type="password",
+                )
+                user_agent_in = gr.Textbox(
+                    label="Browser User Agent",
+                )
 
-        with gr.Row():
-            sheet_url_in = gr.Textbox(
-                label="Google Sheet url for saving and autopost",
-            )
-            sa_json_file_in = gr.File(
-                label="Upload Google service account json",
-            )
+            with gr.Row():
+                user_profile_url_in = gr.Textbox(
+                    label="Your LinkedIn profile url for scraping interests",
+                )
+                style_profile_url_in = gr.Textbox(
+                    label="Another LinkedIn profile url for style inference",
+                )
 
-        run_btn = gr.Button("Run Agent")
+            with gr.Row():
+                sheet_url_in = gr.Textbox(
+                    label="Google Sheet url for saving and autopost",
+                )
+                sa_json_file_in = gr.File(
+                    label="Upload Google service account json",
+                )
 
-    status_out = gr.Markdown()
-    json_url_out = gr.Textbox(
-        label="Scrape result json url",
-        interactive=False,
-    )
-    keywords_out = gr.JSON(
-        label="Extracted user interest phrases",
-    )
-    style_out = gr.Textbox(
-        label="Inferred writing style notes",
-        lines=10,
-    )
-    trends_out = gr.JSON(
-        label="Trend suggestions from Firecrawl (phrase level)",
-    )
+            run_btn = gr.Button("Run Agent")
 
-    gr.Markdown("Choose a trend or type a topic.")
-    with gr.Row():
-        topic_choice_in = gr.Dropdown(
-            choices=[],
-            label="Pick a suggested trend phrase",
-            interactive=True,
+        status_out = gr.Markdown()
+        json_url_out = gr.Textbox(
+            label="Scrape result json url",
+            interactive=False,
         )
-        topic_manual_in = gr.Textbox(
-            label="Or type a custom topic to refine trends and generate a post",
+        keywords_out = gr.JSON(
+            label="Extracted user interest phrases",
         )
-
-    gen_btn = gr.Button("Generate LinkedIn Post")
-    post_out = gr.Textbox(
-        label="Post draft",
-        lines=14,
-    )
-
-    with gr.Row():
-        do_save_chk = gr.Checkbox(
-            label="Save to Google Sheet",
-            value=True,
+        style_out = gr.Textbox(
+            label="Inferred writing style notes",
+            lines=10,
         )
-        do_autopost_chk = gr.Checkbox(
-            label="Autopost with PhantomBuster",
-            value=False,
+        trends_out = gr.JSON(
+            label="Trend suggestions from Firecrawl (phrase level)",
         )
 
-    submit_btn = gr.Button("Save and possibly Autopost")
-    saved_out = gr.Textbox(
-        label="Save information",
-    )
-    autopost_out = gr.JSON(
-        label="Autopost response",
-    )
-
-    state_all = gr.State(value={})
-
-    # ------------------------------------------------------------------
-    # Callback for Run Agent (agentic flow)
-    # ------------------------------------------------------------------
-
-    def on_run_agent(
-        openai_key,
-        phantom_key,
-        firecrawl_key,
-        session_cookie,
-        user_agent,
-        user_profile_url,
-        style_profile_url,
-        sheet_url,
-        sa_file,
-    ):
-        logs: List[str] = []
-
-        def log(x: str):
-            print(x)
-            logs.append(x)
-
-        missing = []
-        if not openai_key:
-            missing.append("OpenAI API Key")
-        if not phantom_key:
-            missing.append("PhantomBuster API Key")
-        if not firecrawl_key:
-            missing.append("Firecrawl API Key")
-        if not session_cookie:
-            missing.append("LinkedIn session cookie")
-        if not user_agent:
-            missing.append("User Agent")
-        if not user_profile_url:
-            missing.append("Your LinkedIn profile url")
-        if not style_profile_url:
-            missing.append("Style LinkedIn profile url")
-
-        if missing:
-            return (
-                f"Missing required fields: {', '.join(missing)}",
-                "",
-                None,
-                "",
-                None,
-                gr.update(choices=[]),
-                {},
+        gr.Markdown("Choose a trend or type a topic.")
+        with gr.Row():
+            topic_choice_in = gr.Dropdown(
+                choices=[],
+                label="Pick a suggested trend phrase",
+                interactive=True,
+            )
+            topic_manual_in = gr.Textbox(
+                label="Or type a custom topic to refine trends and generate a post",
             )
 
-        sa_path = None
-        if sa_file is not None:
-            try:
-                tmpdir = tempfile.mkdtemp(prefix="sajson_")
-                sa_path = os.path.join(tmpdir, os.path.basename(sa_file.name))
-                shutil.copy(sa_file.name, sa_path)
-                log("Service account json saved to a temporary path.")
-            except Exception as e:
-                log(f"Could not stage service account json: {e}")
+        gen_btn = gr.Button("Generate LinkedIn Post")
+        post_out = gr.Textbox(
+            label="Post draft",
+            lines=14,
+        )
 
-        try:
-            system_prompt = (
-                "You are an automation agent for a LinkedIn content tool. "
-                "You must perform the following steps using the provided tools. "
-                "First, scrape the user profile to get posts. "
-                "Second, extract recurring interest phrases from the user posts. "
-                "Third, scrape the style profile to get posts. "
-                "Fourth, infer writing style from the style profile posts. "
-                "Fifth, fetch Firecrawl trends using the interest phrases and no specific topic. "
-                "When you have completed all steps, reply with a single JSON object only, "
-                "with this exact structure: "
-                "{"
-                '"json_url": "<string with the user profile scrape json url>", '
-                '"keywords": ["list", "of", "interest phrases"], '
-                '"style_notes": "<string with style description>", '
-                '"trends": [<array of trend objects exactly as returned by fetch_trends_firecrawl_tool>]'
-                "}. "
-                "Do not add explanations or extra text outside the JSON."
+        with gr.Row():
+            do_save_chk = gr.Checkbox(
+                label="Save to Google Sheet",
+                value=True,
             )
-
-            user_payload = {
-                "phantom_api_key": phantom_key,
-                "firecrawl_api_key": firecrawl_key,
-                "openai_api_key": openai_key,
-                "session_cookie": session_cookie,
-                "user_agent": user_agent,
-                "user_profile_url": user_profile_url,
-                "style_profile_url": style_profile_url,
-            }
-
-            functions_schema = make_functions_schema()
-
-            agent_result = run_agent_sequence(
-                openai_api_key=openai_key,
-                system_prompt=system_prompt,
-                user_payload=user_payload,
-                functions_schema=functions_schema,
+            do_autopost_chk = gr.Checkbox(
+                label="Autopost with PhantomBuster",
+                value=False,
             )
 
-            if "error" in agent_result and not agent_result.get("json_url"):
-                log(f"Agent error: {agent_result['error']}")
-                return (
-                    f"Error while running agent: {agent_result['error']}",
+        submit_btn = gr.Button("Save and possibly Autopost")
+        saved_out = gr.Textbox(
+            label="Save information",
+        )
+        autopost_out = gr.JSON(
+            label="Autopost response",
+        )
+
+        state_all = gr.State(value={})
+
+        # ------------------------------------------------------------------
+        # Callback for Run Agent (agentic flow)
+        # ------------------------------------------------------------------
+
+        def on_run_agent(
+            openai_key,
+            phantom_key,
+            firecrawl_key,
+            session_cookie,
+            user_agent,
+            user_profile_url,
+            style_profile_url,
+            sheet_url,
+            sa_file,
+        ):
+            logs: List[str] = []
+
+            def log(x: str):
+                print(x)
+                logs.append(x)
+
+            # Validate before any filesystem work: the service account json is only
+            # staged once every required field is present
+            required = [
+                (openai_key, "OpenAI API Key"),
+                (phantom_key, "PhantomBuster API Key"),
+                (firecrawl_key, "Firecrawl API Key"),
+                (session_cookie, "LinkedIn session cookie"),
+                (user_agent, "User Agent"),
+                (user_profile_url, "Your LinkedIn profile url"),
+                (style_profile_url, "Style LinkedIn profile url"),
+            ]
+            missing = [label for value, label in required if not value]
+
+            if missing:
+                yield (
+                    f"Missing required fields: {', '.join(missing)}",
                     "",
                     None,
                     "",
@@ -1334,209 +1481,304 @@ with gr.Blocks(title="LinkedIn Content Agent") as demo:
                     gr.update(choices=[]),
                     {},
                 )
+                return
 
-            json_url = agent_result.get("json_url", "") or ""
-            keywords = agent_result.get("keywords", []) or []
-            style_notes = agent_result.get("style_notes", "") or ""
-            trends = agent_result.get("trends", []) or []
-
-            trend_titles = [t.get("title", "") for t in trends if isinstance(t, dict) and t.get("title")]
-
-            log(f"Agent json_url: {json_url}")
-            log(f"Keywords: {keywords}")
-            log(f"Trend phrases fetched: {len(trends)}")
-
-            st = {
-                "openai_key": openai_key,
-                "phantom_key": phantom_key,
-                "firecrawl_key": firecrawl_key,
-                "session_cookie": session_cookie,
-                "user_agent": user_agent,
-                "sheet_url": sheet_url or "",
-                "sa_path": sa_path,
-                "keywords": keywords,
-                "style_notes": style_notes,
-                "trends": trends,
-                "json_url": json_url,
-            }
-
-            status_text = (
-                "Agent finished scraping and analysis. "
-                "You can now pick one of the suggested trend phrases or type your own topic."
-            )
-
-            return (
-                status_text,
-                json_url,
-                keywords,
-                style_notes,
-                trends,
-                gr.update(choices=trend_titles),
-                st,
-            )
-
-        except Exception as e:
-            log(f"Agent error: {e}")
-            return (
-                f"Error while running agent: {e}",
-                "",
-                None,
-                "",
-                None,
-                gr.update(choices=[]),
-                {},
-            )
+            sa_path = None
+            if sa_file is not None:
+                try:
+                    tmpdir = tempfile.mkdtemp(prefix="sajson_")
+                    sa_path = os.path.join(tmpdir, os.path.basename(sa_file.name))
+                    shutil.copy(sa_file.name, sa_path)
+                    log("Service account json saved to a temporary path.")
+                except Exception as e:
+                    log(f"Could not stage service account json: {e}")
 
-    # ------------------------------------------------------------------
-    # Callback for Generate LinkedIn Post
-    # ------------------------------------------------------------------
+            try:
+                system_prompt = (
+                    "You are an automation agent for a LinkedIn content tool. "
+                    "You must perform the following steps using the provided tools. "
+                    "First, scrape the user profile to get posts. "
+                    "Second, extract recurring interest phrases from the user posts. "
+                    "Third, scrape the style profile to get posts. "
+                    "Fourth, infer writing style from the style profile posts. "
+                    "Fifth, fetch Firecrawl trends using the interest phrases and no specific topic. "
+                    "When you have completed all steps, reply with a single JSON object only, "
+                    "with this exact structure: "
+                    "{"
+                    '"json_url": "<string with the user profile scrape json url>", '
+                    '"keywords": ["list", "of", "interest phrases"], '
+                    '"style_notes": "<string with style description>", '
+                    '"trends": [<array of trend objects exactly as returned by fetch_trends_firecrawl_tool>]'
+                    "}. "
+                    "Do not add explanations or extra text outside the JSON."
+                )
 
-    def on_generate_post(state, picked_title, manual_topic):
-        if not state or not state.get("openai_key"):
-            return "Please run the agent first to populate interests, style, and trends."
+                user_payload = {
+                    "phantom_api_key": phantom_key,
+                    "firecrawl_api_key": firecrawl_key,
+                    "openai_api_key": openai_key,
+                    "session_cookie": session_cookie,
+                    "user_agent": user_agent,
+                    "user_profile_url": user_profile_url,
+                    "style_profile_url": style_profile_url,
+                }
 
-        topic = None
-        refined_trends = None
+                functions_schema = make_functions_schema()
+
+                # Run the agent on a worker thread and relay its progress to the status box
+                progress: "queue.Queue[Optional[str]]" = queue.Queue()
+                outcome: Dict[str, Any] = {}
+
+                def work():
+                    try:
+                        outcome["result"] = run_agent_sequence(
+                            openai_api_key=openai_key,
+                            system_prompt=system_prompt,
+                            user_payload=user_payload,
+                            functions_schema=functions_schema,
+                            on_progress=progress.put,
+                        )
+                    except Exception as e:
+                        outcome["error"] = e
+                    finally:
+                        progress.put(None)
+
+                threading.Thread(target=work, daemon=True).start()
+                while True:
+                    update = progress.get()
+                    if update is None:
+                        break
+                    yield (update,) + (gr.update(),) * 6
+
+                if "error" in outcome:
+                    raise outcome["error"]
+                agent_result = outcome["result"]
+
+                if "error" in agent_result and not agent_result.get("json_url"):
+                    log(f"Agent error: {agent_result['error']}")
+                    yield (
+                        f"Error while running agent: {agent_result['error']}",
+                        "",
+                        None,
+                        "",
+                        None,
+                        gr.update(choices=[]),
+                        {},
+                    )
+                    return
+
+                json_url = agent_result.get("json_url", "") or ""
+                keywords = agent_result.get("keywords", []) or []
+                style_notes = agent_result.get("style_notes", "") or ""
+                trends = agent_result.get("trends", []) or []
+
+                trend_titles = [t.get("title", "") for t in trends if isinstance(t, dict) and t.get("title")]
+
+                log(f"Agent json_url: {json_url}")
+                log(f"Keywords: {keywords}")
+                log(f"Trend phrases fetched: {len(trends)}")
+
+                st = {
+                    "openai_key": openai_key,
+                    "phantom_key": phantom_key,
+                    "firecrawl_key": firecrawl_key,
+                    "session_cookie": session_cookie,
+                    "user_agent": user_agent,
+                    "sheet_url": sheet_url or "",
+                    "sa_path": sa_path,
+                    "keywords": keywords,
+                    "style_notes": style_notes,
+                    "trends": trends,
+                    "json_url": json_url,
+                }
 
-        manual_topic = (manual_topic or "").strip()
-        picked_title = (picked_title or "").strip()
+                status_text = (
+                    "Agent finished scraping and analysis. "
+                    "You can now pick one of the suggested trend phrases or type your own topic."
+                )
 
-        if manual_topic:
-            openai_key = state["openai_key"]
-            firecrawl_key = state.get("firecrawl_key") or ""
-            keywords = state.get("keywords") or []
+                yield (
+                    status_text,
+                    json_url,
+                    keywords,
+                    style_notes,
+                    trends,
+                    gr.update(choices=trend_titles),
+                    st,
+                )
 
-            if firecrawl_key:
-                try:
-                    res = fetch_trends_firecrawl_tool(
-                        firecrawl_api_key=firecrawl_key,
-                        openai_api_key=openai_key,
-                        keywords=keywords,
-                        topic=manual_topic,
-                    )
-                    refined_trends = res.get("trends", []) or []
-                except Exception as e:
-                    print("[GENERATE] Firecrawl topic trends error:", e)
+            except Exception as e:
+                log(f"Agent error: {e}")
+                yield (
+                    f"Error while running agent: {e}",
+                    "",
+                    None,
+                    "",
+                    None,
+                    gr.update(choices=[]),
+                    {},
+                )
 
-            if refined_trends:
-                first_phrase = refined_trends[0].get("title") or ""
-                topic = first_phrase or manual_topic
+        # ------------------------------------------------------------------
+        # Callback for Generate LinkedIn Post
+        # ------------------------------------------------------------------
+
+        def on_generate_post(state, picked_title, manual_topic):
+            if not state or not state.get("openai_key"):
+                return "Please run the agent first to populate interests, style, and trends."
+
+            topic = None
+            refined_trends = None
+
+            manual_topic = (manual_topic or "").strip()
+            picked_title = (picked_title or "").strip()
+
+            if manual_topic:
+                openai_key = state["openai_key"]
+                firecrawl_key = state.get("firecrawl_key") or ""
+                keywords = state.get("keywords") or []
+
+                if firecrawl_key:
+                    try:
+                        res = fetch_trends_firecrawl_tool(
+                            firecrawl_api_key=firecrawl_key,
+                            openai_api_key=openai_key,
+                            keywords=keywords,
+                            topic=manual_topic,
+                        )
+                        refined_trends = res.get("trends", []) or []
+                    except Exception as e:
+                        print("[GENERATE] Firecrawl topic trends error:", e)
+
+                if refined_trends:
+                    first_phrase = refined_trends[0].get("title") or ""
+                    topic = first_phrase or manual_topic
+                else:
+                    topic = manual_topic
             else:
-                topic = manual_topic
-        else:
-            topic = picked_title
+                topic = picked_title
 
-        if not topic:
-            return "Please pick a suggested trend or type a custom topic first."
+            if not topic:
+                return "Please pick a suggested trend or type a custom topic first."
 
-        openai_key = state["openai_key"]
-        style_notes = state.get("style_notes") or ""
-        keywords = state.get("keywords") or []
+            openai_key = state["openai_key"]
+            style_notes = state.get("style_notes") or ""
+            keywords = state.get("keywords") or []
 
-        print("[GENERATE] final topic:", topic)
-        print("[GENERATE] keywords (ignored for generation):", keywords[:12])
+            print("[GENERATE] final topic:", topic)
+            print("[GENERATE] keywords (ignored for generation):", keywords[:12])
 
-        post = generate_linkedin_post(
-            openai_key=openai_key,
-            topic=topic,
-            style_notes=style_notes,
-            keywords=[],
-        )
+            try:
+                post = generate_linkedin_post(
+                    openai_key=openai_key,
+                    topic=topic,
+                    style_notes=style_notes,
+                    keywords=[],
+                )
+            except Exception as e:
+                print("[GENERATE] error:", e)
+                return f"Error while generating post: {e}"
 
-        state["current_post"] = post
-        if refined_trends is not None:
-            state["topic_trends"] = refined_trends
+            state["current_post"] = post
+            if refined_trends is not None:
+                state["topic_trends"] = refined_trends
 
-        return post
+            return post
 
-    # ------------------------------------------------------------------
-    # Callback for Save and possibly Autopost
-    # ------------------------------------------------------------------
+        # ------------------------------------------------------------------
+        # Callback for Save and possibly Autopost
+        # ------------------------------------------------------------------
 
-    def on_submit(state, do_save, do_autopost):
-        if not state:
-            return "State is empty. Please run the agent and generate a post first.", None
+        def on_submit(state, do_save, do_autopost):
+            if not state:
+                return "State is empty. Please run the agent and generate a post first.", None
 
-        post = state.get("current_post")
-        if not post:
-            return "No post has been generated yet. Please generate a post first.", None
+            post = state.get("current_post")
+            if not post:
+                return "No post has been generated yet. Please generate a post first.", None
 
-        saved_info = "Not saved."
-        try:
-            if do_save and state.get("sheet_url") and state.get("sa_path"):
-                ws_id, row_count = save_post_to_google_sheet(
-                    sheet_url=state["sheet_url"],
-                    content=post,
-                    service_account_json_path=state["sa_path"],
-                )
-                saved_info = (
-                    f"Post saved to sheet. Worksheet id {ws_id}, current row count {row_count}."
-                )
-        except Exception as e:
-            saved_info = f"Save to sheet failed: {e}"
+            saved_info = "Not saved."
+            try:
+                if do_save and state.get("sheet_url") and state.get("sa_path"):
+                    ws_id, row_count = save_post_to_google_sheet(
+                        sheet_url=state["sheet_url"],
+                        content=post,
+                        service_account_json_path=state["sa_path"],
+                    )
+                    saved_info = (
+                        f"Post saved to sheet. Worksheet id {ws_id}, current row count {row_count}."
+                    )
+            except Exception as e:
+                saved_info = f"Save to sheet failed: {e}"
 
-        autopost_resp = None
-        try:
-            if (
-                do_autopost
-                and state.get("phantom_key")
-                and state.get("session_cookie")
-                and state.get("user_agent")
-                and state.get("sheet_url")
-            ):
-                autopost_resp = trigger_phantombuster_autopost(
-                    phantom_api_key=state["phantom_key"],
-                    session_cookie=state["session_cookie"],
-                    user_agent=state["user_agent"],
-                    sheet_url=state["sheet_url"],
-                )
-        except Exception as e:
-            autopost_resp = {"error": str(e)}
-
-        return saved_info, autopost_resp
-
-    # Wire callbacks
-
-    run_btn.click(
-        on_run_agent,
-        inputs=[
-            openai_key_in,
-            phantom_key_in,
-            firecrawl_key_in,
-            session_cookie_in,
-            user_agent_in,
-            user_profile_url_in,
-            style_profile_url_in,
-            sheet_url_in,
-            sa_json_file_in,
-        ],
-        outputs=[
-            status_out,
-            json_url_out,
-            keywords_out,
-            style_out,
-            trends_out,
-            topic_choice_in,
-            state_all,
-        ],
-    )
+            autopost_resp = None
+            try:
+                if (
+                    do_autopost
+                    and state.get("phantom_key")
+                    and state.get("session_cookie")
+                    and state.get("user_agent")
+                    and state.get("sheet_url")
+                ):
+                    autopost_resp = trigger_phantombuster_autopost(
+                        phantom_api_key=state["phantom_key"],
+                        session_cookie=state["session_cookie"],
+                        user_agent=state["user_agent"],
+                        sheet_url=state["sheet_url"],
+                    )
+            except Exception as e:
+                autopost_resp = {"error": str(e)}
+
+            return saved_info, autopost_resp
+
+        # Wire callbacks
+
+        run_btn.click(
+            on_run_agent,
+            inputs=[
+                openai_key_in,
+                phantom_key_in,
+                firecrawl_key_in,
+                session_cookie_in,
+                user_agent_in,
+                user_profile_url_in,
+                style_profile_url_in,
+                sheet_url_in,
+                sa_json_file_in,
+            ],
+            outputs=[
+                status_out,
+                json_url_out,
+                keywords_out,
+                style_out,
+                trends_out,
+                topic_choice_in,
+                state_all,
+            ],
+        )
 
-    gen_btn.click(
-        on_generate_post,
-        inputs=[state_all, topic_choice_in, topic_manual_in],
-        outputs=[post_out],
-    )
+        gen_btn.click(
+            on_generate_post,
+            inputs=[state_all, topic_choice_in, topic_manual_in],
+            outputs=[post_out],
+        )
 
-    submit_btn.click(
-        on_submit,
-        inputs=[state_all, do_save_chk, do_autopost_chk],
-        outputs=[saved_out, autopost_out],
-    )
+        submit_btn.click(
+            on_submit,
+            inputs=[state_all, do_save_chk, do_autopost_chk],
+            outputs=[saved_out, autopost_out],
+        )
+
+    return demo
 
 
 if __name__ == "__main__":
     print("[MAIN] launching Gradio UI")
-    demo.launch(
+    # Callbacks are synchronous and Gradio runs them on its worker threads; the queue's
+    # default limit of one would make every session wait for the previous agent run
+    build_demo().queue(
+        default_concurrency_limit=int(os.getenv("GRADIO_CONCURRENCY", "8")),
+    ).launch(
         server_name="0.0.0.0",
         server_port=int(os.getenv("PORT", "7860")),
         share=True,
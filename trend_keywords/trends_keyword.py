@@ -1,13 +1,33 @@
 from flask import Flask, request, jsonify
 import os
 import json
+import time
+import hashlib
+import sqlite3
+import threading
+import queue
+import atexit
+import logging
+from logging.handlers import QueueHandler, QueueListener
 from openai import OpenAI
 from typing import List
-import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from firecrawl import Firecrawl 
 from dotenv import load_dotenv
 load_dotenv()
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Records are queued and written to stderr by a listener thread, so request and
+# pool threads never block on the console write.
+_log_queue = queue.Queue(-1)
+_log_listener = QueueListener(_log_queue, logging.StreamHandler(), respect_handler_level=True)
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper(), handlers=[QueueHandler(_log_queue)])
+_log_listener.start()
+atexit.register(_log_listener.stop)
+logger = logging.getLogger(__name__)
+
 app = Flask(__name__)
 
 # Initialize OpenAI client
@@ -25,6 +45,34 @@ if not FIRECRAWL_API_KEY:
 
 firecrawl = Firecrawl(api_key=FIRECRAWL_API_KEY)
 
+# Firecrawl searches and TrendMatch calls are network bound; run this many at once per request
+TREND_MAX_WORKERS = int(os.getenv("TREND_MAX_WORKERS", "8"))
+
+# Process-wide cap on in-flight TrendMatch calls, so concurrent requests together
+# stay under the OpenAI rate limits instead of multiplying TREND_MAX_WORKERS
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+_llm_slots = threading.BoundedSemaphore(LLM_MAX_CONCURRENCY)
+
+# Shared session so concurrent Firecrawl searches reuse TLS connections
+_SESSION = requests.Session()
+_SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=16,
+        pool_maxsize=max(32, TREND_MAX_WORKERS),
+        # Search POSTs are safe to repeat; 429/503 waits honour Retry-After, and the last
+        # response is handed back so the status check in firecrawl_search still applies
+        max_retries=Retry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=None,
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        ),
+    ),
+)
+
 
 #=================================================================
 #  Seaarchable Phrase Extraction Endpoint For Trend Keywords
@@ -65,71 +113,139 @@ def extract_full_results(raw_firecrawl_json):
     return cleaned
 
 
-def extract_business_phrases(company_data: dict, model: str = "gpt-4o-mini", debug: bool = True):
+BUSINESS_PHRASES_RULES = """
+Analyze the following company profile data and extract 8 to 12 multi-word interest phrases for trend searching.
 
-    try:
-        fields_to_use = [
-            "company_mission", "company_name", "content_themes", "industry",
-            "industry_terms", "primary_keywords", "secondary_keywords",
-            "target_audience", "trending_topics", "value_propositions"
-        ]
-
-        texts = []
-        for f in fields_to_use:
-            val = company_data.get(f)
-            if val:
-                if isinstance(val, list):
-                    texts.extend([str(x) for x in val])
-                else:
-                    texts.append(str(val))
-
-        corpus = "\n\n".join(texts)[:15000] or "No content"
-
-        sys_prompt = """
-                Analyze the following company profile data and extract 8 to 12 multi-word interest phrases for trend searching.
-
-                Requirements:
-                1. Each phrase must be 3 to 8 words long.
-                2. No single words or bigrams.
-                3. No vague generalities such as 'innovation' or 'leadership'
-                4. Each phrase must describe a concrete recurring theme or topic visible across the company data.
-                5. Each phrase must explicitly reference a product, category, or industry domain (e.g., kitchen, home decor, pet products, car accessories). Phrases without domain context are invalid.
-                6. Focus on trends and industry-specific topics that can be searched online.
-                7. Exclude slogans, mission statements, or value propositions not tied to specific products or themes.
-                8. Output only a JSON array of clean phrases.
-                """
+Requirements:
+1. Each phrase must be 3 to 8 words long.
+2. No single words or bigrams.
+3. No vague generalities such as 'innovation' or 'leadership'
+4. Each phrase must describe a concrete recurring theme or topic visible across the company data.
+5. Each phrase must explicitly reference a product, category, or industry domain (e.g., kitchen, home decor, pet products, car accessories). Phrases without domain context are invalid.
+6. Focus on trends and industry-specific topics that can be searched online.
+7. Exclude slogans, mission statements, or value propositions not tied to specific products or themes.
+"""
+
+BUSINESS_PHRASES_PROMPT = BUSINESS_PHRASES_RULES + '8. Output only a JSON object of the form {"phrases": [...]} holding the clean phrases.\n'
+
+BUSINESS_PHRASES_BATCH_PROMPT = BUSINESS_PHRASES_RULES + """8. The input holds several companies, each introduced by a "### COMPANY <n>" line. Apply the rules to each company separately.
+9. Output only one JSON object mapping each company number (as a string) to its JSON array of clean phrases, e.g. {"1": [...], "2": [...]}.
+"""
+
+BUSINESS_PHRASES_BATCH_SIZE = int(os.getenv("BUSINESS_PHRASES_BATCH_SIZE", "5"))
+
+# Phrase extraction is a simple task; point this at a smaller model (e.g. gpt-4.1-nano)
+# once it has been checked against a few real company profiles
+BUSINESS_PHRASES_MODEL = os.getenv("BUSINESS_PHRASES_MODEL", "gpt-4o-mini")
+
+BUSINESS_FIELDS = [
+    "company_mission", "company_name", "content_themes", "industry",
+    "industry_terms", "primary_keywords", "secondary_keywords",
+    "target_audience", "trending_topics", "value_propositions"
+]
+
+
+CORPUS_MAX_CHARS = 15000
 
 
+def company_corpus(company_data: dict) -> str:
+    # Collect field values until the cap is reached, then join once
+    texts = []
+    total = 0
+    for f in BUSINESS_FIELDS:
+        val = company_data.get(f)
+        if not val:
+            continue
+        for x in (val if isinstance(val, list) else [val]):
+            if total >= CORPUS_MAX_CHARS:
+                break
+            texts.append(str(x))
+            total += len(texts[-1]) + 2
+
+    return "\n\n".join(texts)[:CORPUS_MAX_CHARS] or "No content"
+
+
+def clean_phrases(arr) -> list:
+    return [str(x).strip() for x in arr if str(x).strip()]
+
+
+def extract_business_phrases(company_data: dict, model: str = BUSINESS_PHRASES_MODEL, debug: bool = True):
+
+    try:
+        corpus = company_corpus(company_data)
+
         resp = client.chat.completions.create(
             model=model,
             messages=[
-                {"role": "system", "content": sys_prompt},
+                {"role": "system", "content": BUSINESS_PHRASES_PROMPT},
                 {"role": "user", "content": corpus},
             ],
             temperature=0.2,
+            response_format={"type": "json_object"},
+            max_tokens=300,
         )
 
-        raw = resp.choices[0].message.content.strip()
-        raw_clean = raw.replace("```json", "").replace("```", "").strip()
+        raw = resp.choices[0].message.content
 
         if debug:
-            print("[OPENAI BUSINESS PHRASES] raw:", raw_clean, flush=True)
+            logger.info("[OPENAI BUSINESS PHRASES] raw: %s", raw)
+
+        return clean_phrases(json.loads(raw).get("phrases") or [])
+
+    except Exception as e:
+        logger.exception("[EXTRACT BUSINESS PHRASES ERROR]")
+        return []
+
+
+def extract_business_phrases_batched(companies: list, batch_size: int = BUSINESS_PHRASES_BATCH_SIZE,
+                                     model: str = BUSINESS_PHRASES_MODEL, debug: bool = True):
+    """
+    Extract phrases for several companies with one request per batch_size companies.
+    Returns one phrase list per company, in input order. A company the batch
+    response misses (or a failed batch) goes through extract_business_phrases.
+    """
+
+    def run_batch(batch):
+        if len(batch) == 1:
+            return [extract_business_phrases(batch[0], model=model, debug=debug)]
 
+        user_content = "\n\n".join(
+            f"### COMPANY {n}\n{company_corpus(company)}" for n, company in enumerate(batch, start=1)
+        )
+        parsed = {}
         try:
-            arr = json.loads(raw_clean)
-            if isinstance(arr, list):
-                return [str(x).strip() for x in arr if str(x).strip()]
-        except Exception as e:
+            resp = client.chat.completions.create(
+                model=model,
+                messages=[
+                    {"role": "system", "content": BUSINESS_PHRASES_BATCH_PROMPT},
+                    {"role": "user", "content": user_content},
+                ],
+                temperature=0.2,
+                response_format={"type": "json_object"},
+                max_tokens=300 * len(batch),
+            )
+            parsed = json.loads(resp.choices[0].message.content)
             if debug:
-                print("[OPENAI BUSINESS PHRASES] JSON parse error:", e, flush=True)
+                logger.info("[OPENAI BUSINESS PHRASES BATCH] raw: %s", parsed)
+        except Exception:
+            logger.exception("[EXTRACT BUSINESS PHRASES BATCH ERROR]")
 
-        # fallback: return non-empty lines
-        return [line.strip() for line in raw.split("\n") if line.strip()][:12]
+        results = []
+        for n, company in enumerate(batch, start=1):
+            arr = parsed.get(str(n)) if isinstance(parsed, dict) else None
+            if isinstance(arr, list):
+                results.append(clean_phrases(arr))
+            else:
+                results.append(extract_business_phrases(company, model=model, debug=debug))
+        return results
 
-    except Exception as e:
-        print("[EXTRACT BUSINESS PHRASES ERROR]", traceback.format_exc(), flush=True)
+    batches = [companies[i:i + batch_size] for i in range(0, len(companies), max(1, batch_size))]
+    if not batches:
         return []
 
+    with ThreadPoolExecutor(max_workers=max(1, min(TREND_MAX_WORKERS, len(batches)))) as executor:
+        return [phrases for batch_result in executor.map(run_batch, batches) for phrases in batch_result]
+
 # ------------------- Batch Extraction -------------------
 @app.route("/extract-phrases-batch", methods=["POST"])
 def extract_phrases_batch():
@@ -139,17 +255,12 @@ def extract_phrases_batch():
         if not websites:
             return jsonify({"error": "No websites provided"}), 400
 
-        results = []
-        for website in websites:
-            website_id = website.get("id")
-            try:
-                phrases = extract_business_phrases(website)
-            except Exception as e:
-                print(f"[ERROR] Extracting phrases for website {website_id}: {e}", flush=True)
-                phrases = []
+        all_phrases = extract_business_phrases_batched(websites)
 
+        results = []
+        for website, phrases in zip(websites, all_phrases):
             results.append({
-                "website_id": website_id,
+                "website_id": website.get("id"),
                 "domain": website.get("domain"),
                 "trend_keywords": phrases
             })
@@ -157,7 +268,7 @@ def extract_phrases_batch():
         return jsonify({"success": True, "results": results}), 200
 
     except Exception as e:
-        print("[BATCH EXTRACTION ERROR]", traceback.format_exc(), flush=True)
+        logger.exception("[BATCH EXTRACTION ERROR]")
         return jsonify({"error": str(e)}), 500
 
 
@@ -191,48 +302,100 @@ def extract_phrases_batch():
 # }
 # """
 SYSTEM_PROMPT = """
-You are TrendMatch, an analytical model that extracts structured, comparable information from web trend articles.
-
-Your goal is to produce a compact, normalized JSON representation of each trend suitable for cosine-similarity matching with company profiles (which include company mission, audience, and products with descriptions).
-
-### What to do
-Analyze the article text to extract:
-- The **main industry or domain** this trend belongs to
-- The **core concept** or practice being discussed
-- The **target audience** or users/businesses affected
-- The **types of relevant products or services**
-- The **practical business value or benefit**
-- A list of **semantic keywords or multi-word phrases**
-
-### Rules for consistency
-1. Always output the same JSON keys, even if data is not found.
-2. If a field is not clearly mentioned, set its value to `"unknown"` or an empty array (`[]`).
-3. Do not include explanations, commentary, or extra text.
-4. Keep phrasing factual, short, and domain-specific.
-5. Output only one valid JSON object.
-
-### Output format
+You are TrendMatch. From the web trend article, output one JSON object with exactly these keys,
+short, factual and domain-specific, for cosine matching against company profiles:
 {
   "title": "<short descriptive title>",
-  "domain": "<main industry or field, or 'unknown'>",
-  "core_concept": "<main idea or 'unknown'>",
-  "target_audience": "<who this applies to, or 'unknown'>",
-  "relevant_products_or_services": [
-    "<list of relevant items or leave [] if none>"
-  ],
-  "business_value": "<functional benefit or 'unknown'>",
-  "keywords": [
-    "<list of key multi-word phrases or leave [] if none>"
-  ]
+  "domain": "<main industry or field>",
+  "core_concept": "<main idea or practice>",
+  "target_audience": "<who this applies to>",
+  "relevant_products_or_services": ["<relevant product or service types>"],
+  "business_value": "<practical benefit>",
+  "keywords": ["<key multi-word phrases>"]
 }
+Use "unknown" or [] for anything the article does not state. No extra text.
 """
 
+# Bump when SYSTEM_PROMPT changes meaning without changing text (e.g. a model swap)
+SYSTEM_PROMPT_VERSION = "1"
+
+# ------------------------------
+# On-disk Response Cache
+# ------------------------------
+# Firecrawl searches and TrendMatch results are reused across requests. Off by
+# default like the backend caches; set LLM_CACHE_PATH to a sqlite file to enable.
+# Searches answer "latest trends", so they expire much sooner than TrendMatch results.
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "")
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", "86400"))
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", "600"))
+
+_cache_lock = threading.Lock()
+_cache_conn = None
+if LLM_CACHE_PATH:
+    try:
+        # Several gunicorn workers share the file; wait briefly on their write locks
+        _cache_conn = sqlite3.connect(LLM_CACHE_PATH, timeout=5, check_same_thread=False)
+        _cache_conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, payload TEXT NOT NULL, expires REAL NOT NULL)"
+        )
+        _cache_conn.execute("CREATE INDEX IF NOT EXISTS responses_expires ON responses (expires)")
+        _cache_conn.commit()
+    except sqlite3.Error as e:
+        logger.warning("[CACHE] disabled, cannot open %s: %s", LLM_CACHE_PATH, e)
+        _cache_conn = None
+
+
+def cache_key(**parts):
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def cache_get(key):
+    """Cached value or None; cache errors (e.g. a locked database) count as a miss."""
+    if _cache_conn is None:
+        return None
+    try:
+        with _cache_lock:
+            row = _cache_conn.execute("SELECT payload, expires FROM responses WHERE key = ?", (key,)).fetchone()
+    except sqlite3.Error as e:
+        logger.warning("[CACHE] read failed: %s", e)
+        return None
+    if row is None or row[1] < time.time():
+        return None
+    return json.loads(row[0])
+
+
+def cache_set(key, value, ttl=LLM_CACHE_TTL):
+    """Store value for ttl seconds and prune expired rows; errors are logged and skipped."""
+    if _cache_conn is None:
+        return
+    now = time.time()
+    try:
+        with _cache_lock:
+            _cache_conn.execute("DELETE FROM responses WHERE expires < ?", (now,))
+            _cache_conn.execute(
+                "INSERT OR REPLACE INTO responses (key, payload, expires) VALUES (?, ?, ?)",
+                (key, json.dumps(value), now + ttl),
+            )
+            _cache_conn.commit()
+    except sqlite3.Error as e:
+        logger.warning("[CACHE] write failed: %s", e)
+        try:
+            with _cache_lock:
+                _cache_conn.rollback()
+        except sqlite3.Error:
+            pass
+
 # ------------------------------
 # Firecrawl Search
 # ------------------------------
-def firecrawl_search(keyword):
+def firecrawl_search(keyword, limit=5):
     query = f"latest trends about {keyword}"
-    response = requests.post(
+    key = cache_key(fn="firecrawl_search", kw=keyword, limit=limit)
+    cached = cache_get(key)
+    if cached is not None:
+        return cached
+
+    response = _SESSION.post(
         "https://api.firecrawl.dev/v2/search",
         headers={
             "Authorization": f"Bearer {FIRECRAWL_API_KEY}",
@@ -240,16 +403,20 @@ def firecrawl_search(keyword):
         },
         json={
             "query": query,
-            "limit": 5,
+            "limit": limit,
             "scrapeOptions": {"formats": ["markdown"]},
         },
     )
-    return {
+    result = {
         "keyword": keyword,
         "query": query,
         "data": response.json() if response.status_code == 200 else None,
         "error": None if response.status_code == 200 else response.text,
     }
+    # Failures are not cached so a transient error is retried on the next request
+    if result["error"] is None:
+        cache_set(key, result, ttl=SEARCH_CACHE_TTL)
+    return result
 
 # ------------------------------
 # Extract Articles from Firecrawl
@@ -265,9 +432,9 @@ def extract_full_results(raw_firecrawl_json):
     """
     try:
         web_entries = raw_firecrawl_json.get("data", {}).get("web", [])
-        print("Web entries count:", len(web_entries), flush=True)
+        logger.info("Web entries count: %d", len(web_entries))
     except Exception as e:
-        print("[ERROR] extract_full_results:", e, flush=True)
+        logger.error("[ERROR] extract_full_results: %s", e)
         return []
 
     cleaned = []
@@ -291,85 +458,153 @@ def extract_full_results(raw_firecrawl_json):
 # ------------------------------
 # Call GPT on Single Article
 # ------------------------------
+# Characters of article markdown sent to TrendMatch; the opening carries the trend
+TREND_MARKDOWN_CHARS = int(os.getenv("TREND_MARKDOWN_CHARS", "4000"))
+
+
+def compact_article(article):
+    """The fields TrendMatch actually reads; drops raw_metadata/og_image and trims markdown."""
+    return {
+        "title": article.get("title"),
+        "description": article.get("description") or article.get("meta_description"),
+        "site_name": article.get("site_name"),
+        "url": article.get("url"),
+        "markdown": (article.get("markdown") or "")[:TREND_MARKDOWN_CHARS],
+    }
+
+
 def call_llm(article):
+    article = compact_article(article)
+    # Articles without a url are keyed by their full content
+    key = cache_key(
+        fn="call_llm",
+        article=article.get("url") or article,
+        prompt=hashlib.sha256(SYSTEM_PROMPT.encode("utf-8")).hexdigest(),
+        version=SYSTEM_PROMPT_VERSION,
+    )
+    cached = cache_get(key)
+    if cached is not None:
+        return cached
+
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": json.dumps(article)},
-            ],
-            temperature=0,
-        )
+        with _llm_slots:
+            response = client.chat.completions.create(
+                model="gpt-4o-mini",
+                messages=[
+                    {"role": "system", "content": SYSTEM_PROMPT},
+                    {"role": "user", "content": json.dumps(article)},
+                ],
+                temperature=0,
+                response_format={"type": "json_object"},
+                # One TrendMatch object fits well inside this; a truncated reply fails
+                # json.loads below and is returned as an error, never cached
+                max_tokens=400,
+            )
         # Fix for new OpenAI SDK
         content = response.choices[0].message.content
 
-        return json.loads(content)
+        result = json.loads(content)
     except Exception as e:
         return {"error": "Invalid JSON from model", "raw": str(e)}
 
+    cache_set(key, result)
+    return result
+
+# ------------------------------
+# Keyword Cleanup
+# ------------------------------
+def unique_keywords(keywords):
+    """Strip, collapse whitespace and drop case-insensitive repeats, keeping the first spelling."""
+    seen = set()
+    unique = []
+    for kw in keywords or []:
+        if not isinstance(kw, str):
+            continue
+        kw = " ".join(kw.split())
+        folded = kw.casefold()
+        if kw and folded not in seen:
+            seen.add(folded)
+            unique.append(kw)
+    return unique
+
+# ------------------------------
+# Concurrent Search + TrendMatch
+# ------------------------------
+def fan_out_trends(keywords, articles_per_keyword=None):
+    """
+    Search every keyword concurrently and run call_llm on each keyword's articles
+    as soon as its search lands. Returns one entry per keyword, in input order:
+    {"keyword", "error"} or {"keyword", "results"}.
+    """
+    output = [None] * len(keywords)
+    pending = {}
+
+    with ThreadPoolExecutor(max_workers=max(1, min(TREND_MAX_WORKERS, len(keywords) * 6))) as executor:
+        # Only scrape as many results as will be processed
+        limit = articles_per_keyword or 5
+        searches = {executor.submit(firecrawl_search, kw, limit): idx for idx, kw in enumerate(keywords)}
+
+        for fut in as_completed(searches):
+            idx = searches[fut]
+            kw = keywords[idx]
+            try:
+                search_result = fut.result()
+            except Exception as exc:
+                # One failed search must not take down the other keywords
+                logger.warning("Search for %r failed: %s", kw, exc)
+                output[idx] = {"keyword": kw, "error": str(exc)}
+                continue
+
+            if search_result["error"]:
+                output[idx] = {"keyword": kw, "error": search_result["error"]}
+                continue
+
+            extracted_articles = extract_full_results(search_result["data"])[:articles_per_keyword]
+            pending[idx] = [executor.submit(call_llm, article) for article in extracted_articles]
+
+        for idx, futures in pending.items():
+            output[idx] = {"keyword": keywords[idx], "results": [f.result() for f in futures]}
+
+    return output
+
 # ------------------------------
 # Generate Trends Endpoint
 # ------------------------------
 @app.route("/generate-trends", methods=["POST"])
 def generate_trends():
-    print("[GENERATE TRENDS] Request received", flush=True)
+    logger.info("[GENERATE TRENDS] Request received")
     data = request.get_json()
-    keywords = data.get("keywords", [])
+    # "AI", " ai " and "ai" are one search; run it once
+    keywords = unique_keywords(data.get("keywords", []))
 
     if not keywords:
         return jsonify({"error": "Missing keywords[]"}), 400
 
-    final_output = []
-
-    for kw in keywords:
-        search_result = firecrawl_search(kw)
-
-        if search_result["error"]:
-            final_output.append({"keyword": kw, "error": search_result["error"]})
-            continue
-
-        extracted_articles = extract_full_results(search_result["data"])
-        trend_results = []
-
-        for article in extracted_articles:
-            trend_json = call_llm(article)
-            trend_results.append(trend_json)
-
-        final_output.append({"keyword": kw, "results": trend_results})
+    final_output = fan_out_trends(keywords)
 
     return jsonify(final_output), 200
 
 
 @app.route("/generate-first-trend", methods=["POST"])
 def generate_first_trend():
-    print("[GENERATE FIRST TREND] Request received", flush=True)
+    logger.info("[GENERATE FIRST TREND] Request received")
     data = request.get_json()
-    keywords = data.get("keywords", [])
+    # "AI", " ai " and "ai" are one search; run it once
+    keywords = unique_keywords(data.get("keywords", []))
 
     if not keywords:
         return jsonify({"error": "Missing keywords[]"}), 400
 
     final_output = []
 
-    for kw in keywords:
-        search_result = firecrawl_search(kw)
-
-        if search_result["error"]:
-            final_output.append({"keyword": kw, "error": search_result["error"]})
-            continue
-
-        extracted_articles = extract_full_results(search_result["data"])
-
-        if not extracted_articles:
-            final_output.append({"keyword": kw, "error": "No articles found"})
-            continue
-
-        # Only process the first article
-        first_article = extracted_articles[0]
-        trend_json = call_llm(first_article)
-
-        final_output.append({"keyword": kw, "result": trend_json})
+    # Only process the first article of each keyword
+    for entry in fan_out_trends(keywords, articles_per_keyword=1):
+        if "error" in entry:
+            final_output.append(entry)
+        elif not entry["results"]:
+            final_output.append({"keyword": entry["keyword"], "error": "No articles found"})
+        else:
+            final_output.append({"keyword": entry["keyword"], "result": entry["results"][0]})
 
     return jsonify(final_output), 200
 